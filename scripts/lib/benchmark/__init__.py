@@ -0,0 +1,5 @@
+"""
+图表流水线基准测试包
+
+生成可缩放的合成语料，分阶段计时各生成器，结果输出为 JSON。
+"""
@@ -0,0 +1,7 @@
+"""允许通过 python3 -m scripts.lib.benchmark 运行基准测试"""
+
+import sys
+
+from .main import main
+
+sys.exit(main())
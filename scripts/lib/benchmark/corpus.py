@@ -0,0 +1,232 @@
+"""
+合成基准语料
+
+按规模参数生成与真实文档结构一致的输入，规模越大输入越大，
+同一组参数总是生成完全相同的内容，便于在不同提交之间比较。
+"""
+
+import pathlib
+import random
+from typing import List
+
+# 随机数种子，保证语料可重复
+CORPUS_SEED = 20251006
+
+# 合成 DOT 中使用的 herd7 边类型：(标签, 颜色)
+HERD_EDGE_KINDS = [
+    ('po', 'black'),
+    ('rf', 'red'),
+    ('fr', '#ffa040'),
+    ('co', 'blue'),
+    ('ppo', 'indigo'),
+    ('addr', 'indigo'),
+    ('fence', 'darkgreen'),
+]
+
+# GDB x 命令每页的 8 字节单元数
+GDB_UNITS_PER_PAGE = 512
+
+
+def make_bytefield_edn(rows: int) -> str:
+    """
+    生成包含 rows 行 32 位寄存器字段的 bytefield EDN 文档
+
+    每行由不同宽度的字段组成，混合普通文本、带样式的文本和不同的边框，
+    结构与 blog 中的 CSR 图一致。
+
+    Args:
+        rows: 行数
+
+    Returns:
+        带 [bytefield] 标记的 EDN 文档
+    """
+    rng = random.Random(CORPUS_SEED + rows)
+    lines = [
+        '[bytefield]',
+        '----',
+        '(defattrs :plain [:plain {:font-family "M+ 1p Fallback"}])',
+        '(def row-height 35 )',
+        '(def row-header-fn nil)',
+        '(def left-margin 100)',
+        '(def right-margin 100)',
+        '(def boxes-per-row 32)',
+        '(draw-column-headers {:height 20 :font-size 18 :labels (reverse ["0" "" "" "" "" "" "" "" '
+        '"" "" "" "" "" "" "" "" "" "" "" "" "" "" "" "" "" "" "" "" "" "" "" "31"])})',
+        '',
+    ]
+    for row in range(rows):
+        remaining = 32
+        field = 0
+        while remaining > 0:
+            span = min(remaining, rng.choice([1, 2, 3, 4, 5, 8, 12]))
+            label = f"F{row}_{field}[{span - 1}:0]" if span > 1 else f"B{row}_{field}"
+            if rng.random() < 0.3:
+                lines.append(f'(draw-box (text "{label}" {{:font-weight "bold"}}) {{:span {span}}})')
+            elif rng.random() < 0.3:
+                lines.append(f'(draw-box "{label}" {{:span {span} :text-anchor "start" '
+                             f':borders {{:top :border-unrelated :bottom :border-unrelated}}}})')
+            else:
+                lines.append(f'(draw-box "{label}" {{:span {span}}})')
+            remaining -= span
+            field += 1
+        lines.append('')
+    lines.append('----')
+    return '\n'.join(lines) + '\n'
+
+
+def make_wavedrom_reg(fields: int) -> str:
+    """
+    生成包含 fields 个字段的宽 wavedrom reg 文档
+
+    其中约四分之一是属性文本较长的 1 位字段，用于触发字号覆盖规则。
+
+    Args:
+        fields: 字段数量
+
+    Returns:
+        带 [wavedrom] 标记的文档
+    """
+    rng = random.Random(CORPUS_SEED + fields)
+    entries = []
+    for index in range(fields):
+        if index % 4 == 3:
+            bits = 1
+            attr = ['1', f'long{index}', f'attr{index}']
+        else:
+            bits = rng.choice([2, 3, 5, 7])
+            attr = [str(bits), f'a{index}', f'b{index}']
+        attrs = ', '.join(f"'{a}'" for a in attr)
+        entries.append(f"  {{bits: {bits}, name: 'f{index}', attr: [{attrs}]}},")
+    return '\n'.join(['[wavedrom, ,svg]', '....', '{reg: ['] + entries + [']}', '....']) + '\n'
+
+
+def make_litmus_test(threads: int, accesses: int = 4) -> str:
+    """
+    生成 threads 个线程的 RISC-V litmus 测试
+
+    每个线程依次写自己的变量、读下一个线程的变量，中间插入 fence，
+    形成跨所有线程的环。
+
+    Args:
+        threads: 线程数量
+        accesses: 每个线程的访存指令对数量
+
+    Returns:
+        litmus 测试文本
+    """
+    variables = [f"v{t}" for t in range(threads)]
+    init = ' '.join(f"{t}:s0={variables[t]}; {t}:s1={variables[(t + 1) % threads]};"
+                    for t in range(threads))
+    columns: List[List[str]] = []
+    for t in range(threads):
+        column = []
+        for i in range(accesses):
+            column.append(f"li t1,{i + 1}")
+            column.append("sw t1,0(s0)")
+            column.append("fence rw,rw")
+            column.append(f"lw a{i % 8},0(s1)")
+        columns.append(column)
+
+    width = max(len(line) for column in columns for line in column) + 1
+    lines = [f"RISCV SYN{threads:02d}", "", "{", init, "}", ""]
+    lines.append(' | '.join(f"P{t}".ljust(width) for t in range(threads)) + ' ;')
+    for row in range(len(columns[0])):
+        lines.append(' | '.join(column[row].ljust(width) for column in columns) + ' ;')
+    lines.append("")
+    lines.append("exists " + ' /\\ '.join(f"{t}:a0=0" for t in range(threads)))
+    return '\n'.join(lines) + '\n'
+
+
+def make_herd_dot(threads: int, events_per_thread: int = 8, graphs: int = 1) -> str:
+    """
+    生成与 herd7 输出结构一致的 DOT 文本
+
+    每个事件节点带固定坐标，边使用 herd7 的默认颜色和 HTML 标签，
+    同时包含组合颜色（如 color="darkgreen:indigo"）。
+
+    Args:
+        threads: 线程（列）数量
+        events_per_thread: 每个线程的事件数量
+        graphs: 输出中的图数量
+
+    Returns:
+        DOT 文本
+    """
+    rng = random.Random(CORPUS_SEED + threads * 1000 + events_per_thread)
+    out = []
+    for graph in range(graphs):
+        out.extend([
+            'digraph G {',
+            '',
+            'splines=spline;',
+            'pad="0.000000";',
+            f'label="Litmus test SYN{threads:02d}-{graph} (outcome permitted)."',
+            '',
+            '/* the unlocked events */',
+        ])
+        total = threads * events_per_thread
+        for event in range(total):
+            thread, index = divmod(event, events_per_thread)
+            access = 'W' if index % 2 == 0 else 'R'
+            out.append(f'eiid{event} [label="{chr(97 + index % 26)}: {access}v{thread}={index}", '
+                       f'shape="none", fontsize=8, pos="{thread + 1:.6f},{2.0 - index * 0.45:.6f}!", '
+                       f'fixedsize="false", height="0.111111", width="0.555556"];')
+        out.append('')
+        out.append('/* The viewed-before edges */')
+        for event in range(total):
+            for target in rng.sample(range(total), k=min(2, total)):
+                if target == event:
+                    continue
+                first, second = rng.sample(HERD_EDGE_KINDS, k=2)
+                if rng.random() < 0.2:
+                    label = (f'<<font color="{first[1]}">{first[0]}</font>'
+                             f'<font color="{second[1]}">{second[0]}</font>>')
+                    color = f'{first[1]}:{second[1]}'
+                else:
+                    label = f'<<font color="{first[1]}">{first[0]}</font>>'
+                    color = first[1]
+                out.append(f'eiid{event} -> eiid{target} [label={label}, color="{color}", fontsize=11, '
+                           f'penwidth="3.000000", arrowsize="0.666700"];')
+        out.append('}')
+    return '\n'.join(out) + '\n'
+
+
+def make_gdb_dump(pages: int) -> str:
+    """
+    生成包含 satp 寄存器和 pages 个 `x /512g` 页的 GDB 输出
+
+    每页的前几个单元是指向下一页的有效页表项，其余为零，
+    与 virtual-memory 文档中的页表遍历输出一致。
+
+    Args:
+        pages: 页数
+
+    Returns:
+        GDB 输出文本
+    """
+    rng = random.Random(CORPUS_SEED + pages)
+    base_ppn = 0x83a9e
+    lines = [
+        '(gdb) i r satp',
+        f'satp           0x{(8 << 60) | base_ppn:016x}\t-9223372036854236514',
+        '',
+    ]
+    for page in range(pages):
+        ppn = base_ppn + page
+        address = ppn << 12
+        lines.append(f'(gdb) x /{GDB_UNITS_PER_PAGE}g 0x{address:X}')
+        values = [0] * GDB_UNITS_PER_PAGE
+        for slot in rng.sample(range(GDB_UNITS_PER_PAGE), k=4):
+            target_ppn = base_ppn + rng.randrange(pages)
+            values[slot] = (target_ppn << 10) | 0x1
+        for offset in range(0, GDB_UNITS_PER_PAGE, 2):
+            lines.append(f'0x{address + offset * 8:x}:\t0x{values[offset]:016x}\t0x{values[offset + 1]:016x}')
+        lines.append('')
+    return '\n'.join(lines) + '\n'
+
+
+def write_text(path: pathlib.Path, content: str) -> pathlib.Path:
+    """写入语料文件并返回路径"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding='utf-8')
+    return path
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+图表流水线基准测试
+
+为每个生成器合成不同规模的输入，分别计时 parse、rewrite、tool、post 阶段，
+结果输出为 JSON，可与之前提交的结果比较以发现性能回退。
+
+用法:
+    python3 -m scripts.lib.benchmark --output bench.json
+    python3 -m scripts.lib.benchmark --compare baseline.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import pathlib
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from scripts.lib.common.utils import eprint, find_project_root
+from .stages import GENERATORS, Stage, build_stages
+
+# 结果格式版本
+RESULT_VERSION = 1
+
+# 比较时视为回退/提升的默认相对变化
+DEFAULT_THRESHOLD = 0.10
+
+
+def parse_args() -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='图表生成流水线基准测试')
+
+    parser.add_argument(
+        '--only',
+        choices=list(GENERATORS),
+        action='append',
+        help='只测试指定的生成器，可重复指定'
+    )
+
+    parser.add_argument(
+        '--stage',
+        choices=['parse', 'rewrite', 'tool', 'post'],
+        action='append',
+        help='只测试指定的阶段，可重复指定'
+    )
+
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=5,
+        help='每个阶段的计时次数，取中位数 (默认: 5)'
+    )
+
+    parser.add_argument(
+        '--scale',
+        type=float,
+        default=1.0,
+        help='语料规模倍数，乘积取整后相同的规模只测一次 (默认: 1.0)'
+    )
+
+    parser.add_argument(
+        '--output', '-o',
+        type=pathlib.Path,
+        help='把结果写入 JSON 文件'
+    )
+
+    parser.add_argument(
+        '--compare',
+        type=pathlib.Path,
+        help='与之前的 JSON 结果比较'
+    )
+
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f'比较时的回退阈值（相对变化，默认: {DEFAULT_THRESHOLD}）'
+    )
+
+    parser.add_argument(
+        '--metric',
+        choices=['min', 'median'],
+        default='min',
+        help='比较时使用的统计量（最小值受系统噪声影响最小，默认: min）'
+    )
+
+    parser.add_argument(
+        '--corpus-dir',
+        type=pathlib.Path,
+        help='保存合成语料的目录（默认使用临时目录）'
+    )
+
+    return parser.parse_args()
+
+
+def git_revision() -> Optional[str]:
+    """当前提交（工作区有改动时带 -dirty 后缀）"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}-dirty" if dirty else commit
+
+
+def time_stage(stage: Stage, repeat: int) -> Dict[str, Any]:
+    """
+    对单个阶段计时
+
+    先预热一次（加载模块、填充正则缓存），再计时 repeat 次。
+
+    Args:
+        stage: 阶段
+        repeat: 计时次数
+
+    Returns:
+        单个阶段的结果记录
+    """
+    record: Dict[str, Any] = {
+        'generator': stage.generator,
+        'stage': stage.stage,
+        'name': stage.name,
+        'size': stage.size,
+    }
+    if not stage.available():
+        record['status'] = 'skipped'
+        record['reason'] = f"未找到 {stage.tool}"
+        return record
+
+    try:
+        stage.func()
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            stage.func()
+            samples.append(time.perf_counter() - start)
+    except Exception as e:
+        record['status'] = 'failed'
+        record['reason'] = f"{type(e).__name__}: {e}"
+        return record
+
+    record.update({
+        'status': 'ok',
+        'repeat': repeat,
+        'median': statistics.median(samples),
+        'min': min(samples),
+        'max': max(samples),
+        'mean': statistics.fmean(samples),
+    })
+    return record
+
+
+def result_key(record: Dict[str, Any]) -> Tuple:
+    return record['generator'], record['stage'], record['name'], record['size']
+
+
+def format_seconds(seconds: float) -> str:
+    return f"{seconds * 1000:10.3f} ms"
+
+
+def print_results(records: List[Dict[str, Any]]) -> None:
+    """输出结果表"""
+    print(f"{'生成器':<10}{'阶段':<9}{'规模':>6}  {'中位数':>13}  {'最小':>13}  名称")
+    for record in records:
+        head = f"{record['generator']:<10}{record['stage']:<9}{record['size']:>6}  "
+        if record['status'] == 'ok':
+            print(f"{head}{format_seconds(record['median'])}  {format_seconds(record['min'])}  {record['name']}")
+        else:
+            print(f"{head}{'-':>13}  {'-':>13}  {record['name']} ({record['reason']})")
+
+
+def compare_results(records: List[Dict[str, Any]], baseline_path: pathlib.Path, threshold: float,
+                    metric: str = 'min') -> int:
+    """
+    与基线结果比较
+
+    Args:
+        records: 本次结果
+        baseline_path: 基线 JSON 文件
+        threshold: 回退阈值
+        metric: 比较的统计量（'min' 或 'median'）
+
+    Returns:
+        回退的阶段数量
+    """
+    baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+    previous = {result_key(r): r for r in baseline.get('results', []) if r.get('status') == 'ok'}
+
+    print(f"\n与 {baseline_path}（{baseline.get('meta', {}).get('revision')}）比较:")
+    regressions = 0
+    for record in records:
+        old = previous.get(result_key(record))
+        if record['status'] != 'ok' or old is None:
+            continue
+        ratio = record[metric] / old[metric] if old[metric] > 0 else float('inf')
+        if ratio > 1 + threshold:
+            mark = '回退'
+            regressions += 1
+        elif ratio < 1 - threshold:
+            mark = '提升'
+        else:
+            continue
+        print(f"  {mark} {ratio:6.2f}x  {record['generator']}/{record['stage']}/{record['name']} "
+              f"size={record['size']}: {format_seconds(old[metric]).strip()} -> "
+              f"{format_seconds(record[metric]).strip()}")
+    if regressions == 0:
+        print(f"  没有超过 {threshold:.0%} 的回退")
+    return regressions
+
+
+def main() -> int:
+    """主函数"""
+    args = parse_args()
+
+    project_root = find_project_root()
+    if project_root is None:
+        eprint("[ERROR] 未找到项目根目录")
+        return 1
+    os.chdir(project_root)
+
+    generators = args.only or list(GENERATORS)
+    print(f"正在生成语料（规模 x{args.scale}）...")
+    stages = build_stages(generators, args.scale, args.corpus_dir)
+    if args.stage:
+        stages = [stage for stage in stages if stage.stage in args.stage]
+
+    records = []
+    for stage in stages:
+        records.append(time_stage(stage, max(1, args.repeat)))
+    print_results(records)
+
+    tools = sorted({stage.tool for stage in stages if stage.tool})
+    result = {
+        'version': RESULT_VERSION,
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'scale': args.scale,
+            'repeat': args.repeat,
+            'tools': {tool: shutil.which(tool) for tool in tools},
+        },
+        'results': records,
+    }
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(result, ensure_ascii=False, indent=1) + '\n', encoding='utf-8')
+        print(f"\n结果已写入 {args.output}")
+
+    if args.compare:
+        if compare_results(records, args.compare, args.threshold, args.metric):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,230 @@
+"""
+各生成器的基准阶段
+
+每个生成器的流水线拆成四类阶段分别计时：
+- parse: 从源文件提取/解析内容（extract_*_content、parse_dot_graphs、parse_gdb_region）
+- rewrite: 进程内的内容改写（process_bytefield_params、apply_theme_colors_to_dot 等）
+- tool: 外部工具（bytefield-svg、wavedrom-cli、herd7、neato、dot）或进程内渲染器
+- post: SVG 后处理（主题改写、标签重排）
+
+阶段构造时会先执行一次前置步骤（不计时），为后续阶段准备输入；
+需要的外部工具缺失时，该阶段标记为跳过。
+"""
+
+import pathlib
+import shutil
+import subprocess
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from . import corpus
+
+# 所有主题（post 和 rewrite 阶段对每个主题各执行一次）
+THEMES = ['light', 'dark']
+
+
+@dataclass
+class Stage:
+    """
+    一个计时阶段
+
+    Attributes:
+        generator: 生成器名称
+        stage: 阶段类型（parse、rewrite、tool、post）
+        name: 被计时的函数或工具
+        size: 语料规模参数
+        func: 被计时的调用
+        tool: 需要的外部工具，缺失时跳过
+    """
+    generator: str
+    stage: str
+    name: str
+    size: int
+    func: Callable[[], Any]
+    tool: Optional[str] = None
+
+    def available(self) -> bool:
+        return self.tool is None or shutil.which(self.tool) is not None
+
+
+def _run_tool(args: List[str], input_text: Optional[str] = None) -> str:
+    """运行外部工具并返回标准输出"""
+    result = subprocess.run(args, input=input_text, capture_output=True, text=True, check=True)
+    return result.stdout
+
+
+def bytefield_stages(rows: int, work_dir: pathlib.Path) -> List[Stage]:
+    """bytefield: rows 行的寄存器图"""
+    from scripts.lib.bytefield.converter import (
+        apply_base_style_to_svg, recolor_svg, render_bytefield_svg, render_native_svg,
+    )
+    from scripts.lib.bytefield.params import process_bytefield_params
+    from scripts.lib.bytefield.parser import extract_bytefield_content
+
+    edn_file = corpus.write_text(work_dir / f"bytefield-{rows}.edn", corpus.make_bytefield_edn(rows))
+    content = extract_bytefield_content(edn_file)
+    processed, param_info = process_bytefield_params(content)
+
+    # 后处理的输入优先使用 bytefield-svg 的输出，缺失时使用原生渲染器的输出
+    if shutil.which('bytefield-svg'):
+        raw_svg = render_bytefield_svg(processed)
+    else:
+        raw_svg = render_native_svg(processed, param_info)
+    base_svg = apply_base_style_to_svg(raw_svg)
+
+    def post() -> None:
+        base = apply_base_style_to_svg(raw_svg)
+        for theme in THEMES:
+            recolor_svg(base, theme)
+
+    return [
+        Stage('bytefield', 'parse', 'extract_bytefield_content', rows,
+              lambda: extract_bytefield_content(edn_file)),
+        Stage('bytefield', 'rewrite', 'process_bytefield_params', rows,
+              lambda: process_bytefield_params(content)),
+        Stage('bytefield', 'tool', 'bytefield-svg', rows,
+              lambda: render_bytefield_svg(processed), tool='bytefield-svg'),
+        Stage('bytefield', 'tool', 'native', rows,
+              lambda: render_native_svg(processed, param_info)),
+        Stage('bytefield', 'post', 'apply_base_style_to_svg+recolor_svg', rows, post),
+        Stage('bytefield', 'post', 'recolor_svg', rows,
+              lambda: [recolor_svg(base_svg, theme) for theme in THEMES]),
+    ]
+
+
+def wavedrom_stages(fields: int, work_dir: pathlib.Path) -> List[Stage]:
+    """wavedrom: fields 个字段的 reg 图"""
+    from scripts.lib.wavedrom.converter import analyze_wavedrom_fields, apply_theme_to_svg
+    from scripts.lib.wavedrom.parser import extract_wavedrom_content
+
+    edn_file = corpus.write_text(work_dir / f"wavedrom-{fields}.edn", corpus.make_wavedrom_reg(fields))
+    content = extract_wavedrom_content(edn_file)
+    json_file = corpus.write_text(work_dir / f"wavedrom-{fields}.json5", content)
+    svg_file = work_dir / f"wavedrom-{fields}.svg"
+
+    def tool() -> None:
+        _run_tool(['wavedrom-cli', '-i', str(json_file), '-s', str(svg_file)])
+
+    stages = [
+        Stage('wavedrom', 'parse', 'extract_wavedrom_content', fields,
+              lambda: extract_wavedrom_content(edn_file)),
+        Stage('wavedrom', 'rewrite', 'analyze_wavedrom_fields', fields,
+              lambda: analyze_wavedrom_fields(content)),
+        Stage('wavedrom', 'tool', 'wavedrom-cli', fields, tool, tool='wavedrom-cli'),
+    ]
+
+    # 后处理需要 wavedrom-cli 的输出
+    svg_content = None
+    if shutil.which('wavedrom-cli'):
+        tool()
+        svg_content = svg_file.read_text(encoding='utf-8')
+    stages.append(Stage('wavedrom', 'post', 'apply_theme_to_svg', fields,
+                        lambda: [apply_theme_to_svg(svg_content, theme, content) for theme in THEMES],
+                        tool='wavedrom-cli'))
+    return stages
+
+
+def litmus_stages(threads: int, work_dir: pathlib.Path) -> List[Stage]:
+    """litmus: threads 个线程的测试及对应规模的 herd7 DOT"""
+    from scripts.lib.litmus.dot import apply_theme_colors_to_dot, parse_dot_graphs
+    from scripts.lib.litmus.herd_config import build_herd_args
+    from scripts.lib.litmus.svg import reorder_svg_elements_for_label_priority
+
+    lit_file = corpus.write_text(work_dir / f"SYN{threads:02d}.litmus", corpus.make_litmus_test(threads))
+    dot_file = corpus.write_text(work_dir / f"SYN{threads:02d}.dot",
+                                 corpus.make_herd_dot(threads, events_per_thread=8, graphs=4))
+    graphs = parse_dot_graphs(dot_file)
+    graph_dot = '\n'.join(graphs[0]) + '\n'
+    herd_dir = work_dir / f"herd-{threads}"
+    herd_dir.mkdir(parents=True, exist_ok=True)
+
+    def neato() -> str:
+        return _run_tool(['neato', '-Tsvg:cairo'], apply_theme_colors_to_dot(graph_dot, 'light'))
+
+    stages = [
+        Stage('litmus', 'parse', 'parse_dot_graphs', threads, lambda: parse_dot_graphs(dot_file)),
+        Stage('litmus', 'rewrite', 'apply_theme_colors_to_dot', threads,
+              lambda: [apply_theme_colors_to_dot(graph_dot, theme) for theme in THEMES]),
+        Stage('litmus', 'tool', 'herd7', threads,
+              lambda: _run_tool(build_herd_args(lit_file, 'light', herd_dir)), tool='herd7'),
+        Stage('litmus', 'tool', 'neato', threads, neato, tool='neato'),
+    ]
+
+    # 标签重排需要 neato 的输出
+    svg_content = neato() if shutil.which('neato') else None
+    stages.append(Stage('litmus', 'post', 'reorder_svg_elements_for_label_priority', threads,
+                        lambda: [reorder_svg_elements_for_label_priority(svg_content, theme)
+                                 for theme in THEMES],
+                        tool='neato'))
+    stages.append(Stage('litmus', 'post', 'reorder_svg_elements_for_label_priority(copy)', threads,
+                        lambda: [reorder_svg_elements_for_label_priority(svg_content, theme, 'copy')
+                                 for theme in THEMES],
+                        tool='neato'))
+    return stages
+
+
+def memory_stages(pages: int, work_dir: pathlib.Path) -> List[Stage]:
+    """memory: pages 个 x /512g 页的 GDB 输出"""
+    from scripts.lib.memory_viz.src.cli.main import generate_memory_dot
+    from scripts.lib.memory_viz.src.core.parser import parse_gdb_groups, parse_gdb_region
+
+    dump_file = corpus.write_text(work_dir / f"memory-{pages}.txt", corpus.make_gdb_dump(pages))
+    lines = dump_file.read_text(encoding='utf-8').splitlines()
+    dot_content = generate_memory_dot(lines, 'light')
+
+    def parse() -> None:
+        text = dump_file.read_text(encoding='utf-8').splitlines()
+        for group in parse_gdb_groups(text):
+            parse_gdb_region(group['lines'])
+
+    return [
+        Stage('memory', 'parse', 'parse_gdb_region', pages, parse),
+        Stage('memory', 'rewrite', 'generate_memory_dot', pages,
+              lambda: [generate_memory_dot(lines, theme) for theme in THEMES]),
+        Stage('memory', 'tool', 'dot', pages,
+              lambda: _run_tool(['dot', '-Tsvg:cairo'], dot_content), tool='dot'),
+    ]
+
+
+# 生成器名称 -> (阶段构造函数, 基础规模列表)
+# 规模参数依次为：bytefield 行数、wavedrom 字段数、litmus 线程数、memory 页数
+# memory 的最大规模是数千个 x /512g 页，对应完整页表遍历的 GDB 输出
+GENERATORS: Dict[str, tuple] = {
+    'bytefield': (bytefield_stages, [16, 64, 256]),
+    'wavedrom': (wavedrom_stages, [16, 64, 256]),
+    'litmus': (litmus_stages, [2, 4, 8]),
+    'memory': (memory_stages, [16, 256, 2048]),
+}
+
+
+def scaled_sizes(sizes: List[int], scale: float) -> List[int]:
+    """
+    基础规模乘以倍数后的规模（去重并排序）
+
+    倍数较小时多个基础规模可能取整为同一个值，去重后每个规模只产生一组结果，
+    不同提交之间按 (生成器, 阶段, 规模) 比较时不会出现重复的键。
+    """
+    return sorted({max(1, int(size * scale)) for size in sizes})
+
+
+def build_stages(generators: List[str], scale: float, work_dir: Optional[pathlib.Path] = None) -> List[Stage]:
+    """
+    生成语料并构造所有阶段
+
+    Args:
+        generators: 要测试的生成器
+        scale: 规模倍数（乘到基础规模上）
+        work_dir: 语料目录，为 None 时使用临时目录
+
+    Returns:
+        阶段列表
+    """
+    if work_dir is None:
+        work_dir = pathlib.Path(tempfile.mkdtemp(prefix='diagram-bench-'))
+    stages = []
+    for generator in generators:
+        factory, sizes = GENERATORS[generator]
+        for size in scaled_sizes(sizes, scale):
+            stages.extend(factory(size, work_dir / generator))
+    return stages
@@ -0,0 +1,5 @@
+"""
+统一构建包
+
+把所有资产生成器的任务组成依赖图，在共享的线程池上并行构建。
+"""
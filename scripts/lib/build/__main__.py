@@ -0,0 +1,7 @@
+"""允许通过 python3 -m scripts.lib.build 运行统一构建"""
+
+import sys
+
+from .main import main
+
+sys.exit(main())
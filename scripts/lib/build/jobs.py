@@ -0,0 +1,348 @@
+"""
+构建任务发现模块
+
+扫描项目中所有类型的资产，为每个源文件生成构建任务。
+任务函数直接调用各生成器模块的单文件处理函数，全部在同一个
+Python 进程中执行，不再为每种资产启动独立的解释器。
+"""
+
+import importlib.util
+import pathlib
+import shutil
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from scripts.lib.common.asset_index import get_asset_index
+from scripts.lib.common.cache import BuildCache, fingerprint
+from scripts.lib.common.graphviz import render_files
+from scripts.lib.common.utils import ensure_dir
+from .scheduler import Job
+
+# 所有资产类型，按发现顺序排列
+ASSET_KINDS = [
+    'bytefield',
+    'wavedrom',
+    'litmus',
+    'riscv_litmus',
+    'memory',
+    'memory_visualizers',
+    'ansi',
+    'webp',
+    'svgo',
+]
+
+# 各资产类型需要的外部工具（缺少时跳过该类型）
+REQUIRED_TOOLS = {
+    'bytefield': ['bytefield-svg', 'inkscape'],
+    'wavedrom': ['wavedrom-cli', 'inkscape'],
+    'litmus': ['herd7', 'neato'],
+    'riscv_litmus': ['neato'],
+    'memory': ['dot'],
+    'memory_visualizers': [],
+    'ansi': ['terminal-to-html'],
+    'webp': ['cwebp'],
+    'svgo': ['svgo'],
+}
+
+# 生成 docs/blog 中 SVG 的资产类型，svgo 压缩需要等待它们全部完成
+SVG_PRODUCER_KINDS = ['bytefield', 'wavedrom', 'litmus', 'riscv_litmus', 'memory']
+
+# 各资产类型源文件的后缀（监视模式据此决定需要重新发现的资产类型）
+SOURCE_SUFFIXES = {
+    'bytefield': ['.edn'],
+    'wavedrom': ['.edn'],
+    'litmus': ['.litmus'],
+    'riscv_litmus': ['.txt'],
+    'memory': ['.txt'],
+    'ansi': ['.ansi'],
+}
+
+# 代码目录
+SCRIPTS_LIB_DIR = pathlib.Path(__file__).resolve().parent.parent
+MEMORY_VIZ_SRC_DIR = SCRIPTS_LIB_DIR / 'memory_viz' / 'src'
+COMMON_DIR = SCRIPTS_LIB_DIR / 'common'
+ANSI_SCRIPT = SCRIPTS_LIB_DIR / 'ansi-v2' / 'main.py'
+
+
+@dataclass
+class BuildOptions:
+    """
+    构建选项
+
+    Attributes:
+        project_root: 项目根目录
+        themes: 要生成的主题列表
+        renderer: bytefield 渲染器
+        riscv_source_dirs: RISC-V litmus DOT 源目录，为 None 时处理 docs/ 下所有 _assets/dot 目录
+        riscv_scale: RISC-V litmus SVG 缩放因子
+        riscv_relayout: RISC-V litmus 是否运行布局（False 时直接用 neato -n2 渲染）
+        keep_dot: 是否保留 litmus 的中间 DOT 文件
+        caches: 命名空间到构建缓存的映射
+    """
+    project_root: pathlib.Path
+    themes: List[str]
+    renderer: str
+    riscv_source_dirs: Optional[List[pathlib.Path]]
+    riscv_scale: float
+    riscv_relayout: bool = True
+    keep_dot: bool = False
+    caches: Dict[str, BuildCache] = field(default_factory=dict)
+
+
+def missing_tools(kind: str, options: BuildOptions) -> List[str]:
+    """
+    检查资产类型需要的外部工具是否齐全
+
+    Args:
+        kind: 资产类型
+        options: 构建选项
+
+    Returns:
+        缺少的工具列表
+    """
+    tools = list(REQUIRED_TOOLS[kind])
+    if kind == 'bytefield' and options.renderer == 'native':
+        tools.remove('bytefield-svg')
+    missing = [tool for tool in tools if shutil.which(tool) is None]
+    if kind == 'memory_visualizers' and importlib.util.find_spec('matplotlib') is None:
+        missing.append('matplotlib')
+    if kind == 'memory' and importlib.util.find_spec('numpy') is None:
+        missing.append('numpy')
+    return missing
+
+
+def _relative_name(path: pathlib.Path, options: BuildOptions) -> str:
+    """任务名称中使用相对于项目根目录的路径"""
+    try:
+        return str(path.resolve().relative_to(options.project_root))
+    except ValueError:
+        return str(path)
+
+
+def _bytefield_jobs(options: BuildOptions) -> List[Job]:
+    from scripts.lib.bytefield.files import find_bytefield_files
+    from scripts.lib.bytefield.main import process_bytefield_file
+
+    cache = options.caches['bytefield']
+    jobs = []
+    for edn_file, theme_outputs in find_bytefield_files(options.themes):
+        def build(edn_file=edn_file, theme_outputs=theme_outputs) -> bool:
+            statuses = process_bytefield_file(edn_file, theme_outputs, options.renderer, cache)
+            return all(status != 'failed' for status in statuses.values())
+
+        jobs.append(Job(f"bytefield:{_relative_name(edn_file, options)}", 'bytefield', build,
+                        ('inkscape',), sources=[edn_file]))
+    return jobs
+
+
+def _wavedrom_jobs(options: BuildOptions) -> List[Job]:
+    from scripts.lib.wavedrom.files import find_wavedrom_files
+    from scripts.lib.wavedrom.main import process_wavedrom_file
+
+    cache = options.caches['wavedrom']
+    jobs = []
+    for edn_file, theme_dirs in find_wavedrom_files(options.themes):
+        def build(edn_file=edn_file, theme_dirs=theme_dirs) -> bool:
+            statuses = process_wavedrom_file(edn_file, theme_dirs, cache)
+            return statuses is not None and all(status != 'failed' for status in statuses.values())
+
+        jobs.append(Job(f"wavedrom:{_relative_name(edn_file, options)}", 'wavedrom', build,
+                        ('inkscape',), sources=[edn_file]))
+    return jobs
+
+
+def _litmus_jobs(options: BuildOptions) -> List[Job]:
+    from scripts.lib.litmus.files import find_litmus_files
+    from scripts.lib.litmus.main import process_litmus_file
+    from scripts.lib.litmus.svg import RenderedGraphs
+
+    cache = options.caches['litmus']
+    herd_cache = options.caches['herd7']
+    # 所有 litmus 任务共享已渲染的图，相同的图只渲染一次
+    rendered = RenderedGraphs()
+    jobs = []
+    for lit_file, theme_dirs in find_litmus_files(options.themes):
+        def build(lit_file=lit_file, theme_dirs=theme_dirs) -> bool:
+            return process_litmus_file(lit_file, theme_dirs, cache, herd_cache=herd_cache,
+                                       keep_dot=options.keep_dot, rendered=rendered) > 0
+
+        jobs.append(Job(f"litmus:{_relative_name(lit_file, options)}", 'litmus', build,
+                        ('herd7', 'neato'), sources=[lit_file]))
+    return jobs
+
+
+def _riscv_litmus_jobs(options: BuildOptions) -> List[Job]:
+    from scripts.lib.riscv_litmus.manifest import ManifestSet
+    from scripts.lib.riscv_litmus.processor import find_dot_files, process_dot_file
+
+    source_dirs = options.riscv_source_dirs
+    if source_dirs is not None:
+        source_dirs = [source_dir for source_dir in source_dirs if source_dir.is_dir()]
+
+    cache = options.caches['riscv_litmus']
+    manifests = ManifestSet(reuse=cache.enabled)
+    jobs = []
+    for dot_file, theme_dirs in find_dot_files(options.themes, source_dirs):
+        def build(dot_file=dot_file, theme_dirs=theme_dirs) -> bool:
+            exported = process_dot_file(dot_file, theme_dirs, options.riscv_scale, cache,
+                                        relayout=options.riscv_relayout, manifests=manifests)
+            # 每个任务结束后写回所在目录的清单，中断的构建也不会丢失已完成的记录
+            manifests.get(dot_file).save()
+            return exported > 0
+
+        jobs.append(Job(f"riscv_litmus:{_relative_name(dot_file, options)}", 'riscv_litmus', build,
+                        ('neato',), sources=[dot_file]))
+    return jobs
+
+
+def build_memory_layout(txt_file: pathlib.Path, theme_dirs: List[Tuple[str, pathlib.Path]],
+                        cache: BuildCache) -> bool:
+    """
+    生成单个内存布局文件各主题的 DOT 和 SVG（与 generate-memory-layout.sh 共用缓存条目）
+
+    各主题只有颜色不同，未命中缓存的主题共用一次 dot 布局。
+
+    Args:
+        txt_file: GDB 输出文件（绝对路径）
+        theme_dirs: (主题, 输出目录) 列表
+        cache: 构建缓存
+
+    Returns:
+        是否成功
+    """
+    from scripts.lib.memory_viz.src.cli.main import generate_memory_dot
+    from scripts.lib.memory_viz.src.core.colors import THEME_COLORS
+    from scripts.lib.memory_viz.src.core.config import DEFAULT_COLUMNS
+
+    pending = []
+    for theme, output_dir in theme_dirs:
+        ensure_dir(str(output_dir))
+
+        # 与 python3 -m scripts.lib.common.cache 的键保持一致
+        key = cache.make_key([fingerprint(txt_file)], {}, THEME_COLORS[theme], ['dot'],
+                             [MEMORY_VIZ_SRC_DIR, COMMON_DIR])
+        entry = f"{txt_file}:{theme}"
+        if cache.restore(entry, key, output_dir) is None:
+            pending.append((theme, output_dir, entry, key))
+
+    if not pending:
+        return True
+
+    lines = txt_file.read_text().splitlines()
+    dot_paths = []
+    for theme, output_dir, _, _ in pending:
+        dot_path = output_dir / f"{txt_file.stem}.dot"
+        dot_path.write_text(generate_memory_dot(lines, theme, DEFAULT_COLUMNS) + "\n")
+        dot_paths.append(dot_path)
+
+    svg_paths = render_files(dot_paths, 'dot')
+
+    for (_, output_dir, entry, key), dot_path, svg_path in zip(pending, dot_paths, svg_paths):
+        cache.store(entry, key, output_dir, [dot_path, svg_path])
+    return True
+
+
+def _memory_jobs(options: BuildOptions) -> List[Job]:
+    cache = options.caches['memory']
+    jobs = []
+    for txt_file in get_asset_index().files('memory'):
+        images_dir = txt_file.parent.parent / 'images'
+        theme_dirs = [(theme, images_dir / theme) for theme in options.themes]
+
+        def build(txt_file=txt_file, theme_dirs=theme_dirs) -> bool:
+            return build_memory_layout(txt_file, theme_dirs, cache)
+
+        jobs.append(Job(f"memory:{_relative_name(txt_file, options)}", 'memory', build,
+                        ('dot',), sources=[txt_file]))
+    return jobs
+
+
+def _memory_visualizer_jobs(options: BuildOptions) -> List[Job]:
+    jobs = []
+    for name in ('binary_tree', 'buddy_system'):
+        def build(name=name) -> bool:
+            module = importlib.import_module(f'scripts.lib.memory_viz.src.visualizers.{name}')
+            module.main()
+            return True
+
+        # pyplot 不是线程安全的，通过 matplotlib 工具名额串行执行
+        jobs.append(Job(f"memory_visualizers:{name}", 'memory_visualizers', build, ('matplotlib',)))
+    return jobs
+
+
+def _ansi_jobs(options: BuildOptions) -> List[Job]:
+    jobs = []
+    for ansi_file in get_asset_index().files('ansi'):
+        def build(ansi_file=ansi_file) -> bool:
+            # ansi-v2 不是可导入的包，与 batch-convert.sh 一样按脚本运行
+            result = subprocess.run([sys.executable, str(ANSI_SCRIPT), str(ansi_file),
+                                     str(ansi_file.with_suffix('.mdx'))],
+                                    capture_output=True, text=True)
+            return result.returncode == 0 and '转换失败' not in result.stdout
+
+        jobs.append(Job(f"ansi:{_relative_name(ansi_file, options)}", 'ansi', build,
+                        ('terminal-to-html',), sources=[ansi_file]))
+    return jobs
+
+
+def _script_job(kind: str, script: pathlib.Path, tool: str) -> Job:
+    """运行图片处理 Shell 脚本的任务"""
+    def build() -> bool:
+        result = subprocess.run(['bash', str(script)], capture_output=True, text=True)
+        return result.returncode == 0
+
+    return Job(f"{kind}:{script.name}", kind, build, (tool,))
+
+
+def _webp_jobs(options: BuildOptions) -> List[Job]:
+    return [_script_job('webp', SCRIPTS_LIB_DIR / 'image' / 'convert-png-to-webp.sh', 'cwebp')]
+
+
+def _svgo_jobs(options: BuildOptions) -> List[Job]:
+    return [_script_job('svgo', SCRIPTS_LIB_DIR / 'image' / 'convert-svg-to-svgo.sh', 'svgo')]
+
+
+# 资产类型到任务发现函数的映射
+JOB_FACTORIES: Dict[str, Callable[[BuildOptions], List[Job]]] = {
+    'bytefield': _bytefield_jobs,
+    'wavedrom': _wavedrom_jobs,
+    'litmus': _litmus_jobs,
+    'riscv_litmus': _riscv_litmus_jobs,
+    'memory': _memory_jobs,
+    'memory_visualizers': _memory_visualizer_jobs,
+    'ansi': _ansi_jobs,
+    'webp': _webp_jobs,
+    'svgo': _svgo_jobs,
+}
+
+
+def discover_jobs(kinds: List[str], options: BuildOptions) -> Tuple[List[Job], Dict[str, List[str]]]:
+    """
+    发现指定资产类型的所有构建任务并建立依赖关系
+
+    Args:
+        kinds: 要构建的资产类型
+        options: 构建选项
+
+    Returns:
+        (任务列表, 因缺少工具而跳过的资产类型到缺少工具的映射)
+    """
+    jobs: List[Job] = []
+    unavailable: Dict[str, List[str]] = {}
+    for kind in kinds:
+        missing = missing_tools(kind, options)
+        if missing:
+            unavailable[kind] = missing
+            continue
+        jobs.extend(JOB_FACTORIES[kind](options))
+
+    # svgo 压缩所有 images 目录中的 SVG，必须在生成 SVG 的任务之后执行；
+    # 只约束顺序，个别生成任务失败时其余成功生成的 SVG 仍然需要压缩
+    producers = [job.name for job in jobs if job.kind in SVG_PRODUCER_KINDS]
+    for job in jobs:
+        if job.kind == 'svgo':
+            job.after.extend(producers)
+
+    return jobs, unavailable
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+统一构建入口
+
+发现所有类型的资产（bytefield、wavedrom、litmus、RISC-V litmus、
+内存布局、内存可视化、图片压缩），组成带依赖关系的任务图，
+在共享的有界线程池上并行执行，并输出统一的耗时摘要。
+
+用法:
+    python3 -m scripts.lib.build [--jobs N] [--limit TOOL=N] [--only KIND] [--skip KIND]
+"""
+
+import argparse
+import os
+import pathlib
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from scripts.lib.bytefield.converter import DEFAULT_RENDERER, RENDERER_CHOICES
+from scripts.lib.common.cache import add_cache_arguments, cache_from_args
+from scripts.lib.common.inkscape import configure_inkscape_pool
+from scripts.lib.common.utils import eprint, find_project_root
+from .jobs import ASSET_KINDS, SOURCE_SUFFIXES, BuildOptions, discover_jobs
+from .scheduler import STATUS_FAILED, STATUS_OK, STATUS_SKIPPED, JobResult, Scheduler
+from .watch import watch
+
+# 可选主题
+THEME_CHOICES = ['light', 'dark']
+
+# 缓存命名空间（通常即资产类型）
+CACHE_NAMESPACES = ['bytefield', 'wavedrom', 'litmus', 'herd7', 'riscv_litmus', 'memory']
+
+# 不以资产类型命名的缓存命名空间所属的资产类型
+CACHE_NAMESPACE_KINDS = {'herd7': 'litmus'}
+
+# 摘要中列出的最慢任务数量
+SLOWEST_COUNT = 5
+
+
+def default_tool_limits(workers: int) -> Dict[str, int]:
+    """
+    各外部工具的默认并发上限
+
+    Inkscape 会话占用内存较多，matplotlib 的 pyplot 不是线程安全的，
+    svgo 和 cwebp 的脚本自身会遍历全部图片；其余工具只受线程数限制。
+
+    Args:
+        workers: 工作线程数量
+
+    Returns:
+        工具名称到并发上限的映射
+    """
+    return {
+        'inkscape': 2,
+        'herd7': workers,
+        'neato': workers,
+        'dot': workers,
+        'matplotlib': 1,
+        'cwebp': 1,
+        'svgo': 1,
+    }
+
+
+def parse_limit(value: str) -> tuple:
+    """解析 TOOL=N 形式的工具并发上限"""
+    tool, sep, limit = value.partition('=')
+    if not sep or not tool or not limit.isdigit() or int(limit) < 1:
+        raise argparse.ArgumentTypeError(f"无效的并发上限: {value}（应为 TOOL=N，N ≥ 1）")
+    return tool, int(limit)
+
+
+def parse_args() -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(
+        description='并行构建所有图表和图片资产',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f"""
+资产类型: {', '.join(ASSET_KINDS)}
+
+示例:
+  # 构建全部资产
+  python3 -m scripts.lib.build
+
+  # 只构建 litmus 和 memory，最多 4 个并行任务
+  python3 -m scripts.lib.build --only litmus --only memory --jobs 4
+
+  # 放宽 Inkscape 会话数量
+  python3 -m scripts.lib.build --limit inkscape=4
+
+  # 构建一次后持续监视源文件，只重建变化的图表
+  python3 -m scripts.lib.build --watch
+        """
+    )
+
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=os.cpu_count() or 1,
+        help='并行任务数量 (默认: CPU 核心数)'
+    )
+
+    parser.add_argument(
+        '--limit',
+        type=parse_limit,
+        action='append',
+        default=[],
+        metavar='TOOL=N',
+        help='设置外部工具的并发上限，可重复指定 (如 inkscape=2)'
+    )
+
+    parser.add_argument(
+        '--only',
+        choices=ASSET_KINDS,
+        action='append',
+        help='只构建指定类型的资产，可重复指定'
+    )
+
+    parser.add_argument(
+        '--skip',
+        choices=ASSET_KINDS,
+        action='append',
+        default=[],
+        help='跳过指定类型的资产，可重复指定'
+    )
+
+    parser.add_argument(
+        '--theme',
+        choices=THEME_CHOICES + ['all'],
+        default='all',
+        help='要生成的主题 (默认: all)'
+    )
+
+    parser.add_argument(
+        '--renderer',
+        choices=RENDERER_CHOICES,
+        default=DEFAULT_RENDERER,
+        help=f'bytefield SVG 渲染器 (默认: {DEFAULT_RENDERER})'
+    )
+
+    parser.add_argument(
+        '--riscv-source-dir',
+        type=pathlib.Path,
+        action='append',
+        dest='riscv_source_dirs',
+        help='RISC-V litmus DOT 源目录，可以重复指定 (默认: docs/ 下所有 _assets/dot 目录)'
+    )
+
+    parser.add_argument(
+        '--scale',
+        type=float,
+        default=2.0,
+        help='RISC-V litmus SVG 缩放因子 (默认: 2.0)'
+    )
+
+    parser.add_argument(
+        '--no-relayout',
+        action='store_true',
+        help='RISC-V litmus 坐标换算为点后直接用 neato -n2 渲染，不再运行布局'
+    )
+
+    parser.add_argument(
+        '--keep-dot',
+        action='store_true',
+        help='保留 litmus 的中间 DOT 文件（完整输出和每个图），便于调试'
+    )
+
+    parser.add_argument(
+        '--list',
+        action='store_true',
+        help='只列出任务及其依赖，不执行'
+    )
+
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='构建后持续监视源文件，只重建变化的图表（不含 svgo、webp 等全量任务）'
+    )
+
+    parser.add_argument(
+        '--poll',
+        action='store_true',
+        help='监视模式下使用轮询代替 inotify'
+    )
+
+    add_cache_arguments(parser)
+
+    return parser.parse_args()
+
+
+def print_result(result: JobResult) -> None:
+    """任务结束时输出一行进度"""
+    if result.status == STATUS_OK:
+        print(f"  ✓ {result.job.name} ({result.seconds:.2f}s)", flush=True)
+    elif result.status == STATUS_FAILED:
+        eprint(f"  ✗ {result.job.name} ({result.seconds:.2f}s): {result.error}")
+    else:
+        eprint(f"  - {result.job.name}: 跳过，{result.error}")
+
+
+def print_summary(results: List[JobResult], wall_seconds: float, workers: int) -> None:
+    """
+    输出按资产类型分组的耗时摘要
+
+    Args:
+        results: 所有任务结果
+        wall_seconds: 总耗时（秒）
+        workers: 工作线程数量
+    """
+    by_kind: Dict[str, List[JobResult]] = defaultdict(list)
+    for result in results:
+        by_kind[result.job.kind].append(result)
+
+    print()
+    print("=" * 72)
+    print(f"{'类型':<20}{'任务':>6}{'成功':>6}{'失败':>6}{'跳过':>6}{'累计(s)':>12}{'最长(s)':>12}")
+    print("-" * 72)
+    for kind in ASSET_KINDS:
+        kind_results = by_kind.get(kind)
+        if not kind_results:
+            continue
+        counts = {status: sum(1 for r in kind_results if r.status == status)
+                  for status in (STATUS_OK, STATUS_FAILED, STATUS_SKIPPED)}
+        total = sum(r.seconds for r in kind_results)
+        longest = max(r.seconds for r in kind_results)
+        print(f"{kind:<20}{len(kind_results):>6}{counts[STATUS_OK]:>6}{counts[STATUS_FAILED]:>6}"
+              f"{counts[STATUS_SKIPPED]:>6}{total:>12.2f}{longest:>12.2f}")
+    print("-" * 72)
+
+    busy = sum(r.seconds for r in results)
+    print(f"总耗时: {wall_seconds:.2f}s，任务累计: {busy:.2f}s，"
+          f"并行度: {busy / wall_seconds if wall_seconds > 0 else 0:.1f}/{workers}")
+
+    slowest = sorted((r for r in results if r.status != STATUS_SKIPPED),
+                     key=lambda r: r.seconds, reverse=True)[:SLOWEST_COUNT]
+    if slowest:
+        print("最慢的任务:")
+        for result in slowest:
+            print(f"  {result.seconds:8.2f}s  {result.job.name}")
+
+
+def main() -> int:
+    """主函数"""
+    args = parse_args()
+
+    project_root = find_project_root()
+    if project_root is None:
+        eprint("[ERROR] 未找到项目根目录")
+        return 1
+    os.chdir(project_root)
+
+    themes = THEME_CHOICES if args.theme == 'all' else [args.theme]
+    kinds = [kind for kind in (args.only or ASSET_KINDS) if kind not in args.skip]
+    if args.watch:
+        # 监视模式只处理有单个源文件的资产类型
+        kinds = [kind for kind in kinds if kind in SOURCE_SUFFIXES]
+
+    workers = max(1, args.jobs)
+    limits = default_tool_limits(workers)
+    limits.update(dict(args.limit))
+
+    options = BuildOptions(
+        project_root=pathlib.Path(project_root).resolve(),
+        themes=themes,
+        renderer=args.renderer,
+        riscv_source_dirs=args.riscv_source_dirs,
+        riscv_scale=args.scale,
+        riscv_relayout=not args.no_relayout,
+        keep_dot=args.keep_dot,
+        caches={namespace: cache_from_args(namespace, args) for namespace in CACHE_NAMESPACES},
+    )
+
+    print("正在扫描资产...")
+    jobs, unavailable = discover_jobs(kinds, options)
+    for kind, missing in unavailable.items():
+        eprint(f"[WARN] 未找到 {', '.join(missing)}，跳过 {kind}")
+
+    if not jobs and not args.watch:
+        print("没有需要构建的资产")
+        return 0
+
+    counts: Dict[str, int] = defaultdict(int)
+    for job in jobs:
+        counts[job.kind] += 1
+    print(f"找到 {len(jobs)} 个任务: " + ", ".join(f"{kind} {count}" for kind, count in counts.items()))
+
+    if args.list:
+        for job in jobs:
+            deps = f" <- {len(job.deps) + len(job.after)} 个依赖" if job.deps or job.after else ""
+            print(f"  {job.name} [{', '.join(job.tools)}]{deps}")
+        return 0
+
+    # Inkscape 会话池与调度器的 inkscape 名额保持一致
+    configure_inkscape_pool(size=limits['inkscape'])
+
+    print(f"并行任务: {workers}，工具上限: "
+          + ", ".join(f"{tool}={limit}" for tool, limit in sorted(limits.items())) + "\n")
+
+    start = time.perf_counter()
+    results = Scheduler(jobs, workers, limits).run(on_result=print_result)
+    wall_seconds = time.perf_counter() - start
+
+    print_summary(results, wall_seconds, workers)
+    for namespace in CACHE_NAMESPACES:
+        kind = CACHE_NAMESPACE_KINDS.get(namespace, namespace)
+        if any(r.job.kind == kind for r in results):
+            print(f"{namespace} {options.caches[namespace].summary()}")
+        else:
+            options.caches[namespace].flush()
+    if unavailable:
+        print(f"未构建（缺少工具）: {', '.join(unavailable)}")
+
+    failed = sum(1 for r in results if r.status != STATUS_OK)
+    if args.watch:
+        return watch(kinds, options, workers, limits, polling=args.poll)
+    if failed:
+        print(f"失败或跳过: {failed}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
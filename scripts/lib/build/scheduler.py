@@ -0,0 +1,200 @@
+"""
+构建任务调度模块
+
+按依赖关系（DAG）调度构建任务：所有任务共享一个有界的工作线程池，
+同时每种外部工具有独立的并发上限（例如 Inkscape 占用内存较多，
+herd7 占用 CPU 较多）。任务只有在依赖全部成功、且所需工具都有空闲
+名额时才会启动；依赖失败的任务被跳过。顺序依赖（after）只要求前序任务
+结束，不论成功与否。
+"""
+
+import pathlib
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Mapping, Optional, Tuple
+
+# 任务状态
+STATUS_OK = 'ok'
+STATUS_FAILED = 'failed'
+STATUS_SKIPPED = 'skipped'
+
+
+@dataclass
+class Job:
+    """
+    构建任务
+
+    Attributes:
+        name: 任务的唯一名称，如 'bytefield:mtvec.edn'
+        kind: 资产类型，用于分组统计
+        func: 任务函数，返回是否成功
+        tools: 任务占用的外部工具
+        deps: 依赖的任务名称，任一依赖未成功时跳过该任务
+        after: 只约束顺序的前序任务名称，前序任务结束（无论成功、失败或跳过）后才启动
+        sources: 任务读取的源文件，监视模式据此把文件变化映射到任务
+    """
+    name: str
+    kind: str
+    func: Callable[[], bool]
+    tools: Tuple[str, ...] = ()
+    deps: List[str] = field(default_factory=list)
+    after: List[str] = field(default_factory=list)
+    sources: List[pathlib.Path] = field(default_factory=list)
+
+
+@dataclass
+class JobResult:
+    """
+    任务执行结果
+
+    Attributes:
+        job: 对应的任务
+        status: 'ok'、'failed' 或 'skipped'
+        seconds: 执行耗时（秒），跳过的任务为 0
+        error: 失败或跳过的原因
+    """
+    job: Job
+    status: str
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+def validate_jobs(jobs: List[Job]) -> None:
+    """
+    检查任务名称唯一、依赖（包括顺序依赖）存在且不存在环
+
+    Args:
+        jobs: 任务列表
+
+    Raises:
+        ValueError: 任务定义不合法
+    """
+    names = set()
+    for job in jobs:
+        if job.name in names:
+            raise ValueError(f"重复的任务名称: {job.name}")
+        names.add(job.name)
+
+    for job in jobs:
+        for dep in job.deps + job.after:
+            if dep not in names:
+                raise ValueError(f"任务 {job.name} 依赖不存在的任务 {dep}")
+
+    # Kahn 算法：能全部出队说明没有环
+    remaining = {job.name: len(set(job.deps + job.after)) for job in jobs}
+    dependents: Dict[str, List[str]] = {job.name: [] for job in jobs}
+    for job in jobs:
+        for dep in set(job.deps + job.after):
+            dependents[dep].append(job.name)
+    queue = deque(name for name, count in remaining.items() if count == 0)
+    visited = 0
+    while queue:
+        name = queue.popleft()
+        visited += 1
+        for dependent in dependents[name]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                queue.append(dependent)
+    if visited != len(jobs):
+        cyclic = sorted(name for name, count in remaining.items() if count > 0)
+        raise ValueError(f"任务依赖存在环: {', '.join(cyclic)}")
+
+
+class Scheduler:
+    """
+    DAG 任务调度器
+
+    Attributes:
+        workers: 工作线程数量
+        limits: 工具名称到并发上限的映射，未列出的工具只受线程数限制
+    """
+
+    def __init__(self, jobs: List[Job], workers: int, limits: Mapping[str, int]):
+        validate_jobs(jobs)
+        self.jobs = jobs
+        self.workers = max(1, workers)
+        self.limits = {tool: max(1, limit) for tool, limit in limits.items()}
+
+    def _limit(self, tool: str) -> int:
+        return self.limits.get(tool, self.workers)
+
+    @staticmethod
+    def _execute(job: Job) -> JobResult:
+        """在工作线程中执行任务并计时"""
+        start = time.perf_counter()
+        try:
+            ok = job.func()
+            error = None if ok else '任务返回失败'
+        except Exception as e:
+            ok = False
+            error = f"{type(e).__name__}: {e}"
+        seconds = time.perf_counter() - start
+        return JobResult(job, STATUS_OK if ok else STATUS_FAILED, seconds, error)
+
+    def run(self, on_result: Optional[Callable[[JobResult], None]] = None) -> List[JobResult]:
+        """
+        执行所有任务
+
+        Args:
+            on_result: 每个任务结束（或被跳过）时的回调
+
+        Returns:
+            按完成顺序排列的任务结果
+        """
+        by_name = {job.name: job for job in self.jobs}
+        waiting = {job.name: set(job.deps + job.after) for job in self.jobs}
+        dependents: Dict[str, List[str]] = {job.name: [] for job in self.jobs}
+        for job in self.jobs:
+            for dep in waiting[job.name]:
+                dependents[dep].append(job.name)
+
+        ready: Deque[Job] = deque(job for job in self.jobs if not waiting[job.name])
+        in_use: Counter = Counter()
+        results: List[JobResult] = []
+
+        def finish(result: JobResult) -> None:
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+
+            for name in dependents[result.job.name]:
+                if name not in waiting:
+                    continue
+                if result.status != STATUS_OK and result.job.name in by_name[name].deps:
+                    # 依赖未成功：跳过该任务及其所有后继
+                    del waiting[name]
+                    finish(JobResult(by_name[name], STATUS_SKIPPED,
+                                     error=f"依赖 {result.job.name} 未成功"))
+                else:
+                    waiting[name].discard(result.job.name)
+                    if not waiting[name]:
+                        del waiting[name]
+                        ready.append(by_name[name])
+
+        for job in ready:
+            del waiting[job.name]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            running: Dict[Future, Job] = {}
+            while ready or running:
+                # 按就绪顺序启动所有工具名额允许的任务
+                for job in list(ready):
+                    if len(running) >= self.workers:
+                        break
+                    if all(in_use[tool] < self._limit(tool) for tool in job.tools):
+                        ready.remove(job)
+                        in_use.update(job.tools)
+                        running[pool.submit(self._execute, job)] = job
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = running.pop(future)
+                    in_use.subtract(job.tools)
+                    finish(future.result())
+
+        return results
@@ -0,0 +1,317 @@
+"""
+监视模式
+
+监视 blog/ 和 docs/ 中的图表源文件，文件变化后只重新构建受影响的任务：
+变化的文件按后缀确定资产类型，重新运行对应的 find_*_files 发现任务，
+再挑出源文件包含该文件的任务执行。
+
+进程常驻，Inkscape 会话池和构建缓存在多次重建之间保持，
+单个文件的修改无需重新启动外部工具会话。
+
+Linux 上通过 ctypes 调用 inotify，其他平台或 inotify 不可用时退化为轮询。
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import pathlib
+import select
+import struct
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from scripts.lib.common.asset_index import get_asset_index
+from scripts.lib.common.utils import eprint
+from .jobs import SOURCE_SUFFIXES, BuildOptions, discover_jobs
+from .scheduler import STATUS_OK, Job, JobResult, Scheduler
+
+# 监视的源文件后缀
+WATCHED_SUFFIXES = {suffix for suffixes in SOURCE_SUFFIXES.values() for suffix in suffixes}
+
+# 不监视的目录（生成的输出或与图表无关）
+IGNORED_DIR_NAMES = {'images', 'node_modules', '__pycache__'}
+
+# 收到第一个事件后继续收集的时间（秒），编辑器保存时常产生一串事件
+DEBOUNCE_SECONDS = 0.05
+
+# 轮询间隔（秒）
+POLL_INTERVAL = 0.5
+
+# inotify 事件掩码
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MOVED_FROM | IN_DELETE_SELF
+
+# struct inotify_event 的定长部分：wd, mask, cookie, len
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def is_watched_source(path: pathlib.Path) -> bool:
+    """判断文件是否可能是某种资产的源文件"""
+    return path.suffix in WATCHED_SUFFIXES and not path.name.startswith('.')
+
+
+def _walk_dirs(root: pathlib.Path) -> Iterable[pathlib.Path]:
+    """遍历需要监视的目录（跳过隐藏目录和输出目录）"""
+    for dirpath, dirnames, _ in os.walk(root):
+        dirnames[:] = [name for name in dirnames
+                       if not name.startswith('.') and name not in IGNORED_DIR_NAMES]
+        yield pathlib.Path(dirpath)
+
+
+class InotifyWatcher:
+    """基于 inotify 的递归目录监视器"""
+
+    def __init__(self, roots: List[pathlib.Path]):
+        libc_name = ctypes.util.find_library('c')
+        if libc_name is None:
+            raise OSError(errno.ENOSYS, "未找到 libc")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, "libc 不支持 inotify")
+
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+        self._dirs: Dict[int, pathlib.Path] = {}
+        try:
+            for root in roots:
+                for directory in _walk_dirs(root):
+                    self._add_watch(directory)
+        except OSError:
+            os.close(self._fd)
+            raise
+
+    def _add_watch(self, directory: pathlib.Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOENT:
+                return
+            # ENOSPC 表示超过了 max_user_watches，由调用方退化为轮询
+            raise OSError(err, f"{os.strerror(err)}: {directory}")
+        self._dirs[wd] = directory
+
+    def _read_events(self) -> Set[pathlib.Path]:
+        changed: Set[pathlib.Path] = set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                eprint("[WARN] inotify 事件队列溢出，部分修改可能未被发现")
+                continue
+            if mask & (IN_IGNORED | IN_DELETE_SELF):
+                self._dirs.pop(wd, None)
+                continue
+
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = directory / os.fsdecode(name)
+
+            if mask & IN_ISDIR:
+                # 新建或移入的目录：补充监视，并把其中已有的源文件视为变化
+                if mask & (IN_CREATE | IN_MOVED_TO) and path.name not in IGNORED_DIR_NAMES:
+                    for sub in _walk_dirs(path):
+                        self._add_watch(sub)
+                        changed.update(p for p in sub.iterdir() if p.is_file() and is_watched_source(p))
+                continue
+
+            if mask & (IN_CLOSE_WRITE | IN_MOVED_TO) and is_watched_source(path):
+                changed.add(path)
+        return changed
+
+    def wait(self, timeout: Optional[float] = None) -> Set[pathlib.Path]:
+        """
+        等待源文件变化
+
+        Args:
+            timeout: 最长等待时间（秒），None 表示一直等待
+
+        Returns:
+            发生变化的源文件（超时则为空）
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        changed = self._read_events()
+        # 合并短时间内连续到达的事件
+        while select.select([self._fd], [], [], DEBOUNCE_SECONDS)[0]:
+            changed |= self._read_events()
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """按修改时间轮询源文件的监视器"""
+
+    def __init__(self, roots: List[pathlib.Path], interval: float = POLL_INTERVAL):
+        self.roots = roots
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[pathlib.Path, Tuple[int, int]]:
+        snapshot = {}
+        for root in self.roots:
+            for directory in _walk_dirs(root):
+                try:
+                    entries = list(os.scandir(directory))
+                except OSError:
+                    continue
+                for entry in entries:
+                    path = pathlib.Path(entry.path)
+                    if not is_watched_source(path):
+                        continue
+                    try:
+                        if not entry.is_file():
+                            continue
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout: Optional[float] = None) -> Set[pathlib.Path]:
+        """等待源文件变化（新增或修改），参数和返回值同 InotifyWatcher.wait"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self._scan()
+            changed = {path for path, stamp in snapshot.items() if self._snapshot.get(path) != stamp}
+            self._snapshot = snapshot
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval)
+
+    def close(self) -> None:
+        pass
+
+
+def create_watcher(roots: List[pathlib.Path], polling: bool = False):
+    """
+    创建目录监视器：优先使用 inotify，不可用时退化为轮询
+
+    Args:
+        roots: 要递归监视的根目录
+        polling: 强制使用轮询
+
+    Returns:
+        InotifyWatcher 或 PollingWatcher
+    """
+    if not polling:
+        try:
+            return InotifyWatcher(roots)
+        except (OSError, AttributeError) as e:
+            eprint(f"[WARN] inotify 不可用（{e}），改用轮询")
+    return PollingWatcher(roots)
+
+
+def jobs_for_changes(changed: Set[pathlib.Path], kinds: List[str], options: BuildOptions) -> List[Job]:
+    """
+    把变化的源文件映射到需要重新构建的任务
+
+    只重新发现后缀匹配的资产类型，再挑出源文件包含变化文件的任务，
+    输出路径因此与 find_*_files 完全一致。
+
+    Args:
+        changed: 变化的源文件
+        kinds: 允许构建的资产类型
+        options: 构建选项
+
+    Returns:
+        需要执行的任务列表
+    """
+    suffixes = {path.suffix for path in changed}
+    affected = [kind for kind in kinds
+                if any(suffix in suffixes for suffix in SOURCE_SUFFIXES.get(kind, []))]
+    if not affected:
+        return []
+
+    # 新增的源文件需要先进入索引才能被 find_*_files 发现
+    get_asset_index().refresh()
+
+    resolved = {path.resolve() for path in changed}
+    jobs, _ = discover_jobs(affected, options)
+    selected = [job for job in jobs if any(source.resolve() in resolved for source in job.sources)]
+    for job in selected:
+        # 监视模式只执行单个源文件的任务，不带依赖
+        job.deps = []
+        job.after = []
+    return selected
+
+
+def watch(kinds: List[str], options: BuildOptions, workers: int, limits: Dict[str, int],
+          polling: bool = False) -> int:
+    """
+    持续监视源文件并增量重建
+
+    Args:
+        kinds: 允许构建的资产类型（只有带源文件的类型会被触发）
+        options: 构建选项
+        workers: 工作线程数量
+        limits: 工具并发上限
+        polling: 强制使用轮询
+
+    Returns:
+        退出码（Ctrl-C 退出时为 0）
+    """
+    roots = [options.project_root / name for name in ('blog', 'docs')]
+    roots = [root for root in roots if root.is_dir()]
+    watcher = create_watcher(roots, polling)
+    mode = '轮询' if isinstance(watcher, PollingWatcher) else 'inotify'
+    print(f"\n正在监视 {', '.join(str(r.relative_to(options.project_root)) for r in roots)}（{mode}），"
+          f"按 Ctrl-C 退出", flush=True)
+
+    try:
+        while True:
+            changed = watcher.wait()
+            if not changed:
+                continue
+
+            start = time.perf_counter()
+            jobs = jobs_for_changes(changed, kinds, options)
+            if not jobs:
+                continue
+
+            for path in sorted(changed):
+                print(f"变化: {path.relative_to(options.project_root)}")
+            results: List[JobResult] = Scheduler(jobs, workers, limits).run()
+            for cache in options.caches.values():
+                cache.flush()
+
+            seconds = time.perf_counter() - start
+            for result in results:
+                mark = '✓' if result.status == STATUS_OK else '✗'
+                detail = f": {result.error}" if result.error else ""
+                print(f"  {mark} {result.job.name} ({result.seconds:.2f}s){detail}")
+            print(f"重建完成: {len(results)} 个任务，{seconds:.2f}s", flush=True)
+    except KeyboardInterrupt:
+        print("\n已停止监视")
+    finally:
+        watcher.close()
+    return 0
@@ -3,7 +3,7 @@ Bytefield 转换器模块，用于从 EDN 文件生成 SVG 图表。
 
 此模块提供以下功能：
 - 解析包含 bytefield 定义的 EDN 文件
-- 将 bytefield 内容转换为 SVG 格式
+- 将 bytefield 内容转换为 SVG 格式（bytefield-svg 或进程内原生渲染器）
 - 应用浅色和深色主题颜色
 - 将文本转换为路径以实现字体独立渲染
 """
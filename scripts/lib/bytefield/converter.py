@@ -5,84 +5,101 @@ SVG 转换和主题应用模块。
 应用主题颜色，并将文本转换为路径。
 """
 
+import re
 import subprocess
 import tempfile
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
+from scripts.lib.common.inkscape import convert_text_to_paths as convert_text_to_paths_pooled
+from scripts.lib.common.svg_theme import apply_svg_theme
 from .colors import get_theme_config
+from .edn import EdnSyntaxError
+from .renderer import UnsupportedFormError, render_native_svg
 from .utils import eprint
 
+# 基础 SVG 中使用的占位颜色，派生主题时统一替换为主题颜色
+# 选用一个不会出现在 bytefield-svg 输出中的颜色值
+BASE_COLOR = '#010203'
+BASE_COLOR_PATTERN = re.compile(re.escape(BASE_COLOR), re.IGNORECASE)
 
-def apply_theme_to_svg(svg_content: str, theme: str) -> str:
+# 使用与 wavedrom 相同的字体列表以保持一致性
+BYTEFIELD_FONT_FAMILY = "'M PLUS 1p','MPLUS1p-Regular',monospace"
+
+# 与主题无关的基础样式规则
+BASE_STYLE_RULES = {
+    # bytefield-svg 生成的 SVG 使用黑色作为默认描边颜色
+    'stroke': {'#000000': BASE_COLOR, '#000': BASE_COLOR, 'black': BASE_COLOR},
+    # 确保背景透明（移除可能的背景填充）
+    'fill': {'white': 'none', '#ffffff': 'none', '#fff': 'none'},
+    # 替换所有字体设置
+    'font_family': {'*': BYTEFIELD_FONT_FAMILY},
+    # 为文本和路径元素添加填充颜色，Inkscape 转换文本为路径时会保留 fill 颜色
+    'default_fill': {'text': BASE_COLOR, 'path': BASE_COLOR},
+}
+
+# 可选的渲染器：bytefield-svg（Node.js 子进程）
+# 进程内的原生渲染器（'native'）尚未通过与 bytefield-svg 参考输出的等价性检查
+# （python3 -m scripts.lib.bytefield.equivalence），通过后再加入
+RENDERER_CHOICES = ['bytefield-svg']
+DEFAULT_RENDERER = 'bytefield-svg'
+
+
+def apply_base_style_to_svg(svg_content: str) -> str:
     """
-    对生成的 SVG 内容应用主题颜色。
+    对 bytefield-svg 生成的 SVG 应用与主题无关的样式。
     
     修改内容：
-    1. 替换描边颜色（stroke）
-    2. 设置填充颜色（fill）
-    3. 确保背景透明
-    4. 为文本元素添加填充颜色（Inkscape 转换时会保留）
-    5. 替换字体为 'M+ 1p Fallback'
+    1. 将黑色描边替换为占位颜色 BASE_COLOR
+    2. 确保背景透明
+    3. 为文本和路径元素添加占位颜色填充（Inkscape 转换时会保留）
+    4. 替换字体为 'M+ 1p Fallback'
+    
+    占位颜色在 recolor_svg 中替换为各主题的颜色，
+    因此同一份基础 SVG（包括文本转路径的结果）可以派生出所有主题。
+    所有修改由 BASE_STYLE_RULES 描述，由 apply_svg_theme 统一执行。
     
     参数:
-        svg_content: 原始 SVG 内容
-        theme: 主题名称（'light' 或 'dark'）
+        svg_content: bytefield-svg 生成的原始 SVG 内容
         
     返回:
-        应用主题后的 SVG 内容
+        应用基础样式后的 SVG 内容
     """
-    import re
+    return apply_svg_theme(svg_content, BASE_STYLE_RULES)
 
-    # 获取主题配置
-    theme_config = get_theme_config(theme)
-    stroke_color = theme_config['stroke']
 
-    # 替换描边颜色
-    # bytefield-svg 生成的 SVG 使用黑色作为默认描边颜色
-    svg_content = svg_content.replace('stroke="#000000"', f'stroke="{stroke_color}"')
-    svg_content = svg_content.replace('stroke="#000"', f'stroke="{stroke_color}"')
-    svg_content = svg_content.replace('stroke="black"', f'stroke="{stroke_color}"')
+def recolor_svg(svg_content: str, theme: str) -> str:
+    """
+    将基础 SVG 中的占位颜色替换为指定主题的颜色。
+    
+    同时匹配属性形式（stroke="..."）和 Inkscape 输出的
+    样式形式（style="fill:..."），不区分大小写。
+    
+    参数:
+        svg_content: 应用过 apply_base_style_to_svg 的 SVG 内容
+        theme: 主题名称（'light' 或 'dark'）
+        
+    返回:
+        应用主题颜色后的 SVG 内容
+    """
+    stroke_color = get_theme_config(theme)['stroke']
+    return BASE_COLOR_PATTERN.sub(stroke_color, svg_content)
 
-    # 确保背景透明（移除可能的背景填充）
-    svg_content = svg_content.replace('fill="white"', 'fill="none"')
-    svg_content = svg_content.replace('fill="#ffffff"', 'fill="none"')
-    svg_content = svg_content.replace('fill="#fff"', 'fill="none"')
-
-    # 替换字体设置
-    # 使用与 wavedrom 相同的字体列表以保持一致性
-    wavedrom_font = "'M PLUS 1p','MPLUS1p-Regular',monospace"
-    # 使用正则表达式一次性替换所有 font-family 属性
-    svg_content = re.sub(
-        r'font-family=["\']([^"\']+)["\']',
-        f'font-family="{wavedrom_font}"',
-        svg_content
-    )
-
-    # 为 <text> 元素添加 fill 属性（如果没有的话）
-    # Inkscape 转换文本为路径时会保留 fill 颜色
-    def add_fill_to_text(match):
-        text_tag = match.group(0)
-        # 如果已经有 fill 属性，不修改
-        if 'fill=' in text_tag:
-            return text_tag
-        # 在 <text 后面添加 fill 属性
-        return text_tag.replace('<text', f'<text fill="{stroke_color}"', 1)
-
-    svg_content = re.sub(r'<text[^>]*>', add_fill_to_text, svg_content)
-
-    # 为 <path> 元素添加 fill 属性（如果没有的话）
-    # 这是为了确保已经转换的路径也有正确的颜色
-    def add_fill_to_path(match):
-        path_tag = match.group(0)
-        # 如果已经有 fill 属性，不修改
-        if 'fill=' in path_tag:
-            return path_tag
-        # 在 <path 后面添加 fill 属性
-        return path_tag.replace('<path', f'<path fill="{stroke_color}"', 1)
-
-    svg_content = re.sub(r'<path[^>]*>', add_fill_to_path, svg_content)
 
-    return svg_content
+def apply_theme_to_svg(svg_content: str, theme: str) -> str:
+    """
+    对生成的 SVG 内容应用主题颜色。
+    
+    等价于先应用基础样式，再替换为主题颜色。
+    
+    参数:
+        svg_content: 原始 SVG 内容
+        theme: 主题名称（'light' 或 'dark'）
+        
+    返回:
+        应用主题后的 SVG 内容
+    """
+    return recolor_svg(apply_base_style_to_svg(svg_content), theme)
 
 
 def convert_text_to_paths(svg_path: Path) -> bool:
@@ -91,6 +108,7 @@ def convert_text_to_paths(svg_path: Path) -> bool:
     
     这是必不可少的步骤，确保 SVG 在任何环境下都能正确显示。
     文本转换为路径后，不再依赖系统字体，保证跨平台一致性。
+    转换通过共享的 Inkscape 会话池完成，避免每个文件都重新启动 Inkscape。
     
     参数:
         svg_path: SVG 文件路径
@@ -98,55 +116,22 @@ def convert_text_to_paths(svg_path: Path) -> bool:
     返回:
         转换是否成功
     """
-    try:
-        # 使用 Inkscape 将文本转换为路径
-        # -T: 将文本转换为路径
-        # -l: 输出为纯 SVG（不包含 Inkscape 特定元素）
-        # --export-filename: 指定输出文件（覆盖原文件）
-        result = subprocess.run(
-            [
-                'inkscape',
-                '-T',
-                '-l',
-                '--export-filename=' + str(svg_path),
-                str(svg_path)
-            ],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        return True
-
-    except subprocess.CalledProcessError as e:
-        eprint(f"Inkscape 转换失败: {e.stderr}")
-        return False
-    except FileNotFoundError:
-        eprint("错误: 未找到 Inkscape，请先安装 Inkscape")
-        eprint("macOS: brew install inkscape")
-        eprint("Ubuntu: sudo apt install inkscape")
-        return False
+    return convert_text_to_paths_pooled(svg_path)
 
 
-def convert_to_svg(bytefield_content: str, output_path: Path, theme: str) -> bool:
+def render_bytefield_svg(bytefield_content: str) -> str:
     """
-    将 bytefield 内容转换为 SVG 并应用主题。
-    
-    转换流程：
-    1. 创建临时输入文件（纯 bytefield 内容）
-    2. 调用 bytefield-svg 生成基础 SVG
-    3. 读取生成的 SVG
-    4. 应用主题颜色
-    5. 写入最终输出文件
-    6. 使用 Inkscape 将文本转换为路径
-    7. 清理临时文件
+    调用 bytefield-svg 将 bytefield 内容渲染为原始 SVG。
     
     参数:
         bytefield_content: bytefield 内容
-        output_path: 输出 SVG 文件路径
-        theme: 主题名称（'light' 或 'dark'）
         
     返回:
-        转换是否成功
+        bytefield-svg 生成的 SVG 内容
+        
+    异常:
+        subprocess.CalledProcessError: bytefield-svg 执行失败
+        FileNotFoundError: 未安装 bytefield-svg
     """
     temp_input = None
     temp_output = None
@@ -172,7 +157,7 @@ def convert_to_svg(bytefield_content: str, output_path: Path, theme: str) -> boo
         temp_output.close()
 
         # 调用 bytefield-svg 生成 SVG
-        result = subprocess.run(
+        subprocess.run(
             [
                 'bytefield-svg',
                 '--source', temp_input.name,
@@ -184,44 +169,150 @@ def convert_to_svg(bytefield_content: str, output_path: Path, theme: str) -> boo
         )
 
         # 读取生成的 SVG
-        svg_content = Path(temp_output.name).read_text(encoding='utf-8')
-
-        # 应用主题颜色
-        svg_content = apply_theme_to_svg(svg_content, theme)
-
-        # 确保输出目录存在
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+        return Path(temp_output.name).read_text(encoding='utf-8')
 
-        # 写入最终输出文件
-        output_path.write_text(svg_content, encoding='utf-8')
+    finally:
+        # 清理临时文件
+        if temp_input:
+            Path(temp_input.name).unlink(missing_ok=True)
+        if temp_output:
+            Path(temp_output.name).unlink(missing_ok=True)
 
-        # 使用 Inkscape 将文本转换为路径
-        if not convert_text_to_paths(output_path):
-            eprint(f"警告: 文本转路径失败，但 SVG 文件已生成: {output_path}")
-            # 即使文本转路径失败，也认为转换成功（SVG 已生成）
-            return True
 
-        return True
+def render_raw_svg(bytefield_content: str, renderer: str = DEFAULT_RENDERER,
+                   param_info: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """
+    使用指定渲染器生成原始 SVG。
+    
+    原生渲染器遇到不支持的表达式时，自动回退到 bytefield-svg。
+    
+    参数:
+        bytefield_content: bytefield 内容
+        renderer: 渲染器名称（'bytefield-svg' 或 'native'）
+        param_info: process_bytefield_params 返回的参数信息（原生渲染器使用）
+        
+    返回:
+        原始 SVG 内容；渲染失败时返回 None
+    """
+    if renderer == 'native':
+        try:
+            return render_native_svg(bytefield_content, param_info)
+        except (UnsupportedFormError, EdnSyntaxError) as e:
+            eprint(f"警告: 原生渲染器无法处理该文件，回退到 bytefield-svg: {e}")
 
+    try:
+        return render_bytefield_svg(bytefield_content)
     except subprocess.CalledProcessError as e:
         eprint(f"bytefield-svg 转换失败: {e.stderr}")
-        return False
+        return None
     except FileNotFoundError:
         eprint("错误: 未找到 bytefield-svg，请先安装")
         eprint("安装方法: npm install -g bytefield-svg")
-        return False
+        return None
+
+
+def render_base_svg(bytefield_content: str, work_dir: Path, renderer: str = DEFAULT_RENDERER,
+                    param_info: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """
+    生成与主题无关的基础 SVG（已应用基础样式并完成文本转路径）。
+    
+    转换流程：
+    1. 调用渲染器生成原始 SVG
+    2. 应用基础样式（占位颜色、字体、透明背景）
+    3. 使用 Inkscape 将文本转换为路径
+    
+    参数:
+        bytefield_content: bytefield 内容
+        work_dir: 存放中间文件的目录（Inkscape 输出会先写到这里）
+        renderer: 渲染器名称（'bytefield-svg' 或 'native'）
+        param_info: process_bytefield_params 返回的参数信息（原生渲染器使用）
+        
+    返回:
+        基础 SVG 内容；渲染失败时返回 None
+    """
+    svg_content = render_raw_svg(bytefield_content, renderer, param_info)
+    if svg_content is None:
+        return None
+
+    svg_content = apply_base_style_to_svg(svg_content)
+
+    # 文本转路径只需执行一次，结果中的占位颜色由各主题替换
+    work_dir.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+            mode='w',
+            suffix='.svg',
+            dir=work_dir,
+            delete=False,
+            encoding='utf-8'
+    ) as temp_svg:
+        temp_svg.write(svg_content)
+        temp_svg_path = Path(temp_svg.name)
+
+    try:
+        if convert_text_to_paths(temp_svg_path):
+            svg_content = temp_svg_path.read_text(encoding='utf-8')
+        else:
+            eprint("警告: 文本转路径失败，输出的 SVG 将保留文本元素")
+    finally:
+        temp_svg_path.unlink(missing_ok=True)
+
+    return svg_content
+
+
+def convert_to_themed_svgs(bytefield_content: str,
+                           theme_outputs: List[Tuple[str, Path]],
+                           renderer: str = DEFAULT_RENDERER,
+                           param_info: Optional[Dict[str, Any]] = None) -> Dict[str, bool]:
+    """
+    渲染一次 bytefield 内容，并派生出所有主题的 SVG。
+    
+    bytefield-svg 和 Inkscape 对每个 EDN 只运行一次，
+    各主题之间的差异仅在于颜色，由 recolor_svg 以字符串替换完成。
+    
+    参数:
+        bytefield_content: bytefield 内容
+        theme_outputs: [(主题名称, 输出 SVG 文件路径), ...]
+        renderer: 渲染器名称（'bytefield-svg' 或 'native'）
+        param_info: process_bytefield_params 返回的参数信息（原生渲染器使用）
+        
+    返回:
+        {主题名称: 是否成功}
+    """
+    if not theme_outputs:
+        return {}
+
+    try:
+        base_svg = render_base_svg(bytefield_content, theme_outputs[0][1].parent, renderer, param_info)
     except Exception as e:
         eprint(f"转换过程出错: {str(e)}")
-        return False
-    finally:
-        # 清理临时文件
-        if temp_input:
-            try:
-                Path(temp_input.name).unlink(missing_ok=True)
-            except:
-                pass
-        if temp_output:
-            try:
-                Path(temp_output.name).unlink(missing_ok=True)
-            except:
-                pass
+        base_svg = None
+
+    if base_svg is None:
+        return {theme: False for theme, _ in theme_outputs}
+
+    results = {}
+    for theme, output_path in theme_outputs:
+        try:
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            output_path.write_text(recolor_svg(base_svg, theme), encoding='utf-8')
+            results[theme] = True
+        except OSError as e:
+            eprint(f"写入 {output_path} 失败: {e}")
+            results[theme] = False
+
+    return results
+
+
+def convert_to_svg(bytefield_content: str, output_path: Path, theme: str) -> bool:
+    """
+    将 bytefield 内容转换为单个主题的 SVG。
+    
+    参数:
+        bytefield_content: bytefield 内容
+        output_path: 输出 SVG 文件路径
+        theme: 主题名称（'light' 或 'dark'）
+        
+    返回:
+        转换是否成功
+    """
+    return convert_to_themed_svgs(bytefield_content, [(theme, output_path)])[theme]
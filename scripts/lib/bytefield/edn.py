@@ -0,0 +1,181 @@
+"""
+EDN 读取器模块。
+
+此模块把 bytefield 使用的 EDN 子集解析为 s 表达式语法树，
+每个节点都记录其在原始文本中的起止位置，便于后续按位置改写内容。
+
+支持的语法：
+- 列表 (...)、向量 [...]、映射 {...}、集合 #{...}
+- 字符串、整数、浮点数、关键字（:name）、符号（name、nil、true、false）
+- 行注释（; 开头）以及被视为空白的逗号
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, List, Tuple
+
+# 集合类节点的起止符号
+COLLECTION_DELIMITERS = {
+    '(': ('list', ')'),
+    '[': ('vector', ']'),
+    '{': ('map', '}'),
+    '#{': ('set', '}'),
+}
+
+# 原子记号：字符串、数字、关键字或符号
+_STRING_RE = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_NUMBER_RE = re.compile(r'[-+]?\d+(\.\d+)?([eE][-+]?\d+)?(?=[\s,()\[\]{}";]|$)')
+_TOKEN_RE = re.compile(r'[^\s,()\[\]{}";]+')
+
+# 字符串转义序列
+_STRING_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '"': '"', '\\': '\\'}
+
+
+class EdnSyntaxError(ValueError):
+    """EDN 语法错误"""
+
+
+class Keyword(str):
+    """EDN 关键字（不含前导冒号）"""
+
+    def __repr__(self) -> str:
+        return f':{str(self)}'
+
+
+class Symbol(str):
+    """EDN 符号"""
+
+    def __repr__(self) -> str:
+        return str(self)
+
+
+@dataclass
+class Node:
+    """
+    语法树节点。
+
+    属性:
+        kind: 节点类型（list、vector、map、set、string、number、keyword、symbol）
+        value: 集合类节点为子节点列表，原子节点为解析后的值
+        start: 节点在原始文本中的起始位置
+        end: 节点在原始文本中的结束位置（不含）
+    """
+    kind: str
+    value: Any
+    start: int
+    end: int
+
+    @property
+    def is_collection(self) -> bool:
+        """是否为集合类节点"""
+        return self.kind in ('list', 'vector', 'map', 'set')
+
+    def head_symbol(self) -> str:
+        """列表节点首元素的符号名，非符号时返回空字符串"""
+        if self.kind == 'list' and self.value and self.value[0].kind == 'symbol':
+            return self.value[0].value
+        return ''
+
+    def map_items(self) -> List[Tuple['Node', 'Node']]:
+        """映射节点的键值对列表"""
+        items = self.value
+        return [(items[i], items[i + 1]) for i in range(0, len(items) - 1, 2)]
+
+
+def _skip_whitespace(text: str, pos: int) -> int:
+    """跳过空白、逗号和行注释"""
+    length = len(text)
+    while pos < length:
+        char = text[pos]
+        if char in ' \t\r\n,':
+            pos += 1
+        elif char == ';':
+            newline = text.find('\n', pos)
+            pos = length if newline == -1 else newline + 1
+        else:
+            break
+    return pos
+
+
+def _unescape_string(raw: str) -> str:
+    """解析字符串字面量中的转义序列"""
+    return re.sub(r'\\(.)', lambda m: _STRING_ESCAPES.get(m.group(1), m.group(1)), raw)
+
+
+def _read_form(text: str, pos: int) -> Tuple[Node, int]:
+    """从 pos 开始读取一个表达式，返回节点和读取结束位置"""
+    char = text[pos]
+
+    opener = '#{' if text.startswith('#{', pos) else char
+    if opener in COLLECTION_DELIMITERS:
+        kind, closer = COLLECTION_DELIMITERS[opener]
+        start = pos
+        pos += len(opener)
+        children = []
+        while True:
+            pos = _skip_whitespace(text, pos)
+            if pos >= len(text):
+                raise EdnSyntaxError(f"位置 {start} 处的 {opener} 缺少匹配的 {closer}")
+            if text[pos] == closer:
+                pos += 1
+                break
+            if text[pos] in ')]}':
+                raise EdnSyntaxError(f"位置 {pos} 处的 {text[pos]} 与 {opener} 不匹配")
+            child, pos = _read_form(text, pos)
+            children.append(child)
+        if kind == 'map' and len(children) % 2:
+            raise EdnSyntaxError(f"位置 {start} 处的映射键值数量不成对")
+        return Node(kind, children, start, pos), pos
+
+    if char in ')]}':
+        raise EdnSyntaxError(f"位置 {pos} 处出现多余的 {char}")
+
+    if char == '"':
+        match = _STRING_RE.match(text, pos)
+        if not match:
+            raise EdnSyntaxError(f"位置 {pos} 处的字符串未闭合")
+        value = _unescape_string(match.group(0)[1:-1])
+        return Node('string', value, pos, match.end()), match.end()
+
+    match = _NUMBER_RE.match(text, pos)
+    if match:
+        raw = match.group(0)
+        value = float(raw) if match.group(1) or match.group(2) else int(raw)
+        return Node('number', value, pos, match.end()), match.end()
+
+    match = _TOKEN_RE.match(text, pos)
+    if not match:
+        raise EdnSyntaxError(f"位置 {pos} 处无法识别的字符 {char!r}")
+    token = match.group(0)
+    if token.startswith(':'):
+        return Node('keyword', Keyword(token[1:]), pos, match.end()), match.end()
+    return Node('symbol', Symbol(token), pos, match.end()), match.end()
+
+
+def parse_edn(text: str) -> List[Node]:
+    """
+    解析 EDN 文本中的所有顶层表达式。
+
+    参数:
+        text: EDN 文本
+
+    返回:
+        顶层表达式节点列表
+
+    异常:
+        EdnSyntaxError: 括号不匹配、字符串未闭合等语法错误
+
+    示例:
+        >>> forms = parse_edn('(def boxes-per-row 16)')
+        >>> forms[0].head_symbol()
+        'def'
+        >>> forms[0].value[2].value
+        16
+    """
+    forms = []
+    pos = _skip_whitespace(text, 0)
+    while pos < len(text):
+        form, pos = _read_form(text, pos)
+        forms.append(form)
+        pos = _skip_whitespace(text, pos)
+    return forms
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+原生渲染器等价性检查模块。
+
+对项目中的每个 bytefield EDN 文件，把原生渲染器生成的原始 SVG 与提交在
+reference/ 目录中的 bytefield-svg 参考输出逐元素比较几何属性、文本属性和文本内容。
+比较时不需要 Node.js；缺少参考输出的文件视为未通过。
+
+参考输出由 bytefield-svg 生成，EDN 文件或 bytefield-svg 版本变化后需要重新生成并提交：
+    python3 -m scripts.lib.bytefield.equivalence --update
+
+只有当所有文件都通过检查时，才应把 native 加入可选渲染器：
+    python3 -m scripts.lib.bytefield.equivalence
+"""
+
+import argparse
+import subprocess
+import sys
+import xml.etree.ElementTree as ET
+from collections import Counter
+from pathlib import Path
+from typing import List, Tuple
+
+from .converter import render_bytefield_svg
+from .files import find_bytefield_files
+from .params import process_bytefield_params
+from .parser import extract_bytefield_content
+from .renderer import UnsupportedFormError, render_native_svg
+from .utils import eprint
+
+# 比较时忽略的根元素属性（命名空间声明由解析器处理）
+IGNORED_ROOT_ATTRS = {'xmlns', 'xmlns:xlink'}
+
+# bytefield-svg 参考输出目录：reference/<博客文章目录>/<EDN 文件名>.svg
+REFERENCE_DIR = Path(__file__).resolve().parent / 'reference'
+
+
+def reference_path(edn_file_path: Path) -> Path:
+    """
+    EDN 文件对应的参考输出路径
+
+    参数:
+        edn_file_path: blog/<文章>/_assets/bytefield/<名称>.edn
+
+    返回:
+        reference/<文章>/<名称>.svg
+    """
+    blog_post_dir = edn_file_path.parent.parent.parent
+    return REFERENCE_DIR / blog_post_dir.name / f"{edn_file_path.stem}.svg"
+
+
+def _normalize_value(value: str, tolerance: float) -> str:
+    """数值按容差取整，其他值原样返回"""
+    try:
+        number = float(value)
+    except ValueError:
+        return value.strip()
+    return f'{round(number / tolerance) * tolerance:.6g}'
+
+
+def _local_name(tag: str) -> str:
+    """去除命名空间前缀"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _element_signature(element: ET.Element, tolerance: float) -> Tuple:
+    """生成元素的可比较签名：标签、归一化属性、文本内容、子元素签名"""
+    attrs = tuple(sorted(
+        (_local_name(name), _normalize_value(value, tolerance))
+        for name, value in element.attrib.items()
+    ))
+    text = (element.text or '').strip()
+    children = tuple(_element_signature(child, tolerance) for child in element)
+    return _local_name(element.tag), attrs, text, children
+
+
+def compare_svgs(reference: str, candidate: str, tolerance: float = 0.01) -> List[str]:
+    """
+    比较两个 SVG 文档的结构是否等价。
+
+    根元素比较尺寸属性；子元素按多重集合比较，不要求顺序一致。
+
+    参数:
+        reference: 参考 SVG（bytefield-svg 输出）
+        candidate: 待比较 SVG（原生渲染器输出）
+        tolerance: 数值比较容差
+
+    返回:
+        差异描述列表，为空表示等价
+    """
+    ref_root = ET.fromstring(reference)
+    cand_root = ET.fromstring(candidate)
+    differences = []
+
+    for name in sorted(set(ref_root.attrib) | set(cand_root.attrib)):
+        if name in IGNORED_ROOT_ATTRS:
+            continue
+        ref_value = _normalize_value(ref_root.get(name, ''), tolerance)
+        cand_value = _normalize_value(cand_root.get(name, ''), tolerance)
+        if ref_value != cand_value:
+            differences.append(f"根元素属性 {name}: {ref_value!r} != {cand_value!r}")
+
+    ref_elements = Counter(_element_signature(child, tolerance) for child in ref_root)
+    cand_elements = Counter(_element_signature(child, tolerance) for child in cand_root)
+
+    for signature, count in (ref_elements - cand_elements).items():
+        differences.append(f"缺少元素 x{count}: {signature}")
+    for signature, count in (cand_elements - ref_elements).items():
+        differences.append(f"多余元素 x{count}: {signature}")
+
+    return differences
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    解析命令行参数
+
+    返回:
+        解析后的命令行参数对象
+    """
+    parser = argparse.ArgumentParser(
+        description='比较原生渲染器与 bytefield-svg 参考输出是否等价'
+    )
+
+    parser.add_argument(
+        '--update',
+        action='store_true',
+        help='用 bytefield-svg 重新生成 reference/ 中的参考输出（需要 Node.js），不做比较'
+    )
+
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=0.01,
+        help='数值比较容差 (默认: 0.01)'
+    )
+
+    parser.add_argument(
+        '--max-diffs',
+        type=int,
+        default=10,
+        help='每个文件最多显示的差异数量 (默认: 10)'
+    )
+
+    return parser.parse_args()
+
+
+def update_references(bytefield_files: List[Tuple[Path, list]]) -> int:
+    """
+    用 bytefield-svg 重新生成所有参考输出
+
+    参数:
+        bytefield_files: find_bytefield_files 的结果
+
+    返回:
+        退出码 (0 表示全部生成，1 表示存在失败)
+    """
+    failures = 0
+    for edn_file_path, _ in bytefield_files:
+        bytefield_content = extract_bytefield_content(edn_file_path)
+        if bytefield_content is None:
+            eprint(f"✗ {edn_file_path.name}: 无法提取 bytefield 内容")
+            failures += 1
+            continue
+
+        processed_content, _ = process_bytefield_params(bytefield_content)
+        try:
+            reference = render_bytefield_svg(processed_content)
+        except FileNotFoundError:
+            eprint("错误: 未找到 bytefield-svg，请先安装")
+            eprint("安装方法: npm install -g bytefield-svg")
+            return 1
+        except subprocess.CalledProcessError as e:
+            eprint(f"✗ {edn_file_path.name}: bytefield-svg 转换失败: {e.stderr}")
+            failures += 1
+            continue
+
+        output_path = reference_path(edn_file_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(reference, encoding='utf-8')
+        print(f"✓ {output_path.relative_to(REFERENCE_DIR)}")
+
+    return 1 if failures else 0
+
+
+def main() -> int:
+    """
+    对所有 EDN 文件执行等价性检查
+
+    返回:
+        退出码 (0 表示全部等价，1 表示存在差异或失败)
+    """
+    args = parse_args()
+
+    bytefield_files = find_bytefield_files([])
+    if not bytefield_files:
+        print("未找到任何 bytefield 文件")
+        return 0
+
+    if args.update:
+        return update_references(bytefield_files)
+
+    failures = 0
+    for edn_file_path, _ in bytefield_files:
+        bytefield_content = extract_bytefield_content(edn_file_path)
+        if bytefield_content is None:
+            eprint(f"✗ {edn_file_path.name}: 无法提取 bytefield 内容")
+            failures += 1
+            continue
+
+        processed_content, param_info = process_bytefield_params(bytefield_content)
+
+        try:
+            reference = reference_path(edn_file_path).read_text(encoding='utf-8')
+        except OSError:
+            eprint(f"✗ {edn_file_path.name}: 缺少参考输出 {reference_path(edn_file_path)}，"
+                   f"请用 --update 生成（需要 bytefield-svg）")
+            failures += 1
+            continue
+
+        try:
+            candidate = render_native_svg(processed_content, param_info)
+        except UnsupportedFormError as e:
+            eprint(f"✗ {edn_file_path.name}: 原生渲染器不支持: {e}")
+            failures += 1
+            continue
+        except Exception as e:
+            eprint(f"✗ {edn_file_path.name}: 渲染失败: {e}")
+            failures += 1
+            continue
+
+        differences = compare_svgs(reference, candidate, args.tolerance)
+        if differences:
+            failures += 1
+            eprint(f"✗ {edn_file_path.name}: {len(differences)} 处差异")
+            for difference in differences[:args.max_diffs]:
+                eprint(f"    {difference}")
+        else:
+            print(f"✓ {edn_file_path.name}")
+
+    print("=" * 50)
+    print(f"等价性检查: {len(bytefield_files) - failures}/{len(bytefield_files)} 通过")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
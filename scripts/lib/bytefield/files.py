@@ -9,6 +9,7 @@ from pathlib import Path
 from typing import List, Tuple
 
 # 导入通用工具函数
+from scripts.lib.common.asset_index import get_asset_index
 from scripts.lib.common.utils import find_project_root
 
 
@@ -18,9 +19,8 @@ def find_bytefield_files(themes: List[str]) -> List[Tuple[Path, List[Tuple[str,
     
     扫描逻辑：
     1. 从项目根目录开始
-    2. 递归查找 blog/*/_assets/bytefield/ 目录
-    3. 查找目录下的所有 *.edn 文件
-    4. 为每个文件生成对应的输出路径
+    2. 从共享的资产索引中取出 blog/*/_assets/bytefield/ 下的所有 *.edn 文件
+    3. 为每个文件生成对应的输出路径
     
     路径映射示例：
         输入：blog/2025-10-06-riscv-privileged/_assets/bytefield/mtvec.edn
@@ -40,38 +40,26 @@ def find_bytefield_files(themes: List[str]) -> List[Tuple[Path, List[Tuple[str,
     if not project_root_str:
         return []
 
-    project_root = Path(project_root_str)
-
-    # 查找所有 blog 目录
-    blog_dir = project_root / "blog"
-    if not blog_dir.exists():
-        return []
-
     result = []
 
-    # 递归查找所有 _assets/bytefield/ 目录下的 .edn 文件
-    for bytefield_dir in blog_dir.glob("*/_assets/bytefield"):
-        if not bytefield_dir.is_dir():
-            continue
-
-        # 查找该目录下的所有 .edn 文件
-        for edn_file in bytefield_dir.glob("*.edn"):
-            # 获取文件所在的博客文章目录
-            # 例如：blog/2025-10-06-riscv-privileged/_assets/bytefield/mtvec.edn
-            # 博客目录：blog/2025-10-06-riscv-privileged
-            blog_post_dir = edn_file.parent.parent.parent
+    # 从共享的资产索引中取出所有 blog/*/_assets/bytefield/*.edn 文件
+    for edn_file in get_asset_index().files('bytefield'):
+        # 获取文件所在的博客文章目录
+        # 例如：blog/2025-10-06-riscv-privileged/_assets/bytefield/mtvec.edn
+        # 博客目录：blog/2025-10-06-riscv-privileged
+        blog_post_dir = edn_file.parent.parent.parent
 
-            # 生成每个主题的输出路径
-            theme_outputs = []
-            for theme in themes:
-                # 输出目录：blog/2025-10-06-riscv-privileged/_assets/images/{theme}/
-                output_dir = blog_post_dir / "_assets" / "images" / theme
+        # 生成每个主题的输出路径
+        theme_outputs = []
+        for theme in themes:
+            # 输出目录：blog/2025-10-06-riscv-privileged/_assets/images/{theme}/
+            output_dir = blog_post_dir / "_assets" / "images" / theme
 
-                # 输出文件：blog/2025-10-06-riscv-privileged/_assets/images/{theme}/mtvec.svg
-                output_file = output_dir / f"{edn_file.stem}.svg"
+            # 输出文件：blog/2025-10-06-riscv-privileged/_assets/images/{theme}/mtvec.svg
+            output_file = output_dir / f"{edn_file.stem}.svg"
 
-                theme_outputs.append((theme, output_file))
+            theme_outputs.append((theme, output_file))
 
-            result.append((edn_file, theme_outputs))
+        result.append((edn_file, theme_outputs))
 
     return result
@@ -7,14 +7,22 @@ bytefield 转换器主入口模块
 
 import argparse
 import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
 
-from .colors import THEME_CHOICES
-from .converter import convert_to_svg
+from scripts.lib.common.cache import BuildCache, add_cache_arguments, cache_from_args
+from .colors import BYTEFIELD_THEMES, THEME_CHOICES
+from .converter import DEFAULT_RENDERER, RENDERER_CHOICES, convert_to_themed_svgs
+from .edn import EdnSyntaxError
 from .files import find_bytefield_files
 from .params import process_bytefield_params
 from .parser import extract_bytefield_content
 from .utils import eprint
 
+# 影响输出的外部工具和生成器代码目录（参与缓存键计算）
+CACHE_TOOLS = ['bytefield-svg', 'inkscape']
+CACHE_CODE_DIRS = [Path(__file__).parent, Path(__file__).parent.parent / 'common']
+
 
 def parse_args() -> argparse.Namespace:
     """
@@ -34,9 +42,75 @@ def parse_args() -> argparse.Namespace:
         help='要生成的主题 (light, dark, 或 all，默认: all)'
     )
 
+    parser.add_argument(
+        '--renderer',
+        choices=RENDERER_CHOICES,
+        default=DEFAULT_RENDERER,
+        help=f'SVG 渲染器 (默认: {DEFAULT_RENDERER})'
+    )
+
+    add_cache_arguments(parser)
+
     return parser.parse_args()
 
 
+def process_bytefield_file(edn_file_path: Path, theme_outputs: List[Tuple[str, Path]],
+                           renderer: str, cache: BuildCache) -> Dict[str, str]:
+    """
+    处理单个 bytefield 文件，生成所有主题的 SVG
+
+    未变化的主题直接从缓存恢复，其余主题渲染一次后派生。
+
+    参数:
+        edn_file_path: EDN 文件路径
+        theme_outputs: (主题, 输出路径) 列表
+        renderer: SVG 渲染器名称
+        cache: 构建缓存
+
+    返回:
+        主题到处理结果的映射：'cached'（缓存恢复）、'generated'（重新生成）或 'failed'
+    """
+    statuses = {theme: 'failed' for theme, _ in theme_outputs}
+
+    # 提取 bytefield 内容
+    bytefield_content = extract_bytefield_content(edn_file_path)
+
+    if bytefield_content is None:
+        eprint(f"  ✗ 无法从文件中提取 bytefield 内容: {edn_file_path.name}")
+        return statuses
+
+    # 处理参数（注入/替换 left-margin, right-margin, box-width）
+    try:
+        processed_content, param_info = process_bytefield_params(bytefield_content)
+    except EdnSyntaxError as e:
+        eprint(f"  ✗ EDN 语法错误 ({edn_file_path.name}): {e}")
+        return statuses
+
+    # 先从缓存恢复，未命中的主题再渲染
+    params = {'renderer': renderer, 'param_info': param_info}
+    cache_entries = {}
+    pending_outputs = []
+    for theme, output_path in theme_outputs:
+        key = cache.make_key(processed_content, params, BYTEFIELD_THEMES[theme], CACHE_TOOLS, CACHE_CODE_DIRS)
+        entry = f"{edn_file_path}:{theme}"
+        if cache.restore(entry, key, output_path.parent) is not None:
+            statuses[theme] = 'cached'
+        else:
+            cache_entries[theme] = (entry, key)
+            pending_outputs.append((theme, output_path))
+
+    # 渲染一次，派生所有未命中主题的 SVG（使用处理后的内容）
+    if pending_outputs:
+        results = convert_to_themed_svgs(processed_content, pending_outputs, renderer, param_info)
+        for theme, output_path in pending_outputs:
+            if results.get(theme):
+                entry, key = cache_entries[theme]
+                cache.store(entry, key, output_path.parent, [output_path])
+                statuses[theme] = 'generated'
+
+    return statuses
+
+
 def main() -> int:
     """
     主函数，执行完整的转换流程
@@ -44,7 +118,7 @@ def main() -> int:
     流程:
         1. 解析命令行参数
         2. 查找所有 bytefield 文件
-        3. 处理每个文件，为每个主题生成 SVG
+        3. 处理每个文件，从缓存恢复未变化的主题，渲染一次并派生其余主题的 SVG
         4. 输出处理进度和结果
         5. 打印统计摘要
     
@@ -70,6 +144,8 @@ def main() -> int:
 
     print(f"找到 {len(bytefield_files)} 个文件\n")
 
+    cache = cache_from_args('bytefield', args)
+
     # 统计变量
     total_conversions = 0
     successful_conversions = 0
@@ -80,30 +156,15 @@ def main() -> int:
         # 显示正在处理的文件
         print(f"处理: {edn_file_path.name}")
 
-        # 提取 bytefield 内容
-        bytefield_content = extract_bytefield_content(edn_file_path)
+        statuses = process_bytefield_file(edn_file_path, theme_outputs, args.renderer, cache)
 
-        if bytefield_content is None:
-            eprint(f"  ✗ 无法从文件中提取 bytefield 内容")
-            # 计算该文件所有主题的失败数
-            failed_conversions += len(theme_outputs)
-            total_conversions += len(theme_outputs)
-            continue
-
-        # 处理参数（注入/替换 left-margin, right-margin, box-width）
-        processed_content, param_info = process_bytefield_params(bytefield_content)
-
-        # 为每个主题生成 SVG
         for theme, output_path in theme_outputs:
             total_conversions += 1
 
-            # 确保输出目录存在
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-
-            # 转换为 SVG（使用处理后的内容）
-            success = convert_to_svg(processed_content, output_path, theme)
-
-            if success:
+            if statuses[theme] == 'cached':
+                print(f"  ✓ {theme}: {output_path} (缓存)")
+                successful_conversions += 1
+            elif statuses[theme] == 'generated':
                 print(f"  ✓ {theme}: {output_path}")
                 successful_conversions += 1
             else:
@@ -115,6 +176,7 @@ def main() -> int:
     # 5. 打印统计摘要
     print("=" * 50)
     print(f"转换完成: {successful_conversions}/{total_conversions} 成功")
+    print(cache.summary())
 
     if failed_conversions > 0:
         print(f"失败: {failed_conversions}")
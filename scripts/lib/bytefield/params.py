@@ -3,9 +3,13 @@
 
 此模块提供参数检测、计算和注入功能，
 用于处理字节字段图表的布局参数。
+
+EDN 内容只解析一次为 s 表达式语法树，所有改写在一次遍历中
+收集为按位置排序的编辑操作，最后一次性拼接输出，
+未改动的部分（空白、注释、换行）保持原样。
 """
 
-import re
+from typing import Dict, List, Optional, Tuple
 
 from .constants import (
     DEFAULT_BOXES_PER_ROW,
@@ -15,22 +19,64 @@ from .constants import (
     DEFAULT_ROW_HEIGHT,
     DEFAULT_FONT_SIZE,
 )
+from .edn import Node, parse_edn
+
+# 由 process_bytefield_params 强制设置的布局参数，按注入顺序排列
+LAYOUT_PARAM_NAMES = ('left-margin', 'right-margin', 'box-width', 'row-height', 'font-size')
+
+# 大于该值的内容字号会被减半
+FONT_SIZE_HALVING_THRESHOLD = 12
+
+# 编辑操作：(起始位置, 结束位置, 替换文本)，起止相同表示插入
+Edit = Tuple[int, int, str]
+
+
+def _def_name(form: Node) -> Optional[str]:
+    """顶层 (def name value) 表达式的参数名，其他表达式返回 None"""
+    if form.head_symbol() == 'def' and len(form.value) == 3 and form.value[1].kind == 'symbol':
+        return form.value[1].value
+    return None
+
+
+def _collect_defs(forms: List[Node]) -> Dict[str, List[Node]]:
+    """
+    收集顶层 (def name value) 表达式。
+
+    参数:
+        forms: 顶层表达式节点列表
+
+    返回:
+        {参数名: [def 表达式节点, ...]}，同名定义按出现顺序排列
+    """
+    defs: Dict[str, List[Node]] = {}
+    for form in forms:
+        name = _def_name(form)
+        if name is not None:
+            defs.setdefault(name, []).append(form)
+    return defs
+
+
+def _def_value(defs: Dict[str, List[Node]], name: str):
+    """获取参数第一个定义的值节点，不存在时返回 None"""
+    if name not in defs:
+        return None
+    return defs[name][0].value[2]
 
 
 def detect_boxes_per_row(content: str) -> int:
     """
     从 EDN 内容中检测 boxes-per-row 的值。
-    
-    使用正则表达式匹配 (def boxes-per-row <数字>) 模式，
-    提取每行盒子数量的定义。如果未找到定义，
+
+    查找顶层的 (def boxes-per-row <数字>) 定义，
+    提取每行盒子数量。如果未找到定义，
     返回默认值 DEFAULT_BOXES_PER_ROW。
-    
+
     参数:
         content: EDN 内容字符串
-        
+
     返回:
         检测到的 boxes-per-row 值，未找到则返回默认值
-        
+
     示例:
         >>> content = "(def boxes-per-row 16)"
         >>> detect_boxes_per_row(content)
@@ -38,16 +84,16 @@ def detect_boxes_per_row(content: str) -> int:
         >>> detect_boxes_per_row("(draw-box ...)")
         32
     """
-    # 使用正则表达式匹配 (def boxes-per-row <数字>)
-    pattern = r'\(def\s+boxes-per-row\s+(\d+)\s*\)'
-    match = re.search(pattern, content)
+    return _detect_boxes_per_row(_collect_defs(parse_edn(content)))
+
 
-    if match:
-        # 提取匹配到的数字
-        value = int(match.group(1))
-        # 验证是否为有效正整数
-        if value > 0:
-            return value
+def _detect_boxes_per_row(defs: Dict[str, List[Node]]) -> int:
+    """从已收集的顶层定义中检测 boxes-per-row"""
+    value = _def_value(defs, 'boxes-per-row')
+
+    # 验证是否为有效正整数
+    if value is not None and value.kind == 'number' and isinstance(value.value, int) and value.value > 0:
+        return value.value
 
     # 未找到或无效，返回默认值
     return DEFAULT_BOXES_PER_ROW
@@ -56,16 +102,16 @@ def detect_boxes_per_row(content: str) -> int:
 def calculate_box_width(boxes_per_row: int) -> int:
     """
     根据每行盒子数量计算单个盒子的宽度。
-    
+
     使用图表总宽度除以每行盒子数量来计算单个盒子的宽度。
     结果会转换为整数，确保宽度值可以直接用于 SVG 渲染。
-    
+
     参数:
         boxes_per_row: 每行盒子的数量
-        
+
     返回:
         计算出的盒子宽度（整数）
-        
+
     示例:
         >>> calculate_box_width(32)
         24
@@ -78,79 +124,111 @@ def calculate_box_width(boxes_per_row: int) -> int:
     return int(box_width)
 
 
-def inject_or_replace_param(content: str, param_name: str, param_value: int) -> str:
+def _injection_edit(content: str, forms: List[Node], param_defs: List[str]) -> Edit:
     """
-    在 EDN 内容中注入或替换参数定义。
-    
-    如果参数已存在，则替换其值；如果不存在，则在合适的位置注入新定义。
+    生成注入缺失参数定义的编辑操作。
+
     注入位置策略：
-    1. 优先在最后一个 (def ...) 之后插入
+    1. 优先在最后一个顶层 (def ...) 所在行之后插入
     2. 如果没有 (def ...)，则在第一个 (draw-...) 之前插入
     3. 如果都没有，则在内容开头插入
-    
+
     参数:
         content: EDN 内容字符串
-        param_name: 参数名称（如 "left-margin"）
-        param_value: 参数值（整数）
-        
+        forms: 顶层表达式节点列表
+        param_defs: 要注入的定义文本列表，如 ["(def left-margin 16)"]
+
     返回:
-        处理后的 EDN 内容字符串
-        
-    示例:
-        >>> content = "(def boxes-per-row 32)\\n(draw-box ...)"
-        >>> result = inject_or_replace_param(content, "left-margin", 1)
-        >>> "(def left-margin 1)" in result
-        True
+        插入操作
     """
-    # 构建参数定义的正则表达式模式
-    param_pattern = rf'\(def\s+{re.escape(param_name)}\s+\d+\s*\)'
-
-    # 检查参数是否已存在
-    if re.search(param_pattern, content):
-        # 参数已存在，替换其值
-        new_def = f'(def {param_name} {param_value})'
-        content = re.sub(param_pattern, new_def, content)
-    else:
-        # 参数不存在，需要注入
-        new_def = f'(def {param_name} {param_value})'
-
-        # 查找最后一个 (def ...) 的位置
-        def_pattern = r'\(def\s+[^\s]+\s+[^)]+\)'
-        def_matches = list(re.finditer(def_pattern, content))
-
-        if def_matches:
-            # 在最后一个 (def ...) 之后插入
-            last_def = def_matches[-1]
-            insert_pos = last_def.end()
-            # 找到下一个换行符的位置
-            next_newline = content.find('\n', insert_pos)
-            if next_newline != -1:
-                insert_pos = next_newline + 1
-                content = content[:insert_pos] + new_def + '\n' + content[insert_pos:]
-            else:
-                # 没有换行符，直接在末尾添加
-                content = content[:insert_pos] + '\n' + new_def + '\n' + content[insert_pos:]
-        else:
-            # 没有 (def ...)，查找第一个 (draw-...) 的位置
-            draw_pattern = r'\(draw-[^\s]+\s+'
-            draw_match = re.search(draw_pattern, content)
-
-            if draw_match:
-                # 在第一个 (draw-...) 之前插入
-                insert_pos = draw_match.start()
-                content = content[:insert_pos] + new_def + '\n' + content[insert_pos:]
-            else:
-                # 都没有，在内容开头插入
-                content = new_def + '\n' + content
-
-    return content
+    block = ''.join(f'{definition}\n' for definition in param_defs)
+
+    def_forms = [form for form in forms if form.head_symbol() == 'def']
+    if def_forms:
+        # 在最后一个 (def ...) 所在行的换行符之后插入
+        insert_pos = def_forms[-1].end
+        next_newline = content.find('\n', insert_pos)
+        if next_newline != -1:
+            return next_newline + 1, next_newline + 1, block
+        # 没有换行符，直接在末尾另起一行
+        return insert_pos, insert_pos, '\n' + block
+
+    # 没有 (def ...)，在第一个 (draw-...) 之前插入
+    for form in forms:
+        if form.head_symbol().startswith('draw-'):
+            return form.start, form.start, block
+
+    # 都没有，在内容开头插入
+    return 0, 0, block
+
+
+def _defattrs_maps(form: Node) -> List[Node]:
+    """获取 defattrs 表达式中的属性映射（直接映射或向量中的映射）"""
+    if len(form.value) < 3:
+        return []
+    spec = form.value[2]
+    if spec.kind == 'map':
+        return [spec]
+    if spec.kind == 'vector':
+        return [child for child in spec.value if child.kind == 'map']
+    return []
+
+
+def _has_font_size(map_node: Node) -> bool:
+    """属性映射中是否已有 :font-size"""
+    return any(key.kind == 'keyword' and key.value == 'font-size' for key, _ in map_node.map_items())
+
+
+def _rewrite_font_sizes(node: Node, edits: List[Edit], info: dict) -> None:
+    """
+    递归处理 :font-size 字号：大于 12 的除以 2，小于等于 12 的保持不变
+
+    参数:
+        node: 要处理的节点
+        edits: 编辑操作列表（就地追加）
+        info: 字号处理信息（就地更新 font_sizes_processed 和 font_size_changes）
+    """
+    if not node.is_collection:
+        return
+
+    children = node.value
+    for index, child in enumerate(children):
+        if child.is_collection:
+            _rewrite_font_sizes(child, edits, info)
+            continue
+
+        # 匹配 :font-size 关键字及其后的整数值
+        if child.kind != 'keyword' or child.value != 'font-size' or index + 1 >= len(children):
+            continue
+        value = children[index + 1]
+        if value.kind != 'number' or not isinstance(value.value, int):
+            continue
+
+        original_size = value.value
+        if original_size > FONT_SIZE_HALVING_THRESHOLD:
+            new_size = original_size // 2
+            info['font_sizes_processed'] += 1
+            info['font_size_changes'].append((original_size, new_size))
+            edits.append((value.start, value.end, str(new_size)))
+
+
+def _apply_edits(content: str, edits: List[Edit]) -> str:
+    """按位置顺序一次性应用所有编辑操作"""
+    pieces = []
+    last = 0
+    for start, end, text in sorted(edits, key=lambda edit: (edit[0], edit[1])):
+        pieces.append(content[last:start])
+        pieces.append(text)
+        last = end
+    pieces.append(content[last:])
+    return ''.join(pieces)
 
 
 def process_bytefield_params(content: str) -> tuple[str, dict]:
     """
     处理字节字段图表的所有布局参数。
-    
-    此函数是参数处理的主入口，执行以下操作：
+
+    此函数是参数处理的主入口，将内容解析为语法树后执行以下操作：
     1. 检测 boxes-per-row 的值
     2. 根据 boxes-per-row 计算 box-width
     3. 注入或替换 left-margin 参数
@@ -160,10 +238,12 @@ def process_bytefield_params(content: str) -> tuple[str, dict]:
     7. 注入或替换 font-size 参数（默认字号定义）
     8. 在 defattrs 中注入 :font-size（如果缺失）
     9. 处理内容中的字号（:font-size）：大于 12 的除以 2，小于等于 12 的保持不变
-    
+
+    步骤 3-9 在同一次遍历中完成，最后统一生成输出内容。
+
     参数:
         content: EDN 内容字符串
-        
+
     返回:
         元组 (处理后的内容, 处理信息字典)
         处理信息字典包含：
@@ -180,7 +260,10 @@ def process_bytefield_params(content: str) -> tuple[str, dict]:
         - font_size_injected: 是否注入了 font-size（布尔值）
         - font_sizes_processed: 处理的内容字号数量
         - font_size_changes: 内容字号变化列表
-        
+
+    异常:
+        EdnSyntaxError: EDN 语法错误（括号不匹配等）
+
     示例:
         >>> content = "(def boxes-per-row 16)\\n(draw-box ...)"
         >>> result_content, info = process_bytefield_params(content)
@@ -192,182 +275,103 @@ def process_bytefield_params(content: str) -> tuple[str, dict]:
     # 记录处理信息
     info = {}
 
+    # 解析语法树并收集顶层定义
+    forms = parse_edn(content)
+    defs = _collect_defs(forms)
+
     # 1. 检测 boxes-per-row
-    boxes_per_row = detect_boxes_per_row(content)
+    boxes_per_row = _detect_boxes_per_row(defs)
     info['boxes_per_row'] = boxes_per_row
 
     # 2. 计算 box-width
     box_width = calculate_box_width(boxes_per_row)
     info['box_width'] = box_width
 
-    # 3. 检测原始参数是否存在
-    left_margin_pattern = r'\(def\s+left-margin\s+(\d+)\s*\)'
-    right_margin_pattern = r'\(def\s+right-margin\s+(\d+)\s*\)'
-    box_width_pattern = r'\(def\s+box-width\s+(\d+)\s*\)'
-    row_height_pattern = r'\(def\s+row-height\s+(\d+)\s*\)'
-    font_size_pattern = r'\(def\s+font-size\s+(\d+)\s*\)'
-
-    left_margin_match = re.search(left_margin_pattern, content)
-    right_margin_match = re.search(right_margin_pattern, content)
-    box_width_match = re.search(box_width_pattern, content)
-    row_height_match = re.search(row_height_pattern, content)
-    font_size_match = re.search(font_size_pattern, content)
-
-    # 记录原始值
-    if left_margin_match:
-        info['left_margin_original'] = int(left_margin_match.group(1))
+    # 3. 记录原始参数值
+    def original(name):
+        value = _def_value(defs, name)
+        return value.value if value is not None and value.kind == 'number' else None
+
+    left_margin_original = original('left-margin')
+    right_margin_original = original('right-margin')
+    box_width_original = original('box-width')
+    row_height_original = original('row-height')
+    font_size_original = original('font-size')
+
+    if left_margin_original is not None:
+        info['left_margin_original'] = left_margin_original
         info['left_margin_replaced'] = True
     else:
         info['left_margin_replaced'] = False
 
-    if right_margin_match:
-        info['right_margin_original'] = int(right_margin_match.group(1))
+    if right_margin_original is not None:
+        info['right_margin_original'] = right_margin_original
         info['right_margin_replaced'] = True
     else:
         info['right_margin_replaced'] = False
 
-    if box_width_match:
-        info['box_width_original'] = int(box_width_match.group(1))
+    if box_width_original is not None:
+        info['box_width_original'] = box_width_original
         info['box_width_injected'] = False  # 已存在，不是注入
     else:
         info['box_width_injected'] = True  # 不存在，需要注入
 
-    if row_height_match:
-        info['row_height_original'] = int(row_height_match.group(1))
+    if row_height_original is not None:
+        info['row_height_original'] = row_height_original
         info['row_height_replaced'] = True
     else:
         info['row_height_replaced'] = False
 
-    if font_size_match:
-        info['font_size_original'] = int(font_size_match.group(1))
+    if font_size_original is not None:
+        info['font_size_original'] = font_size_original
         info['font_size_replaced'] = True
     else:
         info['font_size_injected'] = True
 
-    # 4. 处理 left-margin
+    # 4-8. 强制设置的布局参数
     info['left_margin'] = DEFAULT_LEFT_MARGIN
-    content = inject_or_replace_param(content, 'left-margin', DEFAULT_LEFT_MARGIN)
-
-    # 5. 处理 right-margin
     info['right_margin'] = DEFAULT_RIGHT_MARGIN
-    content = inject_or_replace_param(content, 'right-margin', DEFAULT_RIGHT_MARGIN)
-
-    # 6. 处理 box-width
-    content = inject_or_replace_param(content, 'box-width', box_width)
-
-    # 7. 处理 row-height（强制覆盖）
     info['row_height'] = DEFAULT_ROW_HEIGHT
-    content = inject_or_replace_param(content, 'row-height', DEFAULT_ROW_HEIGHT)
-
-    # 8. 处理默认字号（font-size）定义
     info['font_size'] = DEFAULT_FONT_SIZE
-    content = inject_or_replace_param(content, 'font-size', DEFAULT_FONT_SIZE)
-
-    # 9. 在 defattrs 中注入字号（如果缺失）
-    content = inject_font_size_to_defattrs(content, DEFAULT_FONT_SIZE)
-
-    # 10. 处理内容中的字号（:font-size）
-    content, font_size_info = process_font_sizes(content)
-    info.update(font_size_info)
-
-    return content, info
-
+    overrides = {
+        'left-margin': DEFAULT_LEFT_MARGIN,
+        'right-margin': DEFAULT_RIGHT_MARGIN,
+        'box-width': box_width,
+        'row-height': DEFAULT_ROW_HEIGHT,
+        'font-size': DEFAULT_FONT_SIZE,
+    }
 
-def process_font_sizes(content: str) -> tuple[str, dict]:
-    """
-    处理 EDN 内容中的字号（font-size）。
-    
-    对于大于 12 的字号，将其除以 2；
-    对于小于等于 12 的字号，保持不变。
-    
-    参数:
-        content: EDN 内容字符串
-        
-    返回:
-        元组 (处理后的内容, 处理信息字典)
-        处理信息字典包含：
-        - font_sizes_processed: 处理的字号数量
-        - font_size_changes: 字号变化列表 [(原值, 新值), ...]
-        
-    示例:
-        >>> content = '{:font-size 18}'
-        >>> result, info = process_font_sizes(content)
-        >>> ':font-size 9' in result
-        True
-    """
-    info = {
+    font_size_info = {
         'font_sizes_processed': 0,
         'font_size_changes': []
     }
-
-    # 匹配 :font-size 和 font-size 后面的数字
-    # 支持多种格式：:font-size 18, font-size 12, 等
-    # 使用两个模式分别处理
-
-    def replace_font_size(match):
-        prefix = match.group(1)  # 可能是 ":" 或 空字符串
-        original_size = int(match.group(2))
-
-        # 对大于 12 的字号进行除以 2
-        if original_size > 12:
-            new_size = original_size // 2
-            info['font_sizes_processed'] += 1
-            info['font_size_changes'].append((original_size, new_size))
-            return f'{prefix}font-size {new_size}'
-        else:
-            # 小于等于 12 的保持不变
-            return match.group(0)
-
-    # 匹配 :font-size 或 "font-size（在 defattrs 中）
-    # 模式说明：(:)?font-size\s+(\d+)
-    # (:)? - 可选的冒号
-    # font-size - 字面量
-    # \s+ - 一个或多个空格
-    # (\d+) - 数字
-    pattern = r'(:)?font-size\s+(\d+)'
-
-    # 替换所有匹配的字号
-    content = re.sub(pattern, replace_font_size, content)
+    edits: List[Edit] = []
+
+    # 一次遍历所有顶层表达式
+    for form in forms:
+        # 已存在的布局参数：整体替换为规范形式
+        name = _def_name(form)
+        if name in overrides:
+            edits.append((form.start, form.end, f'(def {name} {overrides[name]})'))
+            continue
+
+        # defattrs 中缺少字号时，在属性映射末尾注入默认字号
+        if form.head_symbol() == 'defattrs':
+            for attrs in _defattrs_maps(form):
+                if not _has_font_size(attrs):
+                    insert_pos = attrs.value[-1].end if attrs.value else attrs.start + 1
+                    separator = ' ' if attrs.value else ''
+                    edits.append((insert_pos, insert_pos, f'{separator}:font-size {DEFAULT_FONT_SIZE}'))
+
+        # 处理内容中的字号
+        _rewrite_font_sizes(form, edits, font_size_info)
+
+    # 注入缺失的布局参数定义
+    missing = [f'(def {name} {overrides[name]})' for name in LAYOUT_PARAM_NAMES if name not in defs]
+    if missing:
+        edits.append(_injection_edit(content, forms, missing))
+
+    content = _apply_edits(content, edits)
+    info.update(font_size_info)
 
     return content, info
-
-
-def inject_font_size_to_defattrs(content: str, font_size: int) -> str:
-    """
-    在 defattrs 中注入或更新 :font-size。
-    
-    如果 defattrs 中已有 :font-size，则更新它；
-    如果没有，则注入默认字号。
-    
-    参数:
-        content: EDN 内容字符串
-        font_size: 要设置的字号值
-        
-    返回:
-        处理后的 EDN 内容字符串
-        
-    示例:
-        >>> content = '(defattrs :plain [:plain {:font-family "M+ 1p"}])'
-        >>> result = inject_font_size_to_defattrs(content, 12)
-        >>> ':font-size 12' in result
-        True
-    """
-    # 匹配 defattrs 定义
-    # 模式：(defattrs :name [:name {属性}])
-    defattrs_pattern = r'\(defattrs\s+:\w+\s+\[:\w+\s+\{([^}]+)\}\]\)'
-
-    def process_defattrs(match):
-        attrs = match.group(1)
-
-        # 检查是否已有 :font-size
-        if ':font-size' in attrs:
-            # 已有，不需要处理（会被 process_font_sizes 处理）
-            return match.group(0)
-        else:
-            # 没有，注入默认字号
-            # 在属性末尾添加 :font-size
-            new_attrs = attrs.rstrip() + f' :font-size {font_size}'
-            return match.group(0).replace(attrs, new_attrs)
-
-    content = re.sub(defattrs_pattern, process_defattrs, content)
-    return content
@@ -0,0 +1,351 @@
+"""
+原生 bytefield 渲染器模块。
+
+此模块在 Python 进程内直接把 bytefield EDN 渲染为 SVG，
+避免每个文件都启动一次 Node.js 和 ClojureScript 运行时。
+
+只实现博客 EDN 文件实际用到的子集：
+- (defattrs :name spec)：定义或扩展命名属性
+- (def name value)：定义全局布局参数
+- (draw-column-headers spec)：绘制列标题，支持 :height、:font-size、:labels
+- (draw-box label spec)：绘制盒子，支持 :span、:borders、:text-anchor 及文本属性
+- (text label spec)：带属性的文本片段
+- (reverse coll)：反转序列（用于列标题）
+
+遇到子集之外的表达式时抛出 UnsupportedFormError，
+调用方可据此回退到 bytefield-svg。
+"""
+
+from typing import Any, Dict, List, Optional
+from xml.sax.saxutils import escape, quoteattr
+
+from .edn import Keyword, Node, Symbol, parse_edn
+
+# bytefield-svg 的全局参数默认值
+DEFAULT_GLOBALS = {
+    'left-margin': 40,
+    'right-margin': 1,
+    'bottom-margin': 1,
+    'box-width': 40,
+    'boxes-per-row': 16,
+    'row-height': 30,
+    'row-header-fn': Symbol('default-row-header-fn'),
+    'svg-attrs': {},
+}
+
+# bytefield-svg 预定义的命名属性
+PREDEFINED_ATTRIBUTES = {
+    'hex': {'font-size': 18, 'font-family': 'Courier New, monospace'},
+    'plain': {'font-size': 18, 'font-family': 'Palatino, Georgia, Times New Roman, serif'},
+    'bold': {'font-weight': 'bold'},
+    'math': {'font-family': 'Palatino, Georgia, Times New Roman, serif', 'font-style': 'italic'},
+    'sub': {'baseline-shift': 'sub', 'font-size': '70%'},
+    'super': {'baseline-shift': 'super', 'font-size': '70%'},
+    'dotted': {'stroke-dasharray': '1,3'},
+    'border-unrelated': {'stroke': '#000000', 'stroke-width': 1},
+    'border-related': {'stroke': '#000000', 'stroke-width': 1, 'stroke-dasharray': '1,3'},
+    'column-number': {'font-size': 11, 'font-family': 'Courier New, monospace'},
+}
+
+# 列标题的默认高度与标签
+DEFAULT_COLUMN_HEADER_HEIGHT = 14
+DEFAULT_COLUMN_LABELS = [format(i, 'x') for i in range(16)]
+
+# 盒子边框的绘制顺序
+BORDER_SIDES = ('left', 'right', 'top', 'bottom')
+
+# 盒子属性中由 draw-box 自身消费、不会传递给文本的键
+BOX_ONLY_KEYS = {'span', 'borders', 'fill', 'text-anchor'}
+
+# 文本靠左或靠右对齐时与盒子边缘的间距（像素）
+TEXT_ANCHOR_PADDING = 2
+
+
+class UnsupportedFormError(ValueError):
+    """原生渲染器不支持的 bytefield 表达式"""
+
+
+class _TextSpan:
+    """(text label spec) 的求值结果"""
+
+    def __init__(self, label: Any, attrs: Dict[str, Any]):
+        self.label = label
+        self.attrs = attrs
+
+
+def _format_number(value: Any) -> str:
+    """以 ClojureScript 的方式输出数字：整数值不带小数点"""
+    if isinstance(value, float):
+        if value.is_integer():
+            return str(int(value))
+        return repr(value)
+    return str(value)
+
+
+def _format_attrs(attrs: Dict[str, Any]) -> str:
+    """将属性字典格式化为 SVG 属性字符串"""
+    parts = []
+    for name, value in attrs.items():
+        if value is None:
+            continue
+        text = _format_number(value) if isinstance(value, (int, float)) else str(value)
+        parts.append(f' {name}={quoteattr(text)}')
+    return ''.join(parts)
+
+
+def _render_label(label: Any) -> str:
+    """将标签渲染为 SVG 文本内容"""
+    if isinstance(label, _TextSpan):
+        return f'<tspan{_format_attrs(label.attrs)}>{_render_label(label.label)}</tspan>'
+    if isinstance(label, list):
+        return ''.join(_render_label(item) for item in label)
+    if label is None:
+        return ''
+    return escape(_format_number(label) if isinstance(label, (int, float)) else str(label))
+
+
+class NativeRenderer:
+    """
+    bytefield 表达式求值器
+
+    维护与 bytefield-svg 相同的全局状态（diagram-y、box-index 等），
+    按顺序求值顶层表达式并累积 SVG 元素。
+    """
+
+    def __init__(self, param_info: Optional[Dict[str, Any]] = None):
+        self.globals: Dict[str, Any] = dict(DEFAULT_GLOBALS)
+        self.attributes: Dict[str, Dict[str, Any]] = {k: dict(v) for k, v in PREDEFINED_ATTRIBUTES.items()}
+        self.body: List[str] = []
+        self.diagram_y = 0
+        self.box_index = 0
+
+        # 以 process_bytefield_params 计算出的布局参数作为初始值
+        if param_info:
+            for key, name in (('left_margin', 'left-margin'), ('right_margin', 'right-margin'),
+                              ('box_width', 'box-width'), ('boxes_per_row', 'boxes-per-row'),
+                              ('row_height', 'row-height')):
+                if key in param_info:
+                    self.globals[name] = param_info[key]
+
+    # ------------------------------------------------------------------
+    # 求值
+    # ------------------------------------------------------------------
+
+    def evaluate(self, node: Node) -> Any:
+        """求值单个节点"""
+        if node.kind in ('string', 'number', 'keyword'):
+            return node.value
+        if node.kind == 'symbol':
+            return self._resolve_symbol(node.value)
+        if node.kind == 'vector':
+            return [self.evaluate(child) for child in node.value]
+        if node.kind == 'set':
+            return {self.evaluate(child) for child in node.value}
+        if node.kind == 'map':
+            return {self.evaluate(key): self.evaluate(value) for key, value in node.map_items()}
+        return self._call(node)
+
+    def _resolve_symbol(self, name: str) -> Any:
+        """解析符号：字面量或已定义的全局参数"""
+        if name == 'nil':
+            return None
+        if name in ('true', 'false'):
+            return name == 'true'
+        if name in self.globals:
+            return self.globals[name]
+        raise UnsupportedFormError(f"未定义的符号: {name}")
+
+    def _call(self, node: Node) -> Any:
+        """求值函数调用形式的列表节点"""
+        head = node.head_symbol()
+        args = node.value[1:]
+
+        if head == 'def':
+            if len(args) != 2 or args[0].kind != 'symbol':
+                raise UnsupportedFormError(f"无法识别的 def 形式（位置 {node.start}）")
+            self.globals[args[0].value] = self.evaluate(args[1])
+            return None
+
+        if head == 'defattrs':
+            if len(args) != 2 or args[0].kind != 'keyword':
+                raise UnsupportedFormError(f"无法识别的 defattrs 形式（位置 {node.start}）")
+            self.attributes[args[0].value] = self.eval_attribute_spec(self.evaluate(args[1]))
+            return None
+
+        if head == 'text':
+            label = self.evaluate(args[0]) if args else ''
+            spec = self.evaluate(args[1]) if len(args) > 1 else None
+            return _TextSpan(label, self.eval_attribute_spec(spec))
+
+        if head == 'reverse':
+            if len(args) != 1:
+                raise UnsupportedFormError(f"reverse 需要一个参数（位置 {node.start}）")
+            return list(reversed(self.evaluate(args[0]) or []))
+
+        if head == 'draw-column-headers':
+            spec = self.evaluate(args[0]) if args else None
+            self.draw_column_headers(spec)
+            return None
+
+        if head == 'draw-box':
+            label = self.evaluate(args[0]) if args else None
+            spec = self.evaluate(args[1]) if len(args) > 1 else None
+            self.draw_box(label, spec)
+            return None
+
+        raise UnsupportedFormError(f"不支持的表达式 ({head} ...)（位置 {node.start}）")
+
+    def eval_attribute_spec(self, spec: Any) -> Dict[str, Any]:
+        """
+        求值属性说明：关键字引用命名属性，映射直接使用，向量按顺序合并
+        """
+        if spec is None:
+            return {}
+        if isinstance(spec, Keyword):
+            return dict(self.attributes.get(spec, {}))
+        if isinstance(spec, dict):
+            return {str(key): value for key, value in spec.items()}
+        if isinstance(spec, list):
+            merged: Dict[str, Any] = {}
+            for item in spec:
+                merged.update(self.eval_attribute_spec(item))
+            return merged
+        raise UnsupportedFormError(f"无法识别的属性说明: {spec!r}")
+
+    # ------------------------------------------------------------------
+    # 绘制
+    # ------------------------------------------------------------------
+
+    def _check_row_header(self) -> None:
+        """原生渲染器不绘制行标题，要求 row-header-fn 为 nil"""
+        if self.globals.get('row-header-fn') is not None:
+            raise UnsupportedFormError("原生渲染器仅支持 (def row-header-fn nil)")
+
+    def draw_column_headers(self, spec: Any) -> None:
+        """绘制一行列标题"""
+        attrs = self.eval_attribute_spec(spec)
+        height = attrs.pop('height', DEFAULT_COLUMN_HEADER_HEIGHT)
+        labels = attrs.pop('labels', DEFAULT_COLUMN_LABELS)
+
+        text_attrs = dict(self.attributes['column-number'])
+        text_attrs.update(attrs)
+
+        left_margin = self.globals['left-margin']
+        box_width = self.globals['box-width']
+        y = self.diagram_y + height / 2
+
+        for i in range(self.globals['boxes-per-row']):
+            label = labels[i] if i < len(labels) else ''
+            x = left_margin + (i + 0.5) * box_width
+            element_attrs = {'x': x, 'y': y, **text_attrs,
+                             'dominant-baseline': 'middle', 'text-anchor': 'middle'}
+            self.body.append(f'<text{_format_attrs(element_attrs)}>{_render_label(label)}</text>')
+
+        self.diagram_y += height
+
+    def draw_box(self, label: Any, spec: Any) -> None:
+        """绘制一个（可能跨越多列的）盒子及其标签"""
+        self._check_row_header()
+        attrs = self.eval_attribute_spec(spec)
+        span = attrs.get('span', 1)
+        boxes_per_row = self.globals['boxes-per-row']
+        column = self.box_index % boxes_per_row
+        if column + span > boxes_per_row:
+            raise UnsupportedFormError(f"盒子跨度 {span} 超出当前行剩余的 {boxes_per_row - column} 列")
+
+        box_width = self.globals['box-width']
+        row_height = self.globals['row-height']
+        left = self.globals['left-margin'] + column * box_width
+        width = span * box_width
+        top = self.diagram_y
+        bottom = top + row_height
+
+        # 背景填充
+        if attrs.get('fill') is not None:
+            fill_attrs = {'x': left, 'y': top, 'width': width, 'height': row_height, 'fill': attrs['fill']}
+            self.body.append(f'<rect{_format_attrs(fill_attrs)}/>')
+
+        # 标签文本
+        if label is not None:
+            text_anchor = attrs.get('text-anchor', 'middle')
+            if text_anchor == 'start':
+                x = left + TEXT_ANCHOR_PADDING
+            elif text_anchor == 'end':
+                x = left + width - TEXT_ANCHOR_PADDING
+            else:
+                x = left + width / 2
+            text_attrs = dict(self.attributes['plain'])
+            text_attrs.update({key: value for key, value in attrs.items() if key not in BOX_ONLY_KEYS})
+            element_attrs = {'x': x, 'y': top + row_height / 2, **text_attrs,
+                             'dominant-baseline': 'middle', 'text-anchor': text_anchor}
+            self.body.append(f'<text{_format_attrs(element_attrs)}>{_render_label(label)}</text>')
+
+        # 边框：未指定时绘制四边，集合表示使用默认样式的边，映射为每条边指定样式
+        borders = attrs.get('borders', set(BORDER_SIDES))
+        if isinstance(borders, set):
+            border_styles = {str(side): Keyword('border-unrelated') for side in borders}
+        elif isinstance(borders, dict):
+            border_styles = {str(side): style for side, style in borders.items()}
+        else:
+            raise UnsupportedFormError(f"无法识别的 :borders 值: {borders!r}")
+
+        endpoints = {
+            'left': (left, top, left, bottom),
+            'right': (left + width, top, left + width, bottom),
+            'top': (left, top, left + width, top),
+            'bottom': (left, bottom, left + width, bottom),
+        }
+        for side in BORDER_SIDES:
+            if side not in border_styles:
+                continue
+            x1, y1, x2, y2 = endpoints[side]
+            line_attrs = {'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2,
+                          **self.eval_attribute_spec(border_styles[side])}
+            self.body.append(f'<line{_format_attrs(line_attrs)}/>')
+
+        # 推进到下一个位置，填满一行后换行
+        self.box_index += span
+        if self.box_index % boxes_per_row == 0:
+            self.diagram_y += row_height
+
+    def finish(self) -> str:
+        """结束当前行并输出完整的 SVG 文档"""
+        boxes_per_row = self.globals['boxes-per-row']
+        diagram_y = self.diagram_y
+        if self.box_index % boxes_per_row:
+            diagram_y += self.globals['row-height']
+
+        width = (self.globals['left-margin'] + boxes_per_row * self.globals['box-width']
+                 + self.globals['right-margin'])
+        height = diagram_y + self.globals['bottom-margin']
+
+        svg_attrs = {
+            'xmlns': 'http://www.w3.org/2000/svg',
+            'xmlns:xlink': 'http://www.w3.org/1999/xlink',
+            'width': width,
+            'height': height,
+            'viewBox': f'0 0 {_format_number(width)} {_format_number(height)}',
+        }
+        svg_attrs.update(self.eval_attribute_spec(self.globals.get('svg-attrs')))
+        return f'<svg{_format_attrs(svg_attrs)}>{"".join(self.body)}</svg>\n'
+
+
+def render_native_svg(bytefield_content: str, param_info: Optional[Dict[str, Any]] = None) -> str:
+    """
+    在进程内将 bytefield 内容渲染为 SVG。
+
+    参数:
+        bytefield_content: bytefield 内容（通常是 process_bytefield_params 处理后的内容）
+        param_info: process_bytefield_params 返回的参数信息，用作布局参数的初始值
+
+    返回:
+        与 bytefield-svg 输出结构一致的 SVG 内容
+
+    异常:
+        UnsupportedFormError: 内容中包含原生渲染器不支持的表达式
+        EdnSyntaxError: EDN 语法错误
+    """
+    renderer = NativeRenderer(param_info)
+    for form in parse_edn(bytefield_content):
+        renderer.evaluate(form)
+    return renderer.finish()
@@ -0,0 +1,237 @@
+"""
+资产发现索引
+
+用 os.scandir 遍历一次 blog/ 和 docs/，按路径规则把文件归类为各种资产的
+源文件或输出文件，供各生成器的 find_*_files 共用，不再各自 rglob 整棵树。
+
+索引连同每个目录的修改时间持久化在缓存目录中。再次扫描时只需 stat
+每个目录：修改时间未变的目录直接复用上次的文件列表，只有增删过条目的
+目录才重新 scandir（目录的修改时间只反映直接子项的增删，因此仍需
+逐层检查子目录）。
+
+分类规则（路径相对于项目根目录）：
+- bytefield: blog/*/_assets/bytefield/*.edn
+- wavedrom: blog/**/_assets/wavedrom/*.edn
+- litmus: docs/**/_assets/litmus/*.litmus
+- memory: docs/**/memory/*.txt
+- dot: docs/**/_assets/dot/*.txt
+- ansi: docs/**/*.ansi
+- markdown: 任意 .md / .mdx（后缀不区分大小写）
+- image: 任意 images/ 目录下的文件（生成的输出）
+
+Shell 脚本可以通过命令行使用：
+    python3 -m scripts.lib.common.asset_index memory
+"""
+
+import argparse
+import os
+import sys
+import threading
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Optional
+
+from .cache import get_cache_root, read_json, write_json_atomic
+from .utils import find_project_root
+
+# 扫描的根目录（相对于项目根目录）
+INDEX_ROOTS = ('blog', 'docs')
+
+# 索引文件名（位于缓存目录中）
+INDEX_FILE = 'asset-index.json'
+
+# 索引格式版本，分类规则变化时递增
+INDEX_VERSION = 2
+
+# 所有资产类型
+ASSET_KINDS = ['bytefield', 'wavedrom', 'litmus', 'memory', 'dot', 'ansi', 'markdown', 'image']
+
+
+def classify(rel_path: PurePosixPath) -> Optional[str]:
+    """
+    按路径规则判断文件的资产类型
+
+    Args:
+        rel_path: 相对于项目根目录的路径
+
+    Returns:
+        资产类型，不属于任何类型时返回 None
+    """
+    parts = rel_path.parts
+    suffix = rel_path.suffix
+    parent = parts[-2] if len(parts) >= 2 else ''
+    grandparent = parts[-3] if len(parts) >= 3 else ''
+    top = parts[0]
+
+    if 'images' in parts[1:-1]:
+        return 'image'
+    if suffix.lower() in ('.md', '.mdx'):
+        return 'markdown'
+    if top == 'blog' and suffix == '.edn' and grandparent == '_assets':
+        if parent == 'bytefield' and len(parts) == 5:
+            return 'bytefield'
+        if parent == 'wavedrom':
+            return 'wavedrom'
+    if top == 'docs':
+        if suffix == '.litmus' and parent == 'litmus' and grandparent == '_assets':
+            return 'litmus'
+        if suffix == '.txt' and parent == 'memory':
+            return 'memory'
+        if suffix == '.txt' and parent == 'dot' and grandparent == '_assets':
+            return 'dot'
+        if suffix == '.ansi':
+            return 'ansi'
+    return None
+
+
+class AssetIndex:
+    """
+    持久化的资产发现索引
+
+    Attributes:
+        project_root: 项目根目录
+        index_path: 持久化文件路径
+    """
+
+    def __init__(self, project_root: Path, index_path: Optional[Path] = None):
+        self.project_root = project_root
+        self.index_path = index_path or get_cache_root() / INDEX_FILE
+        self._lock = threading.Lock()
+        # 相对目录 -> {'mtime': 修改时间, 'files': {文件名: 类型}, 'dirs': [子目录名]}
+        self._dirs: Dict[str, Dict] = {}
+        self._scanned = False
+        self.stats = {'scanned': 0, 'reused': 0}
+
+    def _load(self) -> Dict[str, Dict]:
+        data = read_json(self.index_path)
+        if data.get('version') != INDEX_VERSION:
+            return {}
+        return data.get('dirs', {})
+
+    def _scan_dir(self, rel_dir: str, previous: Dict[str, Dict], dirs_out: Dict[str, Dict]) -> None:
+        """扫描单个目录（修改时间未变时复用上次结果）并递归子目录"""
+        directory = self.project_root / rel_dir
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return
+
+        cached = previous.get(rel_dir)
+        if cached is not None and cached.get('mtime') == mtime:
+            record = cached
+            self.stats['reused'] += 1
+        else:
+            files: Dict[str, str] = {}
+            subdirs: List[str] = []
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                        elif entry.is_file():
+                            kind = classify(PurePosixPath(rel_dir, entry.name))
+                            if kind is not None:
+                                files[entry.name] = kind
+            except OSError:
+                return
+            record = {'mtime': mtime, 'files': files, 'dirs': sorted(subdirs)}
+            self.stats['scanned'] += 1
+
+        dirs_out[rel_dir] = record
+        for name in record['dirs']:
+            self._scan_dir(f"{rel_dir}/{name}", previous, dirs_out)
+
+    def refresh(self) -> None:
+        """重新扫描（只 scandir 修改时间变化的目录）并写回索引"""
+        with self._lock:
+            previous = self._dirs or self._load()
+            dirs: Dict[str, Dict] = {}
+            self.stats = {'scanned': 0, 'reused': 0}
+            for root in INDEX_ROOTS:
+                self._scan_dir(root, previous, dirs)
+            self._dirs = dirs
+            self._scanned = True
+            if self.stats['scanned'] or set(previous) != set(dirs):
+                try:
+                    write_json_atomic(self.index_path, {'version': INDEX_VERSION, 'dirs': self._dirs})
+                except OSError:
+                    # 索引只是加速手段，缓存目录不可写时不影响结果
+                    pass
+
+    def covers(self, path: Path) -> bool:
+        """判断路径是否位于索引扫描的根目录之内"""
+        try:
+            rel = Path(os.path.abspath(path)).relative_to(self.project_root)
+        except ValueError:
+            return False
+        return bool(rel.parts) and rel.parts[0] in INDEX_ROOTS
+
+    def files(self, kind: str, under: Optional[Path] = None) -> List[Path]:
+        """
+        列出某种类型的所有文件
+
+        Args:
+            kind: 资产类型
+            under: 只返回该目录下的文件（需位于索引根目录之内）
+
+        Returns:
+            按路径排序的绝对路径列表
+        """
+        if not self._scanned:
+            self.refresh()
+
+        prefix = None
+        if under is not None:
+            rel = Path(os.path.abspath(under)).relative_to(self.project_root).as_posix()
+            prefix = rel.rstrip('/') + '/'
+
+        result = []
+        for rel_dir, record in self._dirs.items():  # refresh 整体替换字典，遍历期间不会被修改
+            if prefix is not None and not f"{rel_dir}/".startswith(prefix):
+                continue
+            for name, file_kind in record['files'].items():
+                if file_kind == kind:
+                    result.append(self.project_root / rel_dir / name)
+        return sorted(result)
+
+
+# 进程内共享的索引
+_shared_index: Optional[AssetIndex] = None
+_shared_index_lock = threading.Lock()
+
+
+def get_asset_index() -> AssetIndex:
+    """
+    获取进程内共享的资产索引（首次使用时扫描）
+
+    Raises:
+        FileNotFoundError: 找不到项目根目录
+    """
+    global _shared_index
+    with _shared_index_lock:
+        if _shared_index is None:
+            root = find_project_root()
+            if not root:
+                raise FileNotFoundError("无法找到项目根目录")
+            _shared_index = AssetIndex(Path(root))
+        return _shared_index
+
+
+def parse_args() -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='列出项目中某种类型的资产文件')
+    parser.add_argument('kinds', nargs='+', choices=ASSET_KINDS, help='资产类型')
+    return parser.parse_args()
+
+
+def main() -> int:
+    """按类型输出资产文件的绝对路径，每行一个"""
+    args = parse_args()
+    index = get_asset_index()
+    for kind in args.kinds:
+        for path in index.files(kind):
+            print(path)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
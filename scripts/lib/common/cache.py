@@ -0,0 +1,495 @@
+"""
+构建缓存模块
+
+按内容寻址缓存各图表生成器的输出文件。缓存键由以下部分的哈希组成：
+- source: 源内容（文件内容或提取出的图表代码）
+- params: 影响输出的有效参数
+- theme: 主题配置字典（如 BYTEFIELD_THEMES[theme]）
+- tool:<名称>: 外部工具版本
+- code: 生成器自身的源代码
+
+每个条目（通常是“源文件:主题”）在索引中记录上一次的各部分哈希，
+未命中时可以据此说明是哪一部分发生了变化。
+
+输出文件存储时复制进缓存，恢复时再复制出来（保留修改时间）。
+生成器会就地覆盖输出文件，若恢复为指向缓存对象的硬链接，重新生成时会改写缓存对象本身，
+因此这里不使用硬链接。恢复前仍会检查缓存对象的大小和修改时间，被外部修改的条目视为失效。
+
+缓存目录默认为项目根目录下的 .cache/diagrams，可通过环境变量
+DIAGRAM_CACHE_DIR 覆盖。
+
+Shell 脚本可以通过命令行使用：
+    python3 -m scripts.lib.common.cache restore --namespace memory --entry ... --base-dir ...
+    python3 -m scripts.lib.common.cache store --namespace memory --entry ... --base-dir ... FILE...
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+from .utils import eprint, find_project_root
+
+# 缓存目录的环境变量和默认位置（相对于项目根目录）
+CACHE_DIR_ENV = 'DIAGRAM_CACHE_DIR'
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'diagrams')
+
+# 各工具查询版本的参数，未列出的工具使用 --version
+TOOL_VERSION_ARGS = {
+    'herd7': ['-version'],
+    'neato': ['-V'],
+    'dot': ['-V'],
+}
+
+# 查询工具版本的超时时间（秒）
+TOOL_VERSION_TIMEOUT = 30
+
+# 参与生成器代码指纹的文件类型
+CODE_SUFFIXES = ('.py', '.sh')
+
+
+def get_cache_root() -> Path:
+    """
+    获取缓存根目录
+
+    Returns:
+        缓存根目录路径
+    """
+    override = os.environ.get(CACHE_DIR_ENV)
+    if override:
+        return Path(override)
+    return Path(find_project_root() or os.getcwd()) / DEFAULT_CACHE_DIR
+
+
+def fingerprint(value: Any) -> str:
+    """
+    计算任意值的稳定哈希
+
+    字符串和字节串直接哈希，路径哈希文件内容，其他值先序列化为
+    键有序的 JSON。
+
+    Args:
+        value: 待哈希的值
+
+    Returns:
+        十六进制 SHA-256 摘要
+    """
+    if isinstance(value, Path):
+        value = value.read_bytes()
+    elif isinstance(value, str):
+        value = value.encode('utf-8')
+    elif not isinstance(value, bytes):
+        value = json.dumps(value, sort_keys=True, ensure_ascii=False, default=repr).encode('utf-8')
+    return hashlib.sha256(value).hexdigest()
+
+
+def write_json_atomic(path: Path, data: Any) -> None:
+    """先写临时文件再替换，避免并发读取到半截内容"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def read_json(path: Path) -> Dict[str, Any]:
+    """读取 JSON 文件，文件缺失或损坏时返回空字典"""
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+# 进程内已解析的工具版本
+_tool_versions: Dict[str, str] = {}
+
+
+def tool_version(name: str) -> str:
+    """
+    获取外部工具的版本指纹
+
+    版本输出按可执行文件的路径、大小和修改时间持久化在缓存目录中，
+    可执行文件不变时不会重复启动工具（Inkscape 等工具启动较慢）。
+    工具不支持版本参数时，以可执行文件本身的信息作为指纹。
+
+    Args:
+        name: 工具名称（在 PATH 中查找）
+
+    Returns:
+        版本指纹字符串，未安装时返回 'missing'
+    """
+    if name in _tool_versions:
+        return _tool_versions[name]
+
+    executable = shutil.which(name)
+    if executable is None:
+        _tool_versions[name] = 'missing'
+        return 'missing'
+
+    resolved = os.path.realpath(executable)
+    stat = os.stat(resolved)
+    stamp = f'{resolved}:{stat.st_size}:{stat.st_mtime_ns}'
+
+    versions_path = get_cache_root() / 'tools.json'
+    versions = read_json(versions_path)
+    recorded = versions.get(name)
+    if recorded and recorded.get('stamp') == stamp:
+        _tool_versions[name] = recorded['version']
+        return recorded['version']
+
+    args = TOOL_VERSION_ARGS.get(name, ['--version'])
+    try:
+        result = subprocess.run([executable] + args, capture_output=True, text=True,
+                                timeout=TOOL_VERSION_TIMEOUT)
+        output = (result.stdout + result.stderr).strip()
+        version = output if result.returncode == 0 and output else stamp
+    except (OSError, subprocess.TimeoutExpired):
+        version = stamp
+
+    versions[name] = {'stamp': stamp, 'version': version}
+    try:
+        write_json_atomic(versions_path, versions)
+    except OSError:
+        pass
+    _tool_versions[name] = version
+    return version
+
+
+# 进程内已计算的代码指纹
+_code_fingerprints: Dict[Path, str] = {}
+
+
+def code_fingerprint(directory: Union[str, Path]) -> str:
+    """
+    计算生成器代码目录的指纹
+
+    Args:
+        directory: 代码目录
+
+    Returns:
+        目录下所有源代码文件的组合哈希
+    """
+    directory = Path(directory).resolve()
+    if directory not in _code_fingerprints:
+        digest = hashlib.sha256()
+        for path in sorted(directory.rglob('*')):
+            if path.suffix in CODE_SUFFIXES and '__pycache__' not in path.parts:
+                digest.update(str(path.relative_to(directory)).encode('utf-8'))
+                digest.update(path.read_bytes())
+        _code_fingerprints[directory] = digest.hexdigest()
+    return _code_fingerprints[directory]
+
+
+@dataclass
+class CacheKey:
+    """
+    缓存键
+
+    Attributes:
+        components: 各组成部分名称到哈希的映射
+    """
+    components: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def digest(self) -> str:
+        """组合后的键哈希"""
+        return fingerprint(self.components)
+
+
+class BuildCache:
+    """
+    某个生成器（命名空间）的构建缓存
+
+    Attributes:
+        namespace: 命名空间，如 'bytefield'、'litmus'
+        enabled: 是否启用；禁用时不恢复也不存储，但仍统计未命中
+        explain: 未命中时是否输出原因
+        hits: 命中次数
+        misses: 未命中次数
+    """
+
+    def __init__(self, namespace: str, enabled: bool = True, explain: bool = False,
+                 root: Optional[Path] = None):
+        self.namespace = namespace
+        self.enabled = enabled
+        self.explain = explain
+        self.hits = 0
+        self.misses = 0
+        self.directory = (root or get_cache_root()) / namespace
+        self._index_path = self.directory / 'index.json'
+        self._index: Dict[str, Dict[str, str]] = read_json(self._index_path) if enabled else {}
+        self._dirty: Dict[str, Dict[str, str]] = {}
+        # 多个构建线程可以共享同一个缓存实例
+        self._lock = threading.Lock()
+
+    def make_key(self, source: Any, params: Any = None, theme: Any = None,
+                 tools: Sequence[str] = (), code: Sequence[Union[str, Path]] = ()) -> CacheKey:
+        """
+        构造缓存键
+
+        Args:
+            source: 源内容（字符串、字节串、文件路径或可 JSON 序列化的值）
+            params: 影响输出的参数（可 JSON 序列化）
+            theme: 主题配置字典
+            tools: 使用到的外部工具名称
+            code: 生成器代码目录
+
+        Returns:
+            缓存键
+        """
+        components = {
+            'source': fingerprint(source),
+            'params': fingerprint(params),
+            'theme': fingerprint(theme),
+        }
+        for name in tools:
+            components[f'tool:{name}'] = fingerprint(tool_version(name))
+        if code:
+            components['code'] = fingerprint([code_fingerprint(directory) for directory in code])
+        return CacheKey(components)
+
+    def _object_dir(self, key: CacheKey) -> Path:
+        digest = key.digest
+        return self.directory / 'objects' / digest[:2] / digest
+
+    def _explain_miss(self, entry: str, key: CacheKey, reason: Optional[str] = None) -> None:
+        """输出未命中原因"""
+        if not self.explain:
+            return
+        if reason is None:
+            previous = self._index.get(entry)
+            if previous is None:
+                reason = '首次构建'
+            else:
+                changed = sorted(
+                    name for name in set(previous) | set(key.components)
+                    if previous.get(name) != key.components.get(name)
+                )
+                reason = f"{', '.join(changed)} 已变化" if changed else '缓存对象缺失'
+        eprint(f"  [cache] {self.namespace} 未命中 {entry}: {reason}")
+
+    def restore(self, entry: str, key: CacheKey, base_dir: Path) -> Optional[List[Path]]:
+        """
+        从缓存恢复输出文件
+
+        Args:
+            entry: 条目名称，用于记录和说明未命中原因
+            key: 缓存键
+            base_dir: 输出文件的基准目录
+
+        Returns:
+            命中时返回恢复的文件路径列表，未命中时返回 None
+        """
+        if not self.enabled:
+            self._count_miss()
+            return None
+
+        object_dir = self._object_dir(key)
+        manifest = read_json(object_dir / 'manifest.json')
+        if not manifest:
+            self._count_miss()
+            self._explain_miss(entry, key)
+            return None
+
+        # 检查缓存对象是否被就地修改
+        for item in manifest['files']:
+            try:
+                stat = os.stat(object_dir / 'files' / item['path'])
+            except OSError:
+                stat = None
+            if stat is None or stat.st_size != item['size'] or stat.st_mtime_ns != item['mtime_ns']:
+                shutil.rmtree(object_dir, ignore_errors=True)
+                self._count_miss()
+                self._explain_miss(entry, key, '缓存对象已被修改')
+                return None
+
+        restored = []
+        for item in manifest['files']:
+            source = object_dir / 'files' / item['path']
+            target = base_dir / item['path']
+            target.parent.mkdir(parents=True, exist_ok=True)
+            # 先删除旧文件：它可能是其他文件的硬链接，直接覆盖会改写共享的内容
+            if os.path.lexists(target):
+                os.unlink(target)
+            shutil.copy2(source, target)
+            restored.append(target)
+
+        with self._lock:
+            self.hits += 1
+        self._record(entry, key)
+        return restored
+
+    def store(self, entry: str, key: CacheKey, base_dir: Path, files: Iterable[Path]) -> None:
+        """
+        把生成的输出文件存入缓存
+
+        Args:
+            entry: 条目名称
+            key: 缓存键
+            base_dir: 输出文件的基准目录，缓存中按相对路径保存
+            files: 输出文件路径（位于 base_dir 下的路径，或相对于 base_dir 的路径）
+        """
+        if not self.enabled:
+            return
+
+        object_dir = self._object_dir(key)
+        object_dir.parent.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(dir=object_dir.parent, prefix='.staging-'))
+        try:
+            items = []
+            for path in files:
+                try:
+                    relative = Path(path).relative_to(base_dir)
+                except ValueError:
+                    relative = Path(path)
+                target = staging / 'files' / relative
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(base_dir / relative, target)
+                stat = os.stat(target)
+                items.append({'path': str(relative), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns})
+            write_json_atomic(staging / 'manifest.json', {'entry': entry, 'files': items})
+
+            shutil.rmtree(object_dir, ignore_errors=True)
+            os.replace(staging, object_dir)
+        except OSError as e:
+            eprint(f"  [cache] 无法写入缓存 {entry}: {e}")
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+
+        self._record(entry, key)
+
+    def _count_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def _record(self, entry: str, key: CacheKey) -> None:
+        with self._lock:
+            self._index[entry] = key.components
+            self._dirty[entry] = key.components
+
+    def flush(self) -> None:
+        """把本次更新的条目写回索引（与其他进程的更新合并）"""
+        with self._lock:
+            if not self._dirty:
+                return
+            index = read_json(self._index_path)
+            index.update(self._dirty)
+            try:
+                write_json_atomic(self._index_path, index)
+            except OSError as e:
+                eprint(f"  [cache] 无法写入缓存索引: {e}")
+            self._dirty.clear()
+
+    def summary(self) -> str:
+        """
+        写回索引并返回命中统计
+
+        Returns:
+            统计信息字符串
+        """
+        self.flush()
+        if not self.enabled:
+            return f"缓存: 已禁用 ({self.misses} 项重新生成)"
+        return f"缓存: 命中 {self.hits}，未命中 {self.misses}"
+
+
+def add_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    为命令行解析器添加缓存相关参数
+
+    Args:
+        parser: 命令行解析器
+    """
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='禁用构建缓存，重新生成所有输出'
+    )
+
+    parser.add_argument(
+        '--explain-cache',
+        action='store_true',
+        help='输出缓存未命中的原因'
+    )
+
+
+def cache_from_args(namespace: str, args: argparse.Namespace) -> BuildCache:
+    """
+    根据命令行参数创建构建缓存
+
+    Args:
+        namespace: 缓存命名空间
+        args: 包含 no_cache 和 explain_cache 的命令行参数
+
+    Returns:
+        构建缓存实例
+    """
+    return BuildCache(namespace, enabled=not args.no_cache, explain=args.explain_cache)
+
+
+def _load_attribute(spec: str) -> Any:
+    """加载 'module:ATTR' 形式指定的对象"""
+    module_name, _, attribute = spec.partition(':')
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def parse_args() -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='Shell 脚本使用的构建缓存接口')
+    parser.add_argument('action', choices=['restore', 'store'], help='恢复或存储输出')
+    parser.add_argument('--namespace', required=True, help='缓存命名空间')
+    parser.add_argument('--entry', required=True, help='条目名称')
+    parser.add_argument('--base-dir', type=Path, required=True, help='输出文件的基准目录')
+    parser.add_argument('--source', type=Path, action='append', default=[], help='源文件（可重复）')
+    parser.add_argument('--param', action='append', default=[], help='影响输出的参数 KEY=VALUE（可重复）')
+    parser.add_argument('--theme-config', help='主题配置字典，格式为 module:ATTR')
+    parser.add_argument('--theme', help='主题名称，从主题配置字典中选取')
+    parser.add_argument('--tool', action='append', default=[], help='使用到的外部工具（可重复）')
+    parser.add_argument('--code', type=Path, action='append', default=[], help='生成器代码目录（可重复）')
+    parser.add_argument('files', nargs='*', type=Path, help='store 时要存入的输出文件')
+    add_cache_arguments(parser)
+    # 允许输出文件出现在选项之后
+    return parser.parse_intermixed_args()
+
+
+def main() -> int:
+    """
+    命令行入口
+
+    Returns:
+        restore: 命中返回 0，未命中返回 1；store: 成功返回 0
+    """
+    args = parse_args()
+    cache = cache_from_args(args.namespace, args)
+
+    theme = None
+    if args.theme_config:
+        theme = _load_attribute(args.theme_config)
+        if args.theme:
+            theme = theme[args.theme]
+
+    source = [fingerprint(path) for path in args.source]
+    params = dict(param.partition('=')[::2] for param in args.param)
+    key = cache.make_key(source, params, theme, args.tool, args.code)
+
+    if args.action == 'restore':
+        restored = cache.restore(args.entry, key, args.base_dir)
+        cache.flush()
+        return 0 if restored is not None else 1
+
+    cache.store(args.entry, key, args.base_dir, args.files)
+    cache.flush()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Graphviz 多主题渲染
+
+各主题的 DOT 只有颜色不同，布局（Graphviz 中最耗时、超线性增长的部分）
+完全相同。这里对第一个主题运行一次布局，得到带坐标的 DOT（-Tdot），
+其余主题把该结果中的颜色替换成自己的颜色后交给 `neato -n2` 直接输出，
+不再重新布局。
+
+颜色映射通过逐段比较两份 DOT 得到：去掉 #RRGGBB / #RRGGBBAA 颜色后
+其余文本必须完全一致，且同一个颜色总是映射到同一个颜色；否则说明结构
+不同，该主题退回完整渲染。
+
+Shell 脚本可以通过命令行使用（SVG 输出到 DOT 同名的 .svg 文件）：
+    python3 -m scripts.lib.common.graphviz --engine dot light/a.dot dark/a.dot
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from .utils import eprint
+
+# DOT 中的十六进制颜色（可带透明度）
+COLOR_RE = re.compile(r'#[0-9A-Fa-f]{6}(?:[0-9A-Fa-f]{2})?(?![0-9A-Za-z])')
+
+# 默认输出格式
+DEFAULT_FORMAT = 'svg:cairo'
+
+
+def color_mapping(source: str, target: str) -> Optional[Dict[str, str]]:
+    """
+    计算把 source 变为 target 的颜色映射
+
+    Args:
+        source: 基准 DOT 内容
+        target: 只有颜色不同的另一份 DOT 内容
+
+    Returns:
+        颜色映射；两份内容除颜色外不同，或同一颜色对应多个颜色时返回 None
+    """
+    if COLOR_RE.split(source) != COLOR_RE.split(target):
+        return None
+
+    mapping: Dict[str, str] = {}
+    for old, new in zip(COLOR_RE.findall(source), COLOR_RE.findall(target)):
+        if mapping.setdefault(old, new) != new:
+            return None
+    return mapping
+
+
+def recolor_dot(dot_content: str, mapping: Dict[str, str]) -> str:
+    """按映射一次性替换 DOT 中的颜色"""
+    return COLOR_RE.sub(lambda match: mapping.get(match.group(0), match.group(0)), dot_content)
+
+
+def _run(args: Sequence[str], dot_content: str) -> str:
+    result = subprocess.run(list(args), input=dot_content, capture_output=True, text=True, check=True)
+    return result.stdout
+
+
+def layout_dot(dot_content: str, engine: str = 'dot', args: Sequence[str] = ()) -> str:
+    """
+    运行一次布局，返回带坐标的 DOT
+
+    Raises:
+        OSError, subprocess.CalledProcessError: 布局失败
+    """
+    return _run([engine, *args, '-Tdot'], dot_content)
+
+
+def render_layout(positioned_dot: str, args: Sequence[str] = (), output_format: str = DEFAULT_FORMAT) -> str:
+    """
+    用 neato -n2 渲染带坐标的 DOT，保留其中的节点位置和边路径
+
+    Raises:
+        OSError, subprocess.CalledProcessError: 渲染失败
+    """
+    return _run(['neato', '-n2', *args, f'-T{output_format}'], positioned_dot)
+
+
+def render_variants(variants: List[str], engine: str = 'dot', layout_args: Sequence[str] = (),
+                    render_args: Optional[List[Sequence[str]]] = None,
+                    output_format: str = DEFAULT_FORMAT, layout: bool = True) -> List[str]:
+    """
+    渲染只有颜色不同的多份 DOT，只运行一次布局
+
+    影响布局的参数（如字体）放在 layout_args 中，布局和渲染时都会传入；
+    只影响颜色的参数放在 render_args 中，只在渲染时传入，不会写进布局结果。
+
+    Args:
+        variants: 各主题的 DOT 内容
+        engine: 布局引擎（dot、neato 等）
+        layout_args: 所有主题共用的命令行参数
+        render_args: 每个主题各自的命令行参数
+        output_format: 输出格式
+        layout: 为 False 时 DOT 中已经是以点为单位的坐标，直接用 neato -n2 渲染每份内容，不运行布局
+
+    Returns:
+        与 variants 顺序一致的渲染结果
+
+    Raises:
+        OSError, subprocess.CalledProcessError: 布局或渲染失败
+    """
+    if render_args is None:
+        render_args = [()] * len(variants)
+    if not variants:
+        return []
+
+    if not layout:
+        return [render_layout(variant, [*layout_args, *extra_args], output_format)
+                for variant, extra_args in zip(variants, render_args)]
+
+    positioned = layout_dot(variants[0], engine, layout_args)
+    outputs = []
+    for variant, extra_args in zip(variants, render_args):
+        mapping = color_mapping(variants[0], variant)
+        if mapping is None:
+            # 结构不同，无法复用布局
+            outputs.append(_run([engine, *layout_args, *extra_args, f'-T{output_format}'], variant))
+        else:
+            outputs.append(render_layout(recolor_dot(positioned, mapping), [*layout_args, *extra_args],
+                                         output_format))
+    return outputs
+
+
+def render_files(dot_files: List[Path], engine: str = 'dot', output_format: str = DEFAULT_FORMAT) -> List[Path]:
+    """
+    渲染只有颜色不同的多个 DOT 文件，输出到同名的 .svg 文件
+
+    Returns:
+        输出文件路径列表
+    """
+    variants = [path.read_text(encoding='utf-8') for path in dot_files]
+    svg_files = [path.with_suffix('.svg') for path in dot_files]
+    for svg_file, svg in zip(svg_files, render_variants(variants, engine, output_format=output_format)):
+        svg_file.write_text(svg, encoding='utf-8')
+    return svg_files
+
+
+def parse_args() -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='对只有颜色不同的多个 DOT 文件只布局一次并分别输出 SVG')
+    parser.add_argument('--engine', default='dot', help='布局引擎 (默认: dot)')
+    parser.add_argument('--format', default=DEFAULT_FORMAT, help=f'输出格式 (默认: {DEFAULT_FORMAT})')
+    parser.add_argument('files', nargs='+', type=Path, help='DOT 文件，第一个用于布局')
+    return parser.parse_args()
+
+
+def main() -> int:
+    """命令行入口"""
+    args = parse_args()
+    try:
+        render_files(args.files, args.engine, args.format)
+    except (OSError, subprocess.CalledProcessError) as e:
+        stderr = getattr(e, 'stderr', None)
+        eprint(f"[ERROR] Graphviz 渲染失败: {stderr.strip() if stderr else e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
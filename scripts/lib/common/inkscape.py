@@ -0,0 +1,401 @@
+"""
+Inkscape 常驻进程池模块
+
+维护若干个长驻的 `inkscape --shell` 会话，通过标准输入发送导出命令，
+把文本转换为路径。与每个 SVG 单独启动一次 Inkscape 相比，
+启动开销只在会话创建时支付一次。
+
+进程池负责：
+- 按需启动最多 N 个 shell 会话，并在多个调用方之间复用
+- 为每个任务设置超时，超时或崩溃的会话会被终止并在下次使用时重启
+- 每个会话处理一定数量的任务后主动重启，避免 Inkscape 内存持续增长
+- 会话启动失败后把进程池标记为不可用，此后的调用直接回退为单次启动，
+  不再为每个文件重复等待启动超时
+"""
+
+import atexit
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from .utils import eprint
+
+# Inkscape shell 模式的命令提示符，出现即表示上一条命令已执行完毕
+INKSCAPE_PROMPT = b"> "
+
+# 默认会话数量（Inkscape 内存占用较高，不宜过多）
+DEFAULT_POOL_SIZE = 2
+
+# 单个导出任务的默认超时时间（秒）
+DEFAULT_JOB_TIMEOUT = 60.0
+
+# 会话启动的超时时间（秒），首次启动需要加载字体缓存，可能较慢
+DEFAULT_STARTUP_TIMEOUT = 120.0
+
+# 单个会话处理多少个任务后重启
+DEFAULT_MAX_JOBS_PER_WORKER = 200
+
+
+class InkscapeError(RuntimeError):
+    """Inkscape 会话异常（启动失败、进程退出或命令超时）"""
+
+
+class _ShellWorker:
+    """
+    单个 `inkscape --shell` 会话
+
+    标准输出和标准错误合并后由后台线程持续读取，
+    主线程通过等待命令提示符判断命令是否执行完毕。
+    """
+
+    def __init__(self, executable: str):
+        self.executable = executable
+        self.process: Optional[subprocess.Popen] = None
+        self.jobs_done = 0
+        self._chunks: "queue.Queue[Optional[bytes]]" = queue.Queue()
+        self._reader_thread: Optional[threading.Thread] = None
+
+    @property
+    def alive(self) -> bool:
+        """会话进程是否仍在运行"""
+        return self.process is not None and self.process.poll() is None
+
+    def start(self, timeout: float) -> None:
+        """启动会话并等待首个命令提示符"""
+        self._chunks = queue.Queue()
+        self.process = subprocess.Popen(
+            [self.executable, "--shell"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+        self.jobs_done = 0
+        self._reader_thread = threading.Thread(target=self._read_output, daemon=True)
+        self._reader_thread.start()
+        self._wait_prompt(timeout)
+
+    def _read_output(self) -> None:
+        """后台线程：读取会话输出并放入队列，进程结束时放入 None"""
+        stdout = self.process.stdout
+        fd = stdout.fileno()
+        while True:
+            try:
+                chunk = os.read(fd, 65536)
+            except OSError:
+                chunk = b""
+            if not chunk:
+                self._chunks.put(None)
+                return
+            self._chunks.put(chunk)
+
+    def _wait_prompt(self, timeout: float) -> str:
+        """
+        等待命令提示符出现
+
+        Returns:
+            提示符之前的全部输出（用于错误诊断）
+
+        Raises:
+            InkscapeError: 超时或会话进程退出
+        """
+        deadline = time.monotonic() + timeout
+        buffer = b""
+        while not buffer.endswith(INKSCAPE_PROMPT):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise InkscapeError(f"Inkscape 命令超时（{timeout:.0f} 秒）")
+            try:
+                chunk = self._chunks.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if chunk is None:
+                raise InkscapeError(f"Inkscape 会话意外退出: {buffer.decode(errors='replace').strip()}")
+            buffer += chunk
+        return buffer[:-len(INKSCAPE_PROMPT)].decode(errors="replace")
+
+    def run(self, command: str, timeout: float) -> str:
+        """发送一条 shell 命令并等待执行完毕"""
+        self.process.stdin.write(command.encode() + b"\n")
+        self.process.stdin.flush()
+        output = self._wait_prompt(timeout)
+        self.jobs_done += 1
+        return output
+
+    def close(self) -> None:
+        """正常退出会话，无响应时强制终止"""
+        if not self.alive:
+            return
+        try:
+            self.process.stdin.write(b"quit\n")
+            self.process.stdin.flush()
+            self.process.stdin.close()
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.kill()
+
+    def kill(self) -> None:
+        """强制终止会话进程"""
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            self.process.kill()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            pass
+
+
+class InkscapePool:
+    """
+    Inkscape shell 会话池
+
+    线程安全：多个线程可以同时调用 text_to_path，
+    最多同时运行 size 个会话，其余调用方阻塞等待空闲会话。
+    """
+
+    def __init__(self,
+                 size: int = DEFAULT_POOL_SIZE,
+                 job_timeout: float = DEFAULT_JOB_TIMEOUT,
+                 executable: str = "inkscape",
+                 max_jobs_per_worker: int = DEFAULT_MAX_JOBS_PER_WORKER):
+        """
+        Args:
+            size: 最大会话数量
+            job_timeout: 单个任务超时时间（秒）
+            executable: Inkscape 可执行文件
+            max_jobs_per_worker: 单个会话处理多少个任务后重启
+        """
+        self.size = max(1, size)
+        self.job_timeout = job_timeout
+        self.executable = executable
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.restarts = 0
+        self.jobs = 0
+        # 会话启动失败的原因；非 None 时进程池不再尝试启动会话
+        self.unavailable: Optional[str] = None
+        self._idle: "queue.LifoQueue[_ShellWorker]" = queue.LifoQueue()
+        self._workers: List[_ShellWorker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(self.size):
+            worker = _ShellWorker(executable)
+            self._workers.append(worker)
+            self._idle.put(worker)
+
+    def __enter__(self) -> "InkscapePool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _ensure_started(self, worker: _ShellWorker) -> None:
+        """确保会话可用：未启动、已退出或达到任务上限时（重新）启动"""
+        if worker.alive and worker.jobs_done < self.max_jobs_per_worker:
+            return
+        if worker.process is not None:
+            worker.close()
+            with self._lock:
+                self.restarts += 1
+        worker.start(DEFAULT_STARTUP_TIMEOUT)
+
+    def text_to_path(self, svg_path: Path, output_path: Optional[Path] = None,
+                     timeout: Optional[float] = None) -> bool:
+        """
+        将 SVG 中的文本转换为路径并导出为纯 SVG
+
+        先导出到同目录的临时文件，成功后再替换目标文件，
+        因此失败时不会留下被截断的输出。
+
+        Args:
+            svg_path: 输入 SVG 文件路径
+            output_path: 输出 SVG 文件路径，默认覆盖输入文件
+            timeout: 本次任务的超时时间（秒），默认使用进程池配置
+
+        Returns:
+            转换是否成功
+
+        Raises:
+            InkscapeError: 进程池已关闭、会话无法启动或此前已启动失败
+        """
+        if self._closed:
+            raise InkscapeError("Inkscape 进程池已关闭")
+        if self.unavailable is not None:
+            raise InkscapeError(self.unavailable)
+
+        svg_path = Path(svg_path).resolve()
+        output_path = Path(output_path).resolve() if output_path else svg_path
+        job_timeout = timeout or self.job_timeout
+
+        fd, temp_name = tempfile.mkstemp(suffix=".svg", dir=output_path.parent)
+        os.close(fd)
+        temp_output = Path(temp_name)
+        temp_output.unlink()
+
+        # shell 命令以分号分隔动作，每个任务结束后关闭文档释放内存
+        command = "; ".join([
+            f"file-open:{svg_path}",
+            "export-text-to-path",
+            "export-plain-svg",
+            f"export-filename:{temp_output}",
+            "export-do",
+            "file-close",
+        ])
+
+        worker = self._idle.get()
+        try:
+            # 等待空闲会话期间其他调用方可能已经启动失败
+            if self.unavailable is not None:
+                raise InkscapeError(self.unavailable)
+
+            # 会话无法启动属于环境问题，记录后直接向上抛出由调用方决定是否回退
+            try:
+                self._ensure_started(worker)
+            except (InkscapeError, OSError) as e:
+                worker.kill()
+                self.unavailable = f"Inkscape 会话启动失败: {e}"
+                raise
+
+            try:
+                output = worker.run(command, job_timeout)
+            except (InkscapeError, BrokenPipeError) as e:
+                # 超时或崩溃的会话直接终止，下次取用时自动重启
+                worker.kill()
+                eprint(f"Inkscape 转换失败 {svg_path.name}: {e}")
+                return False
+
+            with self._lock:
+                self.jobs += 1
+
+            if not temp_output.is_file() or temp_output.stat().st_size == 0:
+                eprint(f"Inkscape 未生成输出文件 {svg_path.name}: {output.strip()}")
+                return False
+
+            os.replace(temp_output, output_path)
+            return True
+
+        finally:
+            temp_output.unlink(missing_ok=True)
+            self._idle.put(worker)
+
+    def close(self) -> None:
+        """关闭全部会话"""
+        self._closed = True
+        for worker in self._workers:
+            worker.close()
+
+
+# 进程内共享的会话池及其配置
+_shared_pool: Optional[InkscapePool] = None
+_shared_pool_lock = threading.Lock()
+_shared_pool_size = DEFAULT_POOL_SIZE
+_shared_job_timeout = DEFAULT_JOB_TIMEOUT
+
+
+def configure_inkscape_pool(size: Optional[int] = None, job_timeout: Optional[float] = None) -> None:
+    """
+    配置共享会话池的大小和任务超时
+
+    需在第一次转换之前调用；已创建的会话池会被关闭并按新配置重建。
+
+    Args:
+        size: 最大会话数量
+        job_timeout: 单个任务超时时间（秒）
+    """
+    global _shared_pool, _shared_pool_size, _shared_job_timeout
+    with _shared_pool_lock:
+        if size is not None:
+            _shared_pool_size = size
+        if job_timeout is not None:
+            _shared_job_timeout = job_timeout
+        if _shared_pool is not None:
+            _shared_pool.close()
+            _shared_pool = None
+
+
+def get_inkscape_pool() -> InkscapePool:
+    """获取进程内共享的 Inkscape 会话池（首次调用时创建，进程退出时自动关闭）"""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = InkscapePool(_shared_pool_size, _shared_job_timeout)
+        return _shared_pool
+
+
+def shutdown_inkscape_pool() -> None:
+    """关闭共享会话池"""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is not None:
+            _shared_pool.close()
+            _shared_pool = None
+
+
+atexit.register(shutdown_inkscape_pool)
+
+
+def _convert_once(svg_path: Path, output_path: Path) -> bool:
+    """单次启动 Inkscape 完成转换（会话池不可用时的回退路径）"""
+    try:
+        subprocess.run(
+            [
+                "inkscape",
+                "-T",  # --export-text-to-path
+                "-l",  # --export-plain-svg
+                f"--export-filename={output_path}",
+                str(svg_path),
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+            timeout=_shared_job_timeout,
+        )
+        return True
+    except subprocess.CalledProcessError as e:
+        eprint(f"Inkscape 转换失败: {e.stderr}")
+        return False
+    except subprocess.TimeoutExpired:
+        eprint(f"Inkscape 转换超时: {svg_path}")
+        return False
+
+
+def convert_text_to_paths(svg_path: Path, output_path: Optional[Path] = None) -> bool:
+    """
+    使用共享的 Inkscape 会话池将 SVG 中的文本转换为路径
+
+    路径中包含 shell 命令分隔符（分号）时，或会话无法启动时，
+    回退为单次启动 Inkscape 的方式；会话启动失败一次后，本进程内的后续调用都直接回退。
+
+    Args:
+        svg_path: SVG 文件路径
+        output_path: 输出文件路径，默认覆盖输入文件
+
+    Returns:
+        转换是否成功
+    """
+    output_path = output_path or svg_path
+
+    if not shutil.which("inkscape"):
+        eprint("错误: 未找到 Inkscape，请先安装 Inkscape")
+        eprint("macOS: brew install inkscape")
+        eprint("Ubuntu: sudo apt install inkscape")
+        return False
+
+    if ";" in str(Path(svg_path).resolve()) or ";" in str(Path(output_path).resolve()):
+        return _convert_once(svg_path, output_path)
+
+    pool = get_inkscape_pool()
+    if pool.unavailable is not None:
+        # 会话此前已启动失败（已经警告过），本进程内不再重试
+        return _convert_once(svg_path, output_path)
+
+    try:
+        return pool.text_to_path(svg_path, output_path)
+    except (InkscapeError, OSError) as e:
+        eprint(f"[WARN] Inkscape 会话池不可用，改为单次调用: {e}")
+        return _convert_once(svg_path, output_path)
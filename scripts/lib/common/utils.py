@@ -5,9 +5,28 @@
 """
 
 import os
+import shutil
+import sys
+import tempfile
 from typing import Optional, Tuple
 
 
+# 进程的 umask（os.umask 只能在设置的同时读取）
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def eprint(*args, **kwargs) -> None:
+    """
+    输出到标准错误流
+    
+    Args:
+        *args: 要打印的位置参数
+        **kwargs: 传递给 print() 的关键字参数
+    """
+    print(*args, file=sys.stderr, **kwargs)
+
+
 def find_project_root(marker_files: Tuple[str, ...] = ("docusaurus.config.ts", "package.json")) -> Optional[str]:
     """
     自动寻找项目根目录
@@ -51,6 +70,47 @@ def ensure_parent_dir(file_path: str) -> None:
         ensure_dir(parent_dir)
 
 
+def link_or_copy(source, target) -> None:
+    """
+    用硬链接把 source 放到 target（覆盖已有文件），跨文件系统等无法链接时复制
+
+    Args:
+        source: 源文件路径
+        target: 目标文件路径
+    """
+    if os.path.lexists(target):
+        os.unlink(target)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def write_text_atomic(path, text: str, encoding: str = 'utf-8') -> None:
+    """
+    先写同目录下的临时文件再替换 path
+
+    path 可能是其他文件的硬链接，直接覆盖会同时改写共享同一 inode 的文件；
+    替换只改变 path 指向的文件，其他链接保持原内容。
+
+    Args:
+        path: 目标文件路径
+        text: 文件内容
+        encoding: 文本编码
+    """
+    directory, name = os.path.split(os.fspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory or '.', prefix=f'.{name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding) as f:
+            f.write(text)
+        # mkstemp 创建的文件只有属主可读写，改为与普通写入相同的权限
+        os.chmod(temp_path, 0o666 & ~_UMASK)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
 def get_script_dir() -> str:
     """
     获取当前脚本所在目录
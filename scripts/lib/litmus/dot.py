@@ -4,50 +4,122 @@ DOT 文件处理模块
 处理 DOT 格式文件的解析和主题颜色应用
 """
 
+import hashlib
 import pathlib
 import re
-from typing import List
+from typing import Callable, Dict, List, Optional, Set, TextIO, Union
 
+from .dot_lexer import iter_dot_graphs, iter_tokens, quote, rewrite_attributes, unquote
 from .herd_config import get_theme_specific_dot_modifications
 
 
-def parse_dot_graphs(dot_file: pathlib.Path) -> List[List[str]]:
-    """解析 DOT 文件，提取所有图"""
-    digraph_re = re.compile(r"^\s*digraph\b")
-
-    text = dot_file.read_text(encoding="utf-8", errors="ignore").splitlines()
-    graphs = []
-    current_graph = []
-    depth = 0
-    collecting = False
-
-    for line in text:
-        if digraph_re.match(line):
-            if collecting and current_graph:
-                current_graph = []
-                depth = 0
-            collecting = True
-            current_graph = [line]
-            depth = line.count('{') - line.count('}')
+def parse_dot_graphs(dot_file: Union[pathlib.Path, TextIO]) -> List[List[str]]:
+    """解析 DOT 文件（或文本流），提取所有图"""
+    return [graph.splitlines() for graph in iter_dot_graphs(dot_file)]
+
+
+# DOT 关键字（不区分大小写），不参与节点 ID 的重新编号
+DOT_KEYWORDS = frozenset(["strict", "graph", "digraph", "node", "edge", "subgraph"])
+
+# 其后是图或子图名称的关键字（\G 会显示图名称，cluster 前缀有特殊含义）
+_NAMED_KEYWORDS = frozenset(["graph", "digraph", "subgraph"])
+
+# 标签中展开为节点名、边名或图名的转义序列
+_NAME_ESCAPES = ('\\N', '\\E', '\\T', '\\H', '\\G')
+
+
+def _node_id_indices(tokens: List[tuple]) -> List[int]:
+    """
+    节点 ID 在词法单元列表中的位置
+
+    属性名和属性值、关键字、图和子图名称以及 : 之后的端口和方位不是节点 ID。
+    """
+    indices = []
+    for index, (kind, text) in enumerate(tokens):
+        if kind not in ('id', 'string'):
             continue
+        previous = tokens[index - 1][1] if index > 0 else ''
+        following = tokens[index + 1][1] if index + 1 < len(tokens) else ''
+        if (previous not in ('=', ':') and following != '=' and text.lower() not in DOT_KEYWORDS
+                and previous.lower() not in _NAMED_KEYWORDS):
+            indices.append(index)
+    return indices
+
+
+def _labelled_nodes(tokens: List[tuple], node_indices: List[int]) -> Set[str]:
+    """
+    在节点语句中设置了 label 的节点名称
+
+    边语句中的属性属于边；节点默认属性（node [label=...]）不计入。
+    """
+    labelled = set()
+    for index in node_indices:
+        previous_kind = tokens[index - 1][0] if index > 0 else ''
+        position = index + 1
+        # 跳过端口和方位（a:p:n）
+        while position + 1 < len(tokens) and tokens[position][1] == ':':
+            position += 2
+        if previous_kind == 'edge' or (position < len(tokens) and tokens[position][0] == 'edge'):
+            continue
+        while position < len(tokens) and tokens[position][1] == '[':
+            position += 1
+            while position < len(tokens) and tokens[position][1] != ']':
+                if (tokens[position][1] == 'label' and position + 2 < len(tokens)
+                        and tokens[position + 1][1] == '='):
+                    labelled.add(unquote(tokens[index][1]))
+                position += 1
+            position += 1
+    return labelled
 
-        if collecting:
-            current_graph.append(line)
-            depth += line.count('{') - line.count('}')
-            if depth == 0:
-                graphs.append(current_graph)
-                current_graph = []
-                collecting = False
 
-    return graphs
+def canonical_graph_key(graph_content: str) -> str:
+    """
+    图的规范化哈希
 
+    去掉注释和字符串之外的空白后计算哈希。每个节点都在节点语句中设置了标签、
+    且没有标签使用 \\N、\\E 等展开名称的转义时，节点 ID 不会出现在渲染结果中
+    （svg:cairo 不输出节点 ID），此时按首次出现的顺序重新编号，只有节点命名不同的图哈希相同；
+    否则节点 ID 原样参与哈希。
+    属性名、属性值、关键字、图和子图名称以及端口和方位始终保持原样。
 
-def apply_theme_colors_to_dot(dot_content: str, theme: str) -> str:
-    """将主题颜色应用到 DOT 内容中，替换硬编码的颜色"""
+    Args:
+        graph_content: 单个图的 DOT 内容
+
+    Returns:
+        十六进制哈希
+    """
+    tokens = [(kind, text) for kind, text in iter_tokens(graph_content) if kind not in ('space', 'comment')]
+    canonical = [text for _, text in tokens]
+
+    node_indices = _node_id_indices(tokens)
+    uses_escapes = any(kind == 'string' and any(escape in text for escape in _NAME_ESCAPES)
+                       for kind, text in tokens)
+    if not uses_escapes:
+        labelled = _labelled_nodes(tokens, node_indices)
+        if all(unquote(tokens[index][1]) in labelled for index in node_indices):
+            names: Dict[str, str] = {}
+            for index in node_indices:
+                canonical[index] = names.setdefault(unquote(tokens[index][1]), f"n{len(names)}")
+
+    return hashlib.sha256('\0'.join(canonical).encode('utf-8')).hexdigest()
+
+
+# 值为颜色的属性
+COLOR_ATTRIBUTES = frozenset(["color", "fontcolor", "fillcolor", "bgcolor", "pencolor", "labelfontcolor"])
+
+# 主题改写关心的属性（颜色属性和可能包含 <font color="..."> 的 HTML 标签）
+THEMED_ATTRIBUTES = COLOR_ATTRIBUTES | {"label", "xlabel", "headlabel", "taillabel"}
+
+# HTML 标签中的字体颜色
+_HTML_FONT_COLOR_RE = re.compile(r'(<font color=")([^"]*)(">)')
+
+
+def get_theme_color_mappings(theme: str) -> Dict[str, str]:
+    """herd7 使用的硬编码颜色到主题颜色的映射"""
     theme_mods = get_theme_specific_dot_modifications(theme)
 
     # 定义颜色映射：硬编码颜色 -> 主题颜色
-    color_mappings = {
+    return {
         # herd7 默认使用的颜色映射到主题颜色
         "indigo": theme_mods['ppo_color'],  # PPO (Preserved Program Order), data, control, address 依赖统一使用 indigo
         "blue": theme_mods['co_color'],  # coherence (co)
@@ -58,29 +130,30 @@ def apply_theme_colors_to_dot(dot_content: str, theme: str) -> str:
         "black": theme_mods['edge_color'],  # 默认边颜色
     }
 
-    modified_content = dot_content
-
-    # 替换所有出现的颜色，包括组合颜色中的单个颜色
-    for old_color, new_color in color_mappings.items():
-        # 替换边颜色（color="..."）
-        modified_content = re.sub(
-            rf'color="{re.escape(old_color)}"',
-            f'color="{new_color}"',
-            modified_content
-        )
-
-        # 替换组合颜色中的单个颜色（如 color="blue:#ffa040:red" 中的各个颜色）
-        modified_content = re.sub(
-            rf'(?<=[\s":])({re.escape(old_color)})(?=[\s":])',
-            new_color,
-            modified_content
-        )
-
-        # 替换字体颜色（<font color="...">）
-        modified_content = re.sub(
-            rf'<font color="{re.escape(old_color)}">',
-            f'<font color="{new_color}">',
-            modified_content
-        )
-
-    return modified_content
+
+def theme_color_rewriter(theme: str) -> Callable[[str, str], Optional[str]]:
+    """
+    返回供 rewrite_attributes 使用的主题颜色改写函数
+
+    颜色属性中的每个颜色（包括 color="blue:#ffa040:red" 这样的组合颜色）
+    以及 HTML 标签中的 <font color="..."> 都按映射替换。
+    """
+    color_mappings = get_theme_color_mappings(theme)
+
+    def rewrite(key: str, value: str) -> Optional[str]:
+        if value.startswith('<'):
+            # 替换字体颜色（<font color="...">）
+            return _HTML_FONT_COLOR_RE.sub(
+                lambda m: m.group(1) + color_mappings.get(m.group(2), m.group(2)) + m.group(3), value)
+        if key in COLOR_ATTRIBUTES:
+            colors = unquote(value).split(':')
+            if any(color in color_mappings for color in colors):
+                return quote(':'.join(color_mappings.get(color, color) for color in colors))
+        return None
+
+    return rewrite
+
+
+def apply_theme_colors_to_dot(dot_content: str, theme: str) -> str:
+    """将主题颜色应用到 DOT 内容中，替换硬编码的颜色（一次遍历）"""
+    return rewrite_attributes(dot_content, theme_color_rewriter(theme), THEMED_ATTRIBUTES)
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+DOT 词法分析模块
+增量读取 DOT 文本，按需逐个产出其中的图，并以 key=value 单元的形式访问属性
+
+词法规则与 Graphviz 一致：引号字符串、HTML 字符串（可嵌套的 <...>）和注释
+作为整体跳过，其中的大括号和等号不影响图的边界和属性的识别。
+扫描由正则表达式驱动，只在大括号、注释和属性处回到 Python，
+普通文本和字符串的跳过都在正则引擎内完成。
+"""
+
+import functools
+import pathlib
+import re
+from typing import Callable, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Union
+
+# 每次从流中读取的字符数
+CHUNK_SIZE = 64 * 1024
+
+# 开始一个图的关键字（不区分大小写）
+GRAPH_KEYWORD_RE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|(?<![\w.])(?P<keyword>(?i:strict|digraph|graph))(?![\w.])',
+                              re.DOTALL)
+
+# 词法片段
+_STRING = r'"[^"\\]*+(?:\\.[^"\\]*+)*+"'
+_COMMENT = r'/\*.*?\*/|//[^\n]*|(?<![^\n])\#[^\n]*'
+_ID = r'[A-Za-z_\x80-\uffff][\w\x80-\uffff]*'
+_ID_OR_NUMERAL = r'-?[\w.\x80-\uffff]++'
+# 最多三层嵌套的 HTML 字符串，更深的嵌套由 _scan_html 处理
+_HTML = r'<(?:[^<>]++|<(?:[^<>]++|<[^<>]*+>)*+>)*+>'
+
+# 图边界扫描：run 一次吞下不含结构意义的文本（包括其中的字符串和 HTML 字符串），
+# 只在大括号、注释和无法整体匹配的字符处停下
+_SCAN_RE = re.compile(rf'''
+    (?P<run>(?:[^"<{{}}/\#]++|{_STRING}|{_HTML}|/(?=[^*/])|(?<=[^\n])\#)++)
+  | (?P<brace>[{{}}])
+  | (?P<comment>{_COMMENT})
+  | (?P<other>.)
+''', re.VERBOSE | re.DOTALL)
+
+_HTML_RE = re.compile(_HTML)
+
+
+class Attribute(NamedTuple):
+    """
+    属性单元
+
+    Attributes:
+        key: 属性名（已去掉引号）
+        value: 值的原文（含引号或尖括号）
+        start: 值在文本中的起始位置
+        end: 值在文本中的结束位置
+    """
+    key: str
+    value: str
+    start: int
+    end: int
+
+
+def _scan_html(text: str, pos: int) -> int:
+    """返回从 pos 开始的 HTML 字符串的结束位置，未结束时返回 -1"""
+    match = _HTML_RE.match(text, pos)
+    if match:
+        return match.end()
+
+    depth = 0
+    for index in range(pos, len(text)):
+        char = text[index]
+        if char == '<':
+            depth += 1
+        elif char == '>':
+            depth -= 1
+            if depth == 0:
+                return index + 1
+    return -1
+
+
+def scan(chunks: Iterable[str]) -> Iterator[tuple]:
+    """
+    把分块到来的 DOT 文本切分为结构片段
+
+    片段类型为 run（普通文本，包括其中完整的字符串和 HTML 字符串）、
+    brace（大括号）、comment（注释）、other（其他单个字符）。
+    跨块的字符串、HTML 字符串和注释会等到下一块到来后再产出，
+    因此可以直接处理文件或子进程输出流；拼接所有片段即得到原文。
+
+    Args:
+        chunks: 文本块序列
+
+    Yields:
+        (类型, 原文)
+    """
+    chunks = iter(chunks)
+    buffer = ''
+    pos = 0
+    eof = False
+    while True:
+        while pos < len(buffer):
+            char = buffer[pos]
+            if char == '<':
+                # 超过三层嵌套的 HTML 字符串
+                end = _scan_html(buffer, pos)
+                if end < 0 and not eof:
+                    break
+                end = len(buffer) if end < 0 else end
+                yield 'run', buffer[pos:end]
+                pos = end
+                continue
+
+            match = _SCAN_RE.match(buffer, pos)
+            kind = match.lastgroup
+            if not eof:
+                # 可能被截断的文本（其中的关键字）、字符串或注释，等待更多输入
+                if kind == 'other' and char in '"/#':
+                    break
+                if kind in ('run', 'comment') and match.end() == len(buffer):
+                    break
+            yield kind, match.group()
+            pos = match.end()
+
+        if eof:
+            return
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+        else:
+            # 丢弃已处理的部分，补充下一块
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+
+def _read_chunks(stream: TextIO) -> Iterator[str]:
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_dot_graphs(source: Union[str, pathlib.Path, TextIO]) -> Iterator[str]:
+    """
+    逐个产出 DOT 源中的图
+
+    Args:
+        source: DOT 文件路径或文本流（如子进程的标准输出）
+
+    Yields:
+        每个图的完整文本（从 digraph/graph/strict 关键字到匹配的右大括号）
+    """
+    if isinstance(source, (str, pathlib.Path)):
+        with open(source, encoding='utf-8', errors='ignore') as stream:
+            yield from iter_dot_graphs(stream)
+        return
+
+    current: List[str] = []
+    depth = 0
+    for kind, text in scan(_read_chunks(source)):
+        if not current:
+            # 图之外只寻找开始关键字
+            if kind != 'run':
+                continue
+            keyword = next((m for m in GRAPH_KEYWORD_RE.finditer(text) if m.group('keyword')), None)
+            if keyword is None:
+                continue
+            text = text[keyword.start():]
+            depth = 0
+
+        current.append(text)
+        if kind == 'brace':
+            depth += 1 if text == '{' else -1
+            if depth == 0:
+                yield ''.join(current)
+                current = []
+
+
+@functools.lru_cache(maxsize=None)
+def _attribute_re(keys: Optional[FrozenSet[str]]) -> 're.Pattern':
+    """
+    属性扫描的正则表达式
+
+    skip 一次吞下两个关心的属性之间的所有内容（其他属性、字符串、HTML 字符串和注释），
+    指定 keys 时只在这些属性处回到 Python。
+    """
+    if keys:
+        names = '|'.join(re.escape(key) for key in sorted(keys, key=len, reverse=True))
+        key_pattern = rf'(?<![\w.\x80-\uffff])(?:{names})(?![\w\x80-\uffff])|"(?:{names})"'
+        word = rf'(?!(?:{names})\s*+=)[\w.\x80-\uffff]++'
+        string = rf'(?!"(?:{names})"\s*+=){_STRING}'
+    else:
+        key_pattern = rf'(?<![\w.\x80-\uffff]){_ID}|{_STRING}'
+        word = r'(?![\w.\x80-\uffff]++\s*+=)[\w.\x80-\uffff]++'
+        string = rf'{_STRING}(?!\s*+=)'
+    return re.compile(rf'''
+        (?P<key>{key_pattern})\s*=\s*(?P<value>{_STRING}|<|{_ID_OR_NUMERAL})
+      | (?P<skip>(?:[^"<\w.\x80-\uffff/\#]++|{word}|{string}|{_COMMENT}|[/\#]|{_HTML})++)
+      | (?P<html><)
+    ''', re.VERBOSE | re.DOTALL)
+
+
+def _attribute_spans(dot_content: str, keys: Optional[Iterable[str]]) -> Iterator[tuple]:
+    """逐个产出属性的 (属性名原文, 值起始位置, 值结束位置)"""
+    pattern = _attribute_re(frozenset(keys) if keys is not None else None)
+    search = pattern.search
+    pos = 0
+    while match := search(dot_content, pos):
+        key = match.group('key')
+        if key is None:
+            if match.group('html') is not None:
+                # 超过三层嵌套的 HTML 字符串，其中的 <font color="..."> 不是属性
+                end = _scan_html(dot_content, match.start())
+                pos = len(dot_content) if end < 0 else end
+            else:
+                pos = match.end()
+            continue
+
+        start, end = match.span('value')
+        if dot_content[start] == '<':
+            end = _scan_html(dot_content, start)
+            end = len(dot_content) if end < 0 else end
+        yield key, start, end
+        pos = end
+
+
+def iter_attributes(dot_content: str, keys: Optional[Iterable[str]] = None) -> Iterator[Attribute]:
+    """
+    逐个产出 DOT 内容中的属性（属性列表中的属性和图级别的赋值语句）
+
+    Args:
+        dot_content: DOT 内容
+        keys: 只产出这些属性，为 None 时产出所有属性
+
+    Yields:
+        属性单元
+    """
+    for key, start, end in _attribute_spans(dot_content, keys):
+        yield Attribute(unquote(key), dot_content[start:end], start, end)
+
+
+# 单个词法单元：空白、注释、字符串、HTML 字符串的开头、标识符或数字、边运算符、其他单个字符
+_TOKEN_RE = re.compile(rf'''
+    (?P<space>\s+)
+  | (?P<comment>{_COMMENT})
+  | (?P<string>{_STRING})
+  | (?P<html><)
+  | (?P<id>{_ID_OR_NUMERAL})
+  | (?P<edge>--|->)
+  | (?P<punct>.)
+''', re.VERBOSE | re.DOTALL)
+
+
+def iter_tokens(dot_content: str) -> Iterator[tuple]:
+    """
+    逐个产出 DOT 内容的词法单元
+
+    类型为 space、comment、string、html、id、edge、punct；
+    拼接所有单元即得到原文。
+
+    Yields:
+        (类型, 原文)
+    """
+    pos = 0
+    match_token = _TOKEN_RE.match
+    while pos < len(dot_content):
+        match = match_token(dot_content, pos)
+        kind = match.lastgroup
+        end = match.end()
+        if kind == 'html':
+            end = _scan_html(dot_content, pos)
+            end = len(dot_content) if end < 0 else end
+        yield kind, dot_content[pos:end]
+        pos = end
+
+
+def unquote(text: str) -> str:
+    """去掉属性值两侧的引号（标识符和 HTML 字符串原样返回）"""
+    if len(text) >= 2 and text[0] == '"' and text[-1] == '"':
+        return text[1:-1].replace('\\"', '"')
+    return text
+
+
+def quote(value: str) -> str:
+    """把值写成 DOT 引号字符串"""
+    return '"' + value.replace('"', '\\"') + '"'
+
+
+def rewrite_attributes(dot_content: str, rewrite: Callable[[str, str], Optional[str]],
+                       keys: Optional[Iterable[str]] = None) -> str:
+    """
+    一次遍历改写属性值
+
+    对每个属性调用 rewrite(key, value)，value 是值的原文（含引号或尖括号）。
+
+    Args:
+        dot_content: DOT 内容
+        rewrite: 返回新的值原文，返回 None 表示不修改
+        keys: 只改写这些属性，为 None 时对所有属性调用 rewrite
+
+    Returns:
+        改写后的 DOT 内容
+    """
+    out: List[str] = []
+    pos = 0
+    for key, start, end in _attribute_spans(dot_content, keys):
+        if key[0] == '"':
+            key = unquote(key)
+        new_value = rewrite(key, dot_content[start:end])
+        if new_value is not None:
+            out.append(dot_content[pos:start])
+            out.append(new_value)
+            pos = end
+    out.append(dot_content[pos:])
+    return ''.join(out)
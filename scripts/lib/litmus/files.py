@@ -7,6 +7,7 @@
 import pathlib
 from typing import List, Tuple
 
+from scripts.lib.common.asset_index import get_asset_index
 from scripts.lib.common.utils import find_project_root
 
 
@@ -25,19 +26,14 @@ def find_litmus_files(themes: List[str]) -> List[Tuple[pathlib.Path, List[Tuple[
 
     litmus_files = []
 
-    # 递归查找所有 _assets/litmus 目录
-    for litmus_dir in docs_dir.rglob("_assets/litmus"):
-        if not litmus_dir.is_dir():
-            continue
+    # 从共享的资产索引中取出所有 docs/**/_assets/litmus/*.litmus 文件
+    for litmus_file in get_asset_index().files('litmus'):
+        # 为每个主题创建对应的输出目录
+        theme_dirs = []
+        for theme in themes:
+            images_theme_dir = litmus_file.parent.parent / "images" / theme
+            theme_dirs.append((theme, images_theme_dir))
 
-        # 查找该目录下的所有 .litmus 文件
-        for litmus_file in litmus_dir.glob("*.litmus"):
-            # 为每个主题创建对应的输出目录
-            theme_dirs = []
-            for theme in themes:
-                images_theme_dir = litmus_dir.parent / "images" / theme
-                theme_dirs.append((theme, images_theme_dir))
-
-            litmus_files.append((litmus_file, theme_dirs))
+        litmus_files.append((litmus_file, theme_dirs))
 
     return litmus_files
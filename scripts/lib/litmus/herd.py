@@ -4,17 +4,62 @@ Herd7 工具调用模块
 封装 herd7 工具的运行和配置逻辑
 """
 
+import os
 import pathlib
 import subprocess
 import tempfile
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
 
+from scripts.lib.common.cache import BuildCache, CacheKey
 from scripts.lib.common.utils import ensure_dir
+from .dot_lexer import iter_dot_graphs
 from .herd_config import build_herd_args
+from .report import HerdReport, StageRecord, litmus_test_name, parse_herd_output, run_process, wait_process
 from .utils import eprint
 
+# 默认每个 herd7 进程处理的 litmus 文件数
+DEFAULT_HERD_BATCH = 16
 
-def run_herd(lit: pathlib.Path, theme: str = "light", output_dir: pathlib.Path = None) -> pathlib.Path:
-    """运行 herd7 生成指定主题的 DOT 文件"""
+
+def herd_cache_key(cache: BuildCache, lit: pathlib.Path, theme: str = "light") -> CacheKey:
+    """
+    herd7 输出的缓存键：litmus 文件内容、herd7 参数和 herd7 版本
+
+    输出目录和输入路径不影响 DOT 内容，不参与缓存键计算。
+    """
+    params = {'herd_args': build_herd_args(lit, theme)[:-1]}
+    return cache.make_key(lit, params, None, ['herd7'])
+
+
+def record_herd_run(report: Optional[HerdReport], lit: pathlib.Path, wall_time: float,
+                    max_rss_kb: Optional[int], stdout: str, dot_path: Optional[pathlib.Path] = None,
+                    batch: int = 1) -> None:
+    """把一次 herd7 运行的统计加入报告（report 为 None 时什么都不做）"""
+    if report is None:
+        return
+    info = parse_herd_output(stdout).get(litmus_test_name(lit), {})
+    record = StageRecord(str(lit), 'herd7', wall_time, max_rss_kb, info.get('executions'), batch=batch)
+    if batch > 1 and 'time' in info:
+        # 整批只有一个进程，单个测试的耗时使用 herd7 自己的统计
+        record.wall_time = info['time']
+    if dot_path is not None and dot_path.is_file():
+        record.dot_bytes = dot_path.stat().st_size
+        record.graphs = sum(1 for _ in iter_dot_graphs(dot_path))
+    report.add(record)
+
+
+def run_herd(lit: pathlib.Path, theme: str = "light", output_dir: pathlib.Path = None,
+             cache: Optional[BuildCache] = None, report: Optional[HerdReport] = None) -> pathlib.Path:
+    """
+    运行 herd7 生成 DOT 文件
+
+    herd7 的参数不包含颜色，输出与主题无关，每个 litmus 文件只需运行一次；
+    theme 仅传给 build_herd_args 以保持接口不变。
+    指定 cache 时，litmus 文件、参数和 herd7 版本都未变化则直接从缓存恢复 DOT 文件。
+    指定 report 时记录耗时、峰值内存、执行数和 DOT 输出大小。
+    """
     # 如果指定了输出目录，使用它，否则使用临时目录
     if output_dir:
         ensure_dir(str(output_dir))
@@ -25,25 +70,232 @@ def run_herd(lit: pathlib.Path, theme: str = "light", output_dir: pathlib.Path =
         work_dir = pathlib.Path(tempfile.mkdtemp())
         dot_path = work_dir / (lit.stem + ".dot")
 
+    # herd7 总是生成以原始文件名命名的 DOT 文件
+    original_dot = work_dir / (lit.stem + ".dot")
+
+    key = None
+    if cache is not None:
+        key = herd_cache_key(cache, lit, theme)
+        if cache.restore(str(lit), key, work_dir) is not None:
+            eprint(f"[INFO] {lit.name}: 从缓存恢复 herd7 输出")
+            return original_dot
+
     # 使用新的配置生成器构建参数
     herd_args = build_herd_args(lit, theme, work_dir)
 
-    eprint(f"[INFO] 处理 {lit.name} ({theme} 主题)")
-    try:
-        subprocess.run(herd_args, check=True, capture_output=True)
-    except subprocess.CalledProcessError as e:
-        eprint(f"[WARN] herd7 执行失败 {lit.name} ({theme}): {e}")
+    eprint(f"[INFO] 处理 {lit.name}")
+    result = run_process(herd_args)
+    record_herd_run(report, lit, result.wall_time, result.max_rss_kb, result.stdout, original_dot)
+    if result.returncode != 0:
+        eprint(f"[WARN] herd7 执行失败 {lit.name}: {subprocess.CalledProcessError(result.returncode, herd_args)}")
         return None
 
-    # herd7 总是生成以原始文件名命名的 DOT 文件
-    original_dot = work_dir / (lit.stem + ".dot")
     if not original_dot.is_file():
         eprint(f"[WARN] herd7 未生成 DOT 文件: {original_dot}")
         return None
 
+    if cache is not None:
+        cache.store(str(lit), key, work_dir, [original_dot])
+
     # 如果需要重命名（包含主题信息），则重命名
     if output_dir and dot_path != original_dot:
         original_dot.rename(dot_path)
         return dot_path
     else:
         return original_dot
+
+
+def run_herd_batch(lits: List[pathlib.Path], output_dir: pathlib.Path, theme: str = "light",
+                   cache: Optional[BuildCache] = None,
+                   report: Optional[HerdReport] = None) -> Dict[pathlib.Path, Optional[pathlib.Path]]:
+    """
+    用一个 herd7 进程处理多个 litmus 文件，所有 DOT 文件输出到同一个目录
+
+    herd7 每次启动都要初始化运行时并加载 .cat 模型，一次传入多个文件
+    可以只付出一次启动开销。herd7 按输入文件名把 DOT 写到 -o 目录中，
+    因此同一批中的文件名（不含扩展名）必须互不相同。
+    整批执行失败时（例如其中一个测试出错）逐个重新运行，找出失败的文件。
+
+    Args:
+        lits: litmus 文件列表（文件名互不相同）
+        output_dir: 共用的输出目录
+        theme: 传给 build_herd_args 的主题
+        cache: herd7 输出缓存，命中的文件不再传给 herd7
+        report: 运行统计（批量运行时峰值内存为整批进程的值）
+
+    Returns:
+        litmus 文件到 DOT 文件的映射，失败的文件映射为 None
+    """
+    ensure_dir(str(output_dir))
+    results: Dict[pathlib.Path, Optional[pathlib.Path]] = {}
+
+    keys = {}
+    pending = []
+    for lit in lits:
+        dot_path = output_dir / (lit.stem + ".dot")
+        if cache is not None:
+            keys[lit] = herd_cache_key(cache, lit, theme)
+            if cache.restore(str(lit), keys[lit], output_dir) is not None:
+                results[lit] = dot_path
+                continue
+        pending.append(lit)
+
+    if pending:
+        eprint(f"[INFO] 批量处理 {len(pending)} 个 litmus 文件")
+        # 同一批文件共用参数，只替换输入文件部分
+        herd_args = build_herd_args(pending[0], theme, output_dir)[:-1] + [str(lit) for lit in pending]
+        result = run_process(herd_args)
+        if result.returncode != 0:
+            error = subprocess.CalledProcessError(result.returncode, herd_args)
+            eprint(f"[WARN] herd7 批量执行失败，逐个重试: {error}")
+            for lit in pending:
+                results[lit] = run_herd(lit, theme, output_dir, cache, report)
+            return results
+
+        for lit in pending:
+            dot_path = output_dir / (lit.stem + ".dot")
+            record_herd_run(report, lit, result.wall_time / len(pending), result.max_rss_kb, result.stdout,
+                            dot_path, len(pending))
+            if not dot_path.is_file():
+                eprint(f"[WARN] herd7 未生成 DOT 文件: {dot_path}")
+                results[lit] = None
+                continue
+            if cache is not None:
+                cache.store(str(lit), keys[lit], output_dir, [dot_path])
+            results[lit] = dot_path
+
+    return results
+
+
+def stream_herd(lit: pathlib.Path, theme: str = "light", report: Optional[HerdReport] = None) -> Iterator[str]:
+    """
+    运行 herd7 并从命名管道逐个读取它输出的图，不写中间 DOT 文件
+
+    herd7 只能把 DOT 写到 -o 目录中的 <stem>.dot，这里预先把该路径创建为命名管道，
+    herd7 写出的内容直接进入本进程，每读完一个图就立即产出。
+    指定 report 时，herd7 退出后记录耗时、峰值内存、执行数和读到的图。
+
+    Yields:
+        每个图的 DOT 文本
+
+    Raises:
+        OSError: 无法创建命名管道或启动 herd7
+        subprocess.CalledProcessError: herd7 执行失败
+    """
+    with tempfile.TemporaryDirectory(prefix='herd7-') as work_dir:
+        fifo = pathlib.Path(work_dir) / (lit.stem + ".dot")
+        os.mkfifo(fifo)
+
+        # 先非阻塞地打开读端，再自己持有一个写端：herd7 打开、写入、关闭管道时读端不会提前读到 EOF，
+        # herd7 退出（包括没有生成 DOT 就退出）后关闭这个写端即可结束读取
+        read_fd = os.open(fifo, os.O_RDONLY | os.O_NONBLOCK)
+        os.set_blocking(read_fd, True)
+        write_fd = os.open(fifo, os.O_WRONLY)
+        # 输出写入临时文件，等待进程时不需要同时读取管道
+        output = tempfile.TemporaryFile(dir=work_dir)
+        start = time.perf_counter()
+        try:
+            process = subprocess.Popen(build_herd_args(lit, theme, pathlib.Path(work_dir)),
+                                       stdin=subprocess.DEVNULL, stdout=output, stderr=subprocess.STDOUT)
+        except OSError:
+            output.close()
+            os.close(write_fd)
+            os.close(read_fd)
+            raise
+
+        usage = {}
+
+        def wait() -> None:
+            try:
+                usage['max_rss_kb'] = wait_process(process)
+                usage['wall_time'] = time.perf_counter() - start
+            finally:
+                os.close(write_fd)
+
+        waiter = threading.Thread(target=wait, daemon=True)
+        waiter.start()
+
+        eprint(f"[INFO] 处理 {lit.name}")
+        graphs = 0
+        dot_bytes = 0
+        with output, os.fdopen(read_fd, encoding='utf-8', errors='ignore') as stream:
+            for graph in iter_dot_graphs(stream):
+                graphs += 1
+                dot_bytes += len(graph) + 1
+                yield graph
+            waiter.join()
+
+            output.seek(0)
+            stdout = output.read().decode('utf-8', errors='ignore')
+
+        if report is not None:
+            info = parse_herd_output(stdout).get(litmus_test_name(lit), {})
+            report.add(StageRecord(str(lit), 'herd7', usage.get('wall_time', 0.0), usage.get('max_rss_kb'),
+                                   info.get('executions'), graphs, dot_bytes))
+
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, process.args, output=stdout)
+
+
+def iter_herd_graphs(lit: pathlib.Path, theme: str = "light", cache: Optional[BuildCache] = None,
+                     report: Optional[HerdReport] = None) -> Iterator[str]:
+    """
+    逐个产出 litmus 文件经 herd7 生成的图
+
+    缓存命中时从缓存读取；否则通过 stream_herd 从管道读取，
+    完整成功后把所有图写入缓存。不支持命名管道的平台退回 run_herd。
+
+    Yields:
+        每个图的 DOT 文本
+
+    Raises:
+        OSError, subprocess.CalledProcessError: herd7 执行失败
+    """
+    with tempfile.TemporaryDirectory(prefix='herd7-') as work_dir:
+        work_dir = pathlib.Path(work_dir)
+        dot_path = work_dir / (lit.stem + ".dot")
+
+        key = None
+        if cache is not None:
+            key = herd_cache_key(cache, lit, theme)
+            if cache.restore(str(lit), key, work_dir) is not None:
+                eprint(f"[INFO] {lit.name}: 从缓存恢复 herd7 输出")
+                yield from iter_dot_graphs(dot_path)
+                return
+
+        if not hasattr(os, 'mkfifo'):
+            if run_herd(lit, theme, work_dir, cache, report) is None:
+                raise OSError(f"herd7 未生成 DOT 文件: {lit.name}")
+            yield from iter_dot_graphs(dot_path)
+            return
+
+        graphs = []
+        for graph in stream_herd(lit, theme, report):
+            graphs.append(graph)
+            yield graph
+
+        if cache is not None and graphs:
+            dot_path.write_text('\n'.join(graphs) + '\n', encoding='utf-8')
+            cache.store(str(lit), key, work_dir, [dot_path])
+
+
+def split_herd_batches(lits: List[pathlib.Path], batch_size: int) -> List[List[pathlib.Path]]:
+    """
+    把 litmus 文件分成若干批，每批最多 batch_size 个且文件名互不相同
+
+    Args:
+        lits: litmus 文件列表
+        batch_size: 每批的最大文件数
+
+    Returns:
+        批次列表
+    """
+    batches: List[List[pathlib.Path]] = []
+    for lit in lits:
+        for batch in batches:
+            if len(batch) < batch_size and all(other.stem != lit.stem for other in batch):
+                batch.append(lit)
+                break
+        else:
+            batches.append([lit])
+    return batches
@@ -7,17 +7,28 @@ Litmus 测试 SVG 生成器
 import argparse
 import pathlib
 import shutil
+import subprocess
 import sys
-from typing import List, Tuple
-
-from scripts.lib.common.utils import ensure_dir
-from .colors import THEME_CHOICES
-from .dot import parse_dot_graphs, apply_theme_colors_to_dot
+import tempfile
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from scripts.lib.common.cache import BuildCache, CacheKey, add_cache_arguments, cache_from_args
+from scripts.lib.common.utils import ensure_dir, link_or_copy
+from .colors import LITMUS_THEME_COLORS, THEME_CHOICES
+from .dot import apply_theme_colors_to_dot, canonical_graph_key
+from .dot_lexer import iter_dot_graphs
 from .files import find_litmus_files
-from .herd import run_herd
-from .svg import run_neato
+from .herd import DEFAULT_HERD_BATCH, iter_herd_graphs, run_herd_batch, split_herd_batches
+from .herd_config import build_herd_args
+from .report import DEFAULT_SLOWEST, HerdReport, StageRecord
+from .svg import DEFAULT_NEATO_JOBS, RenderedGraphs, run_neato_many
 from .utils import eprint
 
+# 影响输出的外部工具和生成器代码目录（参与缓存键计算）
+CACHE_TOOLS = ['herd7', 'neato']
+CACHE_CODE_DIRS = [pathlib.Path(__file__).parent, pathlib.Path(__file__).parent.parent / 'common']
+
 
 def parse_args():
     """解析命令行参数"""
@@ -44,13 +55,55 @@ def parse_args():
         help='指定要生成的主题 (默认: all - 生成所有主题)'
     )
 
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=DEFAULT_NEATO_JOBS,
+        help=f'并行运行的 neato 进程数 (默认: {DEFAULT_NEATO_JOBS})'
+    )
+
+    parser.add_argument(
+        '--herd-batch',
+        type=int,
+        default=DEFAULT_HERD_BATCH,
+        help=f'每个 herd7 进程处理的 litmus 文件数，1 表示逐个运行 (默认: {DEFAULT_HERD_BATCH})'
+    )
+
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='逐个运行 herd7 并从管道读取输出，图到达后立即渲染，不写中间 DOT 文件（忽略 --herd-batch）'
+    )
+
+    parser.add_argument(
+        '--report',
+        type=pathlib.Path,
+        help='把每个测试各阶段的耗时、峰值内存、执行数和 DOT 大小写入 JSON 文件'
+    )
+
+    parser.add_argument(
+        '--slowest',
+        type=int,
+        default=DEFAULT_SLOWEST,
+        help=f'结束时输出最慢的 N 个测试，0 表示不输出 (默认: {DEFAULT_SLOWEST})'
+    )
+
+    parser.add_argument(
+        '--keep-dot',
+        action='store_true',
+        help='在输出目录中保留完整的 DOT 文件和每个图的 DOT 文件，便于调试'
+    )
+
+    add_cache_arguments(parser)
+
     return parser.parse_args()
 
 
 def usage():
     """显示使用说明"""
     eprint("""
-用法: scripts/lib/litmus/main.py [--theme THEME]
+用法: scripts/lib/litmus/main.py [--theme THEME] [--jobs N] [--herd-batch N] [--stream] [--keep-dot]
+                                 [--report FILE] [--slowest N] [--no-cache] [--explain-cache]
   - 自动扫描 docs/ 目录下的所有 _assets/litmus/ 文件夹
   - 为每个 .litmus 文件生成 SVG 图形到对应的主题目录
   - 生成的目录结构:
@@ -59,6 +112,14 @@ def usage():
 
 参数:
   --theme {light,dark,all}  指定主题 (默认: all)
+  --jobs, -j N              并行运行的 neato 进程数 (默认: CPU 核心数)
+  --herd-batch N            每个 herd7 进程处理的 litmus 文件数 (默认: 16)
+  --stream                  从管道读取 herd7 输出，不写中间 DOT 文件
+  --keep-dot                保留 DOT 文件用于调试
+  --report FILE             把每个测试的 herd7/neato 统计写入 JSON 文件
+  --slowest N               输出最慢的 N 个测试 (默认: 10)
+  --no-cache                禁用构建缓存，重新生成所有输出
+  --explain-cache           输出缓存未命中的原因
 
 示例: 
   scripts/lib/litmus/main.py --theme light
@@ -78,51 +139,185 @@ def which_or_fail(name: str, fatal: bool = True) -> bool:
         return False
 
 
-def process_litmus_file(lit_file: pathlib.Path, theme_dirs: List[Tuple[str, pathlib.Path]]) -> int:
-    """处理单个 litmus 文件，为所有指定主题生成 SVG"""
-    total_exported = 0
+def restore_litmus_outputs(lit_file: pathlib.Path, theme_dirs: List[Tuple[str, pathlib.Path]],
+                           cache: BuildCache,
+                           keep_dot: bool = False) -> Tuple[int, List[Tuple[str, pathlib.Path, str, CacheKey]]]:
+    """
+    从缓存恢复 litmus 文件各主题的输出
 
+    Returns:
+        (恢复的 SVG 数量, 需要重新生成的主题列表 [(主题, 输出目录, 缓存条目, 缓存键), ...])
+    """
+    total_exported = 0
+    pending = []
     for theme, images_output_dir in theme_dirs:
         # 为当前 litmus 文件和主题创建子目录
         test_output_dir = images_output_dir / lit_file.stem
         ensure_dir(str(test_output_dir))
 
-        # 为每个主题运行 herd7，保留 DOT 文件到输出目录
-        dot_file = run_herd(lit_file, theme, test_output_dir)
-        if not dot_file:
+        # herd7 参数中去掉输入路径，只保留影响输出的选项
+        params = {'herd_args': build_herd_args(lit_file, theme)[:-1], 'keep_dot': keep_dot}
+        key = cache.make_key(lit_file, params, LITMUS_THEME_COLORS[theme], CACHE_TOOLS, CACHE_CODE_DIRS)
+        entry = f"{lit_file}:{theme}"
+        restored = cache.restore(entry, key, test_output_dir)
+        if restored is not None:
+            exported = sum(1 for path in restored if path.suffix == '.svg')
+            eprint(f"[INFO] {lit_file.name} ({theme}): 从缓存恢复 {exported} 个 SVG -> {test_output_dir}")
+            total_exported += exported
             continue
 
-        graphs = parse_dot_graphs(dot_file)
-        if not graphs:
-            eprint(f"[WARN] 未找到图形数据: {lit_file.name} ({theme})")
-            continue
+        pending.append((theme, test_output_dir, entry, key))
+
+    return total_exported, pending
 
-        exported = 0
-        for i, graph_lines in enumerate(graphs, 1):
-            if not graph_lines:
-                continue
 
-            # 保持原始图形内容
-            graph_content = "\n".join(graph_lines)
+def process_litmus_file(lit_file: pathlib.Path, theme_dirs: List[Tuple[str, pathlib.Path]],
+                        cache: BuildCache, jobs: int = 1, herd_cache: Optional[BuildCache] = None,
+                        keep_dot: bool = False, report: Optional[HerdReport] = None,
+                        rendered: Optional[RenderedGraphs] = None) -> int:
+    """
+    处理单个 litmus 文件，为所有指定主题生成 SVG（未变化的主题从缓存恢复）
+
+    herd7 的输出与主题无关（颜色在 DOT 阶段才应用），因此每个文件只运行
+    一次 herd7，从管道读出的图直接分发给所有需要重新生成的主题。
+    herd_cache 缓存 herd7 的 DOT 输出，SVG 需要重新生成时也不必重新运行 herd7。
+    rendered 在多个测试之间共享时，与其他测试相同的图直接复用已渲染的 SVG。
+    """
+    total_exported, pending = restore_litmus_outputs(lit_file, theme_dirs, cache, keep_dot)
+    if not pending:
+        return total_exported
+
+    try:
+        graphs = iter_herd_graphs(lit_file, cache=herd_cache, report=report)
+        return total_exported + render_litmus_graphs(lit_file, graphs, pending, cache, jobs, keep_dot, report,
+                                                     rendered)
+    except (OSError, subprocess.CalledProcessError) as e:
+        eprint(f"[WARN] herd7 执行失败 {lit_file.name}: {e}")
+        return total_exported
+
+
+def render_litmus_graphs(lit_file: pathlib.Path, graphs: Iterable[str],
+                         pending: List[Tuple[str, pathlib.Path, str, CacheKey]],
+                         cache: BuildCache, jobs: int = 1, keep_dot: bool = False,
+                         report: Optional[HerdReport] = None, rendered: Optional[RenderedGraphs] = None) -> int:
+    """
+    生成 herd7 输出的各个图在待生成主题下的 SVG 并存入缓存
+
+    每个图只布局一次再输出各主题的 SVG，各个图由最多 jobs 个 neato 进程并行生成。
+    graphs 可以是生成器，每个图到达后立即开始渲染。
+    规范化后相同的图（同一测试内或 rendered 中已渲染过的）只渲染一次，
+    其余的 SVG 硬链接（或复制）到第一次渲染的结果；SVG 总是整体替换写入，重新渲染不会改动共享的文件。
+
+    Args:
+        lit_file: litmus 文件
+        graphs: herd7 输出的图（DOT 文本）
+        pending: restore_litmus_outputs 返回的待生成主题列表
+        cache: 构建缓存
+        jobs: 并行运行的 neato 进程数
+        keep_dot: 是否在输出目录中保留完整的 DOT 文件和每个图的 DOT 文件
+        report: 运行统计，记录 neato 阶段的耗时（graphs 为 herd7 管道时包含等待 herd7 输出的时间）
+        rendered: 跨测试共享的已渲染图，为 None 时只在本测试内去重
+
+    Returns:
+        生成的 SVG 数量
+    """
+    total_exported = 0
+    if rendered is None:
+        rendered = RenderedGraphs()
+    generated_files = {theme: [] for theme, _, _, _ in pending}
+    graph_contents = []
+    renders = []
+    render_keys = []
+    # 规范化哈希 -> 本测试中第一次出现时在 renders 中的位置
+    first_renders: Dict[str, int] = {}
+    # 与本测试中前面的图相同：(targets, renders 中的位置)
+    duplicates = []
+    # 之前的测试已渲染过：(targets, 各主题已有的 SVG)
+    reused = []
+
+    def iter_renders() -> Iterator[Tuple[str, List[Tuple[str, pathlib.Path]]]]:
+        for i, graph_content in enumerate(graphs, 1):
+            graph_contents.append(graph_content)
 
             # 确保图形格式正确
             if not graph_content.rstrip().endswith('}'):
                 continue
 
-            # 应用主题颜色到图形内容
-            themed_graph_content = apply_theme_colors_to_dot(graph_content, theme)
-
-            # 保存分割后的 DOT 文件（参考 simple_extract.py）
-            individual_dot_path = test_output_dir / f"graph_{i:02d}.dot"
-            individual_dot_path.write_text(themed_graph_content + "\n", encoding="utf-8")
-
-            # 生成对应的 SVG，使用已经应用颜色的内容
-            svg_path = test_output_dir / f"graph_{i:02d}.svg"
-            if run_neato(graph_content, svg_path, theme):  # run_neato 内部会再次应用颜色
+            targets = []
+            for theme, test_output_dir, _, _ in pending:
+                if keep_dot:
+                    # 保存应用主题颜色后的单个图（参考 simple_extract.py）
+                    individual_dot_path = test_output_dir / f"graph_{i:02d}.dot"
+                    individual_dot_path.write_text(apply_theme_colors_to_dot(graph_content, theme) + "\n",
+                                                   encoding="utf-8")
+                    generated_files[theme].append(individual_dot_path)
+
+                targets.append((theme, test_output_dir / f"graph_{i:02d}.svg"))
+
+            # 主题着色是确定性的，用未着色内容的哈希加上主题即可区分各主题的 SVG
+            graph_key = canonical_graph_key(graph_content)
+            existing = [rendered.lookup(graph_key, theme) for theme, _ in targets]
+            if all(existing):
+                reused.append((targets, existing))
+                continue
+            if graph_key in first_renders:
+                duplicates.append((targets, first_renders[graph_key]))
+                continue
+            first_renders[graph_key] = len(renders)
+
+            # run_neato_themes 内部会应用颜色，每个图只布局一次
+            renders.append((graph_content, targets))
+            render_keys.append(graph_key)
+            yield graph_content, targets
+
+    start = time.perf_counter()
+    results = run_neato_many(iter_renders(), jobs)
+    if report is not None and renders:
+        report.add(StageRecord(str(lit_file), 'neato', time.perf_counter() - start, graphs=len(renders)))
+
+    if not graph_contents:
+        eprint(f"[WARN] 未找到图形数据: {lit_file.name}")
+        return total_exported
+
+    # 每个图各主题的 (SVG 路径, 是否成功)
+    outputs = []
+    for (_, targets), graph_key, graph_results in zip(renders, render_keys, results):
+        for (theme, svg_path), ok in zip(targets, graph_results):
+            if ok:
+                rendered.add(graph_key, theme, svg_path)
+        outputs.append((targets, graph_results))
+    for targets, render_index in duplicates:
+        sources = [svg_path if ok else None
+                   for (_, svg_path), ok in zip(renders[render_index][1], results[render_index])]
+        outputs.append((targets, link_rendered_svgs(sources, targets)))
+    for targets, sources in reused:
+        outputs.append((targets, link_rendered_svgs(sources, targets)))
+    if duplicates or reused:
+        rendered.count_reused(len(duplicates) + len(reused))
+        eprint(f"[DEBUG] {lit_file.name}: 复用 {len(duplicates) + len(reused)} 个重复的图")
+
+    if keep_dot:
+        # 每个主题目录都保留一份完整的 DOT 文件用于调试
+        full_dot = "\n".join(graph_contents) + "\n"
+        for theme, test_output_dir, _, _ in pending:
+            theme_dot_file = test_output_dir / f"{lit_file.stem}.dot"
+            theme_dot_file.write_text(full_dot, encoding="utf-8")
+            generated_files[theme].append(theme_dot_file)
+            eprint(f"[DEBUG] 完整 DOT 文件保存为: {theme_dot_file}")
+
+    for index, (theme, test_output_dir, entry, key) in enumerate(pending):
+        exported = 0
+        failed = 0
+        for targets, graph_results in outputs:
+            if graph_results[index]:
                 exported += 1
+                generated_files[theme].append(targets[index][1])
+            else:
+                failed += 1
 
-        # 保留完整的 DOT 文件用于调试
-        eprint(f"[DEBUG] 完整 DOT 文件保存为: {dot_file}")
+        # 只缓存完整成功的结果
+        if exported > 0 and failed == 0:
+            cache.store(entry, key, test_output_dir, generated_files[theme])
 
         if exported > 0:
             eprint(f"[INFO] {lit_file.name} ({theme}): 生成 {exported} 个 SVG -> {test_output_dir}")
@@ -131,6 +326,32 @@ def process_litmus_file(lit_file: pathlib.Path, theme_dirs: List[Tuple[str, path
     return total_exported
 
 
+def link_rendered_svgs(sources: List[Optional[pathlib.Path]],
+                       targets: List[Tuple[str, pathlib.Path]]) -> List[bool]:
+    """
+    把已渲染的 SVG 链接到重复图的输出路径
+
+    Args:
+        sources: 各主题已渲染的 SVG，渲染失败的为 None
+        targets: (主题, SVG 路径) 列表
+
+    Returns:
+        与 targets 顺序一致的成功标志列表
+    """
+    results = []
+    for source, (_, svg_path) in zip(sources, targets):
+        if source is None:
+            results.append(False)
+            continue
+        try:
+            link_or_copy(source, svg_path)
+            results.append(True)
+        except OSError as e:
+            eprint(f"[WARN] 复用 SVG 失败 {svg_path.name}: {e}")
+            results.append(False)
+    return results
+
+
 def main() -> int:
     """主函数"""
     try:
@@ -155,24 +376,62 @@ def main() -> int:
             eprint("[INFO] 未找到任何 litmus 文件")
             return 0
 
+        cache = cache_from_args('litmus', args)
+        herd_cache = cache_from_args('herd7', args)
+        report = HerdReport()
+        rendered = RenderedGraphs()
+
         total_exported = 0
         processed_files = 0
         theme_stats = {theme: 0 for theme in themes}
 
+        # 先从缓存恢复，剩下的文件分批交给 herd7
+        work = []
         for lit_file, theme_dirs in litmus_files:
-            exported = process_litmus_file(lit_file, theme_dirs)
-            if exported > 0:
-                total_exported += exported
-                processed_files += 1
-
-                # 统计每个主题的生成数量
-                for theme, _ in theme_dirs:
-                    theme_stats[theme] += exported // len(themes)  # 假设每个主题生成相同数量的文件
+            restored, pending = restore_litmus_outputs(lit_file, theme_dirs, cache, args.keep_dot)
+            work.append((lit_file, theme_dirs, restored, pending))
+
+        with tempfile.TemporaryDirectory(prefix='herd7-') as herd_dir:
+            # 同一批的 DOT 文件输出到同一个目录；流式模式在渲染时逐个运行 herd7
+            dot_files = {}
+            to_run = [lit_file for lit_file, _, _, pending in work if pending and not args.stream]
+            for index, batch in enumerate(split_herd_batches(to_run, max(1, args.herd_batch))):
+                batch_dir = pathlib.Path(herd_dir) / f"batch_{index:02d}"
+                dot_files.update(run_herd_batch(batch, batch_dir, cache=herd_cache, report=report))
+
+            for lit_file, theme_dirs, exported, pending in work:
+                graphs = None
+                if pending and args.stream:
+                    graphs = iter_herd_graphs(lit_file, cache=herd_cache, report=report)
+                elif pending and dot_files.get(lit_file):
+                    graphs = iter_dot_graphs(dot_files[lit_file])
+                if graphs is not None:
+                    try:
+                        exported += render_litmus_graphs(lit_file, graphs, pending, cache, max(1, args.jobs),
+                                                         args.keep_dot, report, rendered)
+                    except (OSError, subprocess.CalledProcessError) as e:
+                        eprint(f"[WARN] herd7 执行失败 {lit_file.name}: {e}")
+                if exported > 0:
+                    total_exported += exported
+                    processed_files += 1
+
+                    # 统计每个主题的生成数量
+                    for theme, _ in theme_dirs:
+                        theme_stats[theme] += exported // len(themes)  # 假设每个主题生成相同数量的文件
 
         # 输出统计信息
         theme_summary = ', '.join([f"{theme}: {count}" for theme, count in theme_stats.items()])
         eprint(
             f"[SUMMARY] 处理 {processed_files}/{len(litmus_files)} 个文件，导出 {total_exported} 个 SVG ({theme_summary})")
+        eprint(f"[SUMMARY] {cache.summary()}")
+        eprint(f"[SUMMARY] herd7 {herd_cache.summary()}")
+        if rendered.reused:
+            eprint(f"[SUMMARY] 复用 {rendered.reused} 个重复的图，未重新渲染")
+        if args.slowest > 0:
+            report.print_slowest(args.slowest)
+        if args.report:
+            report.write_json(args.report)
+            eprint(f"[SUMMARY] 运行统计已写入 {args.report}")
 
         return 0 if total_exported > 0 else 4
 
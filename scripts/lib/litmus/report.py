@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+herd7 运行统计模块
+记录每个 litmus 测试各阶段的耗时和资源使用，输出 JSON 报告和最慢的测试
+
+herd7 的标准输出中每个测试有一段结果，其中：
+    Positive: 1 Negative: 3    满足/不满足条件的候选执行数
+    Time SB 0.01               herd7 自己统计的耗时（秒）
+批量运行时整批只有一个进程的墙钟时间和峰值内存，单个测试的耗时取自 Time 行。
+"""
+
+import datetime
+import json
+import os
+import pathlib
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .utils import eprint
+
+# 报告格式版本
+REPORT_VERSION = 1
+
+# 默认输出的最慢测试数量
+DEFAULT_SLOWEST = 10
+
+_TEST_RE = re.compile(r'^Test\s+(\S+)', re.MULTILINE)
+_WITNESSES_RE = re.compile(r'^Positive:\s*(\d+)\s+Negative:\s*(\d+)', re.MULTILINE)
+_TIME_RE = re.compile(r'^Time\s+\S+\s+([0-9.]+)', re.MULTILINE)
+
+
+@dataclass
+class StageRecord:
+    """
+    单个测试单个阶段的统计
+
+    Attributes:
+        test: litmus 文件路径
+        stage: 阶段（herd7、neato）
+        wall_time: 墙钟时间（秒）
+        max_rss_kb: 子进程峰值常驻内存（KB），批量运行时为整批进程的值
+        executions: 候选执行数
+        graphs: 生成的图数量
+        dot_bytes: DOT 输出大小（字节）
+        batch: 共用同一个 herd7 进程的测试数量
+    """
+    test: str
+    stage: str
+    wall_time: float
+    max_rss_kb: Optional[int] = None
+    executions: Optional[int] = None
+    graphs: Optional[int] = None
+    dot_bytes: Optional[int] = None
+    batch: int = 1
+
+
+@dataclass
+class ProcessResult:
+    """
+    带资源统计的子进程结果
+
+    Attributes:
+        returncode: 退出码
+        stdout: 标准输出
+        stderr: 标准错误
+        wall_time: 墙钟时间（秒）
+        max_rss_kb: 峰值常驻内存（KB），平台不支持时为 None
+    """
+    returncode: int
+    stdout: str
+    stderr: str
+    wall_time: float
+    max_rss_kb: Optional[int]
+
+
+def wait_process(process: subprocess.Popen) -> Optional[int]:
+    """
+    等待子进程结束，返回它自己的峰值常驻内存（KB）
+
+    os.wait4 返回的是这一个子进程的 rusage，不像 getrusage(RUSAGE_CHILDREN)
+    那样累计所有已结束的子进程，并发运行多个 herd7 时也能区分。
+    ru_maxrss 在 Linux 上以 KB 为单位，在 macOS 上以字节为单位。
+    """
+    if not hasattr(os, 'wait4'):
+        process.wait()
+        return None
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if sys.platform == 'darwin':
+        return usage.ru_maxrss // 1024
+    return usage.ru_maxrss
+
+
+def run_process(args: Sequence[str]) -> ProcessResult:
+    """
+    运行子进程并记录墙钟时间和峰值内存
+
+    输出先写入临时文件而不是管道，等待进程时不需要同时读取输出。
+
+    Raises:
+        OSError: 无法启动进程
+    """
+    with open(os.devnull, 'rb') as stdin, \
+            tempfile.TemporaryFile() as stdout, tempfile.TemporaryFile() as stderr:
+        start = time.perf_counter()
+        process = subprocess.Popen(list(args), stdin=stdin, stdout=stdout, stderr=stderr)
+        max_rss_kb = wait_process(process)
+        wall_time = time.perf_counter() - start
+        return ProcessResult(process.returncode, _read(stdout), _read(stderr), wall_time, max_rss_kb)
+
+
+def _read(stream) -> str:
+    stream.seek(0)
+    return stream.read().decode('utf-8', errors='ignore')
+
+
+def parse_herd_output(stdout: str) -> Dict[str, Dict[str, float]]:
+    """
+    从 herd7 标准输出中提取每个测试的候选执行数和耗时
+
+    Returns:
+        测试名到 {'executions': 执行数, 'time': 秒} 的映射（缺失的字段不出现）
+    """
+    results: Dict[str, Dict[str, float]] = {}
+    matches = list(_TEST_RE.finditer(stdout))
+    for index, match in enumerate(matches):
+        end = matches[index + 1].start() if index + 1 < len(matches) else len(stdout)
+        block = stdout[match.end():end]
+        info: Dict[str, float] = {}
+        witnesses = _WITNESSES_RE.search(block)
+        if witnesses:
+            info['executions'] = int(witnesses.group(1)) + int(witnesses.group(2))
+        elapsed = _TIME_RE.search(block)
+        if elapsed:
+            info['time'] = float(elapsed.group(1))
+        results[match.group(1)] = info
+    return results
+
+
+def litmus_test_name(lit: pathlib.Path) -> str:
+    """litmus 文件第一行中的测试名（如 "RISCV SB" 中的 SB），读取失败时使用文件名"""
+    try:
+        with open(lit, encoding='utf-8', errors='ignore') as stream:
+            for line in stream:
+                words = line.split()
+                if words:
+                    return words[1] if len(words) > 1 else lit.stem
+    except OSError:
+        pass
+    return lit.stem
+
+
+class HerdReport:
+    """
+    收集各测试的阶段统计（线程安全），输出 JSON 报告和最慢的测试
+    """
+
+    def __init__(self):
+        self._records: List[StageRecord] = []
+        self._lock = threading.Lock()
+
+    def add(self, record: StageRecord) -> None:
+        with self._lock:
+            self._records.append(record)
+
+    @property
+    def records(self) -> List[StageRecord]:
+        with self._lock:
+            return list(self._records)
+
+    def totals(self) -> List[Tuple[str, float, Dict[str, StageRecord]]]:
+        """
+        按测试汇总
+
+        Returns:
+            [(测试, 各阶段墙钟时间之和, {阶段: 记录}), ...]，按总耗时从大到小排序
+        """
+        tests: Dict[str, Dict[str, StageRecord]] = {}
+        for record in self.records:
+            tests.setdefault(record.test, {})[record.stage] = record
+        totals = [(test, sum(r.wall_time for r in stages.values()), stages) for test, stages in tests.items()]
+        totals.sort(key=lambda item: item[1], reverse=True)
+        return totals
+
+    def write_json(self, path: pathlib.Path) -> None:
+        """写入 JSON 报告"""
+        report = {
+            'version': REPORT_VERSION,
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'records': [asdict(record) for record in self.records],
+            'tests': [{'test': test, 'wall_time': total} for test, total, _ in self.totals()],
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, ensure_ascii=False, indent=1) + '\n', encoding='utf-8')
+
+    def print_slowest(self, count: int = DEFAULT_SLOWEST) -> None:
+        """输出总耗时最长的 count 个测试"""
+        totals = self.totals()[:count]
+        if not totals:
+            return
+        eprint(f"[SUMMARY] 最慢的 {len(totals)} 个测试:")
+        for test, total, stages in totals:
+            herd = stages.get('herd7')
+            details = []
+            for stage, record in stages.items():
+                details.append(f"{stage} {record.wall_time:.2f}s")
+            if herd is not None:
+                if herd.max_rss_kb is not None:
+                    details.append(f"RSS {herd.max_rss_kb / 1024:.1f} MB")
+                if herd.executions is not None:
+                    details.append(f"{herd.executions} 个执行")
+                if herd.graphs is not None:
+                    details.append(f"{herd.graphs} 个图")
+                if herd.dot_bytes is not None:
+                    details.append(f"DOT {herd.dot_bytes / 1024:.1f} KB")
+                if herd.batch > 1:
+                    details.append(f"批量 {herd.batch}")
+            eprint(f"  {total:8.2f}s  {pathlib.Path(test).name}  ({', '.join(details)})")
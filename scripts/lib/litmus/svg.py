@@ -5,18 +5,55 @@ SVG 生成和处理模块
 """
 
 import copy
+import os
 import pathlib
 import shutil
-import subprocess
+import threading
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from scripts.lib.common.colors import SYSTEM_WHITE
-from scripts.lib.common.utils import ensure_dir
+from scripts.lib.common.graphviz import render_variants
+from scripts.lib.common.utils import ensure_dir, write_text_atomic
 from .colors import WEB_BACKGROUND_DARK
 from .dot import apply_theme_colors_to_dot
 from .herd_config import get_theme_specific_dot_modifications
 from .utils import eprint
 
+# 默认的 neato 并发数
+DEFAULT_NEATO_JOBS = os.cpu_count() or 1
+
+# 影响布局的 neato 参数（与主题无关）
+NEATO_FONT_ARGS = [
+    "-Gfontname=SF Pro Display",
+    "-Nfontname=SF Pro Display",
+    "-Efontname=SF Pro Display",
+]
+
+
+# 标签外描边的实现方式：
+# - paint-order: 在标签组上设置描边和 paint-order="stroke"，先画描边再画填充，每个标签只输出一组字形
+# - copy: 复制标签组作为描边层放在原标签之前（字形 <use> 节点数量翻倍）
+LABEL_HALO_MODES = ('paint-order', 'copy')
+DEFAULT_LABEL_HALO = 'paint-order'
+
+
+def _is_tag(element, name: str) -> bool:
+    """判断元素标签名（忽略命名空间）"""
+    return element.tag == name or element.tag.endswith('}' + name)
+
+
+def label_halo_style(theme: str = "light") -> dict:
+    """标签外描边的样式属性"""
+    return {
+        'stroke': WEB_BACKGROUND_DARK if theme == "dark" else SYSTEM_WHITE,
+        'stroke-width': "2",  # 外描边需要稍粗一些
+        'stroke-opacity': "1",
+        'stroke-linejoin': 'round',
+        'stroke-linecap': 'round',
+    }
+
 
 def create_text_stroke_effect(text_group, svg_container, theme="light"):
     """
@@ -25,33 +62,23 @@ def create_text_stroke_effect(text_group, svg_container, theme="light"):
     通过复制文本组并在原始文本之前插入描边版本来实现外描边
     """
     try:
-        # 根据主题确定描边颜色
-        stroke_width = "2"  # 外描边需要稍粗一些
-        stroke_opacity = "1"
-
-        if theme == "dark":
-            stroke_color = WEB_BACKGROUND_DARK
-        else:
-            stroke_color = SYSTEM_WHITE
+        style = label_halo_style(theme)
 
         # 创建描边版本
         stroke_group = copy.deepcopy(text_group)
 
         # 设置描边版本的样式：只有描边，没有填充
         stroke_group.set('fill', 'none')
-        stroke_group.set('stroke', stroke_color)
-        stroke_group.set('stroke-width', stroke_width)
-        stroke_group.set('stroke-opacity', stroke_opacity)
-        stroke_group.set('stroke-linejoin', 'round')
-        stroke_group.set('stroke-linecap', 'round')
+        for name, value in style.items():
+            stroke_group.set(name, value)
 
         # 处理所有子元素
         for child in stroke_group.iter():
             if child != stroke_group:  # 不处理根元素本身
-                child.set('stroke', stroke_color)
-                child.set('stroke-width', stroke_width)
-                child.set('stroke-opacity', stroke_opacity)
-                if child.tag == 'use' or child.tag.endswith('}use'):
+                child.set('stroke', style['stroke'])
+                child.set('stroke-width', style['stroke-width'])
+                child.set('stroke-opacity', style['stroke-opacity'])
+                if _is_tag(child, 'use'):
                     child.set('fill', 'none')
 
         # 先添加描边版本到容器
@@ -67,13 +94,36 @@ def create_text_stroke_effect(text_group, svg_container, theme="light"):
         eprint(f"[WARN] 创建外描边效果失败: {e}")
 
 
-def reorder_svg_elements_for_label_priority(svg_content: str, theme: str = "light") -> str:
+def apply_paint_order_halo(text_group, theme="light"):
+    """
+    用 paint-order 为文本组添加外描边效果
+
+    描边和填充画在同一组字形上，描边先画、填充覆盖在描边内侧一半之上，
+    效果与 create_text_stroke_effect 相同，但不复制任何节点。
+    """
+    for name, value in label_halo_style(theme).items():
+        text_group.set(name, value)
+    text_group.set('paint-order', 'stroke')
+
+    # 子元素继承组上的描边
+    for child in text_group.iter():
+        if child != text_group:
+            for name in ('stroke', 'stroke-width', 'stroke-opacity'):
+                child.attrib.pop(name, None)
+
+
+def reorder_svg_elements_for_label_priority(svg_content: str, theme: str = "light",
+                                            halo: str = DEFAULT_LABEL_HALO) -> str:
     """
     重新排序 SVG 元素，确保箭头标签始终在最上层显示
     
     在 SVG 中，后面的元素会覆盖前面的元素。为了确保箭头标签不被其他箭头覆盖，
     我们需要将所有包含文本的组元素（箭头标签）移到 SVG 文档的末尾。
+    halo 指定标签外描边的实现方式（见 LABEL_HALO_MODES）。
     """
+    if halo not in LABEL_HALO_MODES:
+        raise ValueError(f"未知的标签描边方式: {halo}")
+
     try:
         # 注册 SVG 命名空间以正确解析
         ET.register_namespace('', 'http://www.w3.org/2000/svg')
@@ -84,35 +134,33 @@ def reorder_svg_elements_for_label_priority(svg_content: str, theme: str = "ligh
 
         # 查找主 SVG 容器
         svg_container = root
-        if not (root.tag == 'svg' or root.tag.endswith('}svg')):
+        if not _is_tag(root, 'svg'):
             # 查找 svg 元素
             for elem in root.iter():
-                if elem.tag == 'svg' or elem.tag.endswith('}svg'):
+                if _is_tag(elem, 'svg'):
                     svg_container = elem
                     break
 
         # 收集所有文本组元素（包含 use 元素且具有 fill 属性的 g 元素，这些是箭头标签）
         text_groups = []
 
-        def is_text_group(element):
-            """判断是否为文本组元素（箭头标签）"""
-            if element.tag == 'g' or element.tag.endswith('}g'):
-                # 检查是否有 fill 属性且包含 use 元素
-                if element.get('fill'):
-                    # 检查是否包含 use 元素
-                    for child in element.iter():
-                        if child.tag == 'use' or child.tag.endswith('}use'):
-                            return True
-            return False
-
-        def collect_text_groups(element, parent=None):
-            """递归收集所有文本组元素"""
-            if is_text_group(element):
+        def collect_text_groups(element, parent=None) -> bool:
+            """
+            后序遍历一次收集最外层的文本组元素
+
+            返回子树中是否包含 use 元素，父元素据此判断自己是否为文本组，
+            不需要对每个候选组重新遍历其子树。
+            """
+            first = len(text_groups)
+            has_use = _is_tag(element, 'use')
+            for child in element:
+                has_use = collect_text_groups(child, element) or has_use
+
+            if has_use and _is_tag(element, 'g') and element.get('fill'):
+                # 内层的文本组属于这个文本组，不再单独移动
+                del text_groups[first:]
                 text_groups.append((element, parent))
-                return  # 找到文本组后不需要继续向下搜索
-
-            for child in list(element):  # 使用 list() 避免修改迭代器
-                collect_text_groups(child, element)
+            return has_use
 
         collect_text_groups(svg_container)
 
@@ -129,8 +177,11 @@ def reorder_svg_elements_for_label_priority(svg_content: str, theme: str = "ligh
 
         # 将所有文本组元素添加到 SVG 容器的末尾，并为它们添加外描边效果
         for text_group in removed_groups:
-            # 为每个文本组创建外描边效果
-            create_text_stroke_effect(text_group, svg_container, theme)
+            if halo == 'copy':
+                # 为每个文本组创建外描边效果
+                create_text_stroke_effect(text_group, svg_container, theme)
+            else:
+                apply_paint_order_halo(text_group, theme)
             svg_container.append(text_group)
 
         # 输出调试信息
@@ -156,26 +207,10 @@ def reorder_svg_elements_for_label_priority(svg_content: str, theme: str = "ligh
         return svg_content
 
 
-def run_neato(dot_content: str, svg_path: pathlib.Path, theme: str = "light"):
-    """使用 neato 从 DOT 内容生成指定主题的 SVG"""
-    if not shutil.which("neato"):
-        eprint("[WARN] 未找到 neato，跳过 SVG 生成")
-        return False
-
-    # 使用 common 工具确保输出目录存在
-    ensure_dir(str(svg_path.parent))
-
-    # 将主题颜色应用到 DOT 内容中
-    themed_dot_content = apply_theme_colors_to_dot(dot_content, theme)
-
-    # 获取主题相关的颜色配置
+def neato_theme_args(theme: str = "light") -> List[str]:
+    """只影响颜色的 neato 参数（不影响布局）"""
     theme_mods = get_theme_specific_dot_modifications(theme)
-
-    cmd = [
-        "neato",
-        "-Gfontname=SF Pro Display",
-        "-Nfontname=SF Pro Display",
-        "-Efontname=SF Pro Display",
+    return [
         f"-Gbgcolor={theme_mods['bgcolor']}",
         f"-Gfontcolor={theme_mods['fontcolor']}",
         f"-Nfillcolor={theme_mods['node_fillcolor']}",
@@ -183,23 +218,123 @@ def run_neato(dot_content: str, svg_path: pathlib.Path, theme: str = "light"):
         f"-Nfontcolor={theme_mods['fontcolor']}",  # 添加节点字体颜色
         f"-Efontcolor={theme_mods['fontcolor']}",
         f"-Ecolor={theme_mods['edge_color']}",
-        "-Tsvg:cairo"
     ]
 
+
+def run_neato(dot_content: str, svg_path: pathlib.Path, theme: str = "light"):
+    """使用 neato 从 DOT 内容生成指定主题的 SVG"""
+    return run_neato_themes(dot_content, [(theme, svg_path)])[0]
+
+
+def run_neato_themes(dot_content: str, targets: List[Tuple[str, pathlib.Path]],
+                     halo: str = DEFAULT_LABEL_HALO, variants: Optional[List[str]] = None,
+                     layout: bool = True) -> List[bool]:
+    """
+    使用 neato 从同一份 DOT 内容生成多个主题的 SVG
+
+    各主题只有颜色不同，只对第一个主题运行一次布局，
+    其余主题通过 neato -n2 复用布局结果。
+    layout 为 False 时 DOT 中已经是以点为单位的坐标，所有主题都直接用 neato -n2 渲染。
+
+    Args:
+        dot_content: 未应用主题颜色的 DOT 内容
+        targets: (主题, SVG 路径) 列表
+        halo: 标签外描边的实现方式
+        variants: 已应用各主题颜色的 DOT 内容（与 targets 顺序一致），为 None 时由 dot_content 生成
+        layout: 是否运行布局
+
+    Returns:
+        与 targets 顺序一致的成功标志列表
+    """
+    if not shutil.which("neato"):
+        eprint("[WARN] 未找到 neato，跳过 SVG 生成")
+        return [False] * len(targets)
+
+    # 将主题颜色应用到 DOT 内容中
+    if variants is None:
+        variants = [apply_theme_colors_to_dot(dot_content, theme) for theme, _ in targets]
+
     try:
-        result = subprocess.run(
-            cmd,
-            input=themed_dot_content,  # 使用处理过颜色的 DOT 内容
-            text=True,
-            capture_output=True,
-            check=True
-        )
-
-        # 对生成的 SVG 进行后处理，确保箭头标签在最上层并添加描边
-        processed_svg = reorder_svg_elements_for_label_priority(result.stdout, theme)
-
-        svg_path.write_text(processed_svg, encoding="utf-8")
-        return True
+        svgs = render_variants(variants, "neato", NEATO_FONT_ARGS,
+                               [neato_theme_args(theme) for theme, _ in targets], layout=layout)
     except Exception as e:
-        eprint(f"[WARN] neato 失败 {svg_path.name}: {e}")
-        return False
+        eprint(f"[WARN] neato 失败 {targets[0][1].name}: {e}")
+        return [False] * len(targets)
+
+    results = []
+    for (theme, svg_path), svg_content in zip(targets, svgs):
+        try:
+            # 使用 common 工具确保输出目录存在
+            ensure_dir(str(svg_path.parent))
+
+            # 对生成的 SVG 进行后处理，确保箭头标签在最上层并添加描边
+            processed_svg = reorder_svg_elements_for_label_priority(svg_content, theme, halo)
+
+            # 重复图的 SVG 与此文件可能是硬链接，替换而不是就地覆盖
+            write_text_atomic(svg_path, processed_svg)
+            results.append(True)
+        except Exception as e:
+            eprint(f"[WARN] 写入 SVG 失败 {svg_path.name}: {e}")
+            results.append(False)
+    return results
+
+
+def run_neato_many(renders: Iterable[tuple], jobs: int = 1, halo: str = DEFAULT_LABEL_HALO,
+                   layout: bool = True) -> List[List[bool]]:
+    """
+    并行运行多个 neato，把多个图的 DOT 内容分别生成各主题的 SVG
+
+    neato 是外部进程，用线程池即可占满多个核心；
+    单个图失败不影响其他图（run_neato_themes 内部已捕获异常）。
+    renders 可以是生成器（例如从 herd7 管道逐个读出的图），每个图到达后立即开始渲染。
+
+    Args:
+        renders: (DOT 内容, [(主题, SVG 路径), ...]) 列表，可以在末尾附带已着色的各主题 DOT 内容
+        jobs: 最大并发数，<= 1 时顺序执行
+        halo: 标签外描边的实现方式
+        layout: 是否运行布局（见 run_neato_themes）
+
+    Returns:
+        与 renders 顺序一致的成功标志列表
+    """
+    def run(render: tuple) -> List[bool]:
+        dot_content, targets, *variants = render
+        return run_neato_themes(dot_content, targets, halo, *variants, layout=layout)
+
+    if jobs <= 1:
+        return [run(render) for render in renders]
+
+    # 线程池按需创建线程，图的数量少于 jobs 时不会多开线程
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(run, renders))
+
+
+class RenderedGraphs:
+    """
+    已渲染的图（线程安全）
+
+    以规范化哈希（canonical_graph_key）和主题为键记录第一次成功渲染的 SVG，
+    之后结构相同的图直接链接到该文件，不再运行 neato 和后处理。
+    """
+
+    def __init__(self):
+        self._svgs: Dict[Tuple[str, str], pathlib.Path] = {}
+        self._lock = threading.Lock()
+        self.reused = 0
+
+    def lookup(self, key: str, theme: str) -> Optional[pathlib.Path]:
+        """返回已渲染的 SVG，文件已不存在时返回 None"""
+        with self._lock:
+            svg_path = self._svgs.get((key, theme))
+        if svg_path is not None and svg_path.is_file():
+            return svg_path
+        return None
+
+    def add(self, key: str, theme: str, svg_path: pathlib.Path) -> None:
+        with self._lock:
+            self._svgs.setdefault((key, theme), svg_path)
+
+    def count_reused(self, count: int = 1) -> None:
+        with self._lock:
+            self.reused += count
+
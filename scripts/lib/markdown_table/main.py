@@ -19,8 +19,11 @@ import argparse
 import os
 import re
 import sys
+from pathlib import Path
 from typing import List
 
+from scripts.lib.common.asset_index import get_asset_index
+
 SEP_RE = re.compile(r"^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)+\|?\s*$")
 # Only match lowercase HTML <br> tags inside table cells; do NOT match React <Br /> components
 BR_RE = re.compile(r"<br\s*/?>")
@@ -115,8 +118,24 @@ def should_process_file(path: str) -> bool:
 
 def iter_target_files(paths: List[str]) -> List[str]:
     files: List[str] = []
+    index = None
     for p in paths:
         if os.path.isdir(p):
+            # Directories under blog/ or docs/ come from the shared asset index
+            # instead of a fresh os.walk of the tree; outside the project (no
+            # project root) fall back to walking the directory
+            if index is None:
+                try:
+                    index = get_asset_index()
+                except FileNotFoundError:
+                    index = False
+            if index and index.covers(Path(p)):
+                # Markdown under images/ is indexed as "image"; filter both kinds
+                # with the same check the walk uses so the file set is unchanged
+                indexed = sorted(index.files("markdown", under=Path(p)) + index.files("image", under=Path(p)))
+                files.extend(str(f) if os.path.isabs(p) else os.path.relpath(f)
+                             for f in indexed if should_process_file(str(f)))
+                continue
             for root, _dirs, filenames in os.walk(p):
                 for name in filenames:
                     full = os.path.join(root, name)
@@ -16,61 +16,115 @@ check_dependencies python3 dot
 # 初始化工作环境
 rootdir="$(init_environment)"
 
-# 生成指定主题的内存布局
+# 缓存参数：--no-cache 禁用构建缓存，--explain-cache 输出未命中原因
+CACHE_FLAGS=()
+for arg in "$@"; do
+  case "$arg" in
+    --no-cache | --explain-cache)
+      CACHE_FLAGS+=("$arg")
+      ;;
+    *)
+      echo "未知参数: $arg" >&2
+      exit 1
+      ;;
+  esac
+done
+
+# 缓存统计
+CACHE_HITS=0
+CACHE_MISSES=0
+
+# 设置指定主题的缓存参数（写入 cache_args 数组）
 # 参数: $1 - 主题名称 (light/dark)
 #       $2 - 输入文件完整路径
 #       $3 - 输出目录路径
-#       $4 - 输出文件名（不含扩展名）
-generate_memory_layout() {
-  local theme="$1"
-  local input_file="$2"
-  local output_dir="$3"
-  local filename="$4"
+set_cache_args() {
+  # 缓存键：源文件、主题配置（THEME_COLORS）、dot 版本和生成器代码
+  cache_args=(
+    --namespace memory
+    --entry "${2}:${1}"
+    --base-dir "$3"
+    --source "$2"
+    --theme-config scripts.lib.memory_viz.src.core.colors:THEME_COLORS
+    --theme "$1"
+    --tool dot
+    --code "$MEMORY_VIZ_DIR/src"
+    --code "$rootdir/scripts/lib/common"
+  )
+}
 
-  # 确保输出目录存在
-  ensure_dir "$output_dir"
+# 生成所有主题的内存布局
+# 各主题的 DOT 只有颜色不同，未命中缓存的主题共用一次 dot 布局
+# 参数: $1 - 输入文件完整路径
+#       $2 - images 目录路径
+#       $3 - 输出文件名（不含扩展名）
+generate_memory_layouts() {
+  local input_file="$1"
+  local images_dir="$2"
+  local filename="$3"
+  local pending_themes=()
+  local dot_files=()
+  local theme output_dir
+
+  for theme in light dark; do
+    output_dir="$images_dir/$theme"
+
+    # 确保输出目录存在
+    ensure_dir "$output_dir"
+
+    # 命中缓存时直接恢复 DOT 和 SVG 文件
+    set_cache_args "$theme" "$input_file" "$output_dir"
+    if run_python_module scripts.lib.common.cache restore "${cache_args[@]}" "${CACHE_FLAGS[@]}"; then
+      CACHE_HITS=$((CACHE_HITS + 1))
+      continue
+    fi
+    CACHE_MISSES=$((CACHE_MISSES + 1))
+
+    # 生成 DOT 文件
+    run_python_module scripts.lib.memory_viz.src.cli.main "$input_file" --theme "$theme" >"${output_dir}/${filename}.dot"
+
+    pending_themes+=("$theme")
+    dot_files+=("${output_dir}/${filename}.dot")
+  done
+
+  if [ ${#pending_themes[@]} -eq 0 ]; then
+    return
+  fi
 
-  # 生成 DOT 文件
-  run_python_module scripts.lib.memory_viz.src.cli.main "$input_file" --theme "$theme" >"${output_dir}/${filename}.dot"
+  # 只布局一次，转换为各主题的 SVG 文件
+  run_python_module scripts.lib.common.graphviz --engine dot "${dot_files[@]}"
 
-  # 转换为 SVG 文件
-  dot -Tsvg:cairo "${output_dir}/${filename}.dot" -o "${output_dir}/${filename}.svg"
+  # 存入缓存
+  for theme in "${pending_themes[@]}"; do
+    set_cache_args "$theme" "$input_file" "$images_dir/$theme"
+    run_python_module scripts.lib.common.cache store "${cache_args[@]}" "${CACHE_FLAGS[@]}" \
+      "${filename}.dot" "${filename}.svg"
+  done
 }
 
 # 扫描并处理所有文档目录下的内存布局文件
 echo "正在扫描 docs/ 目录下的内存布局文件..."
 
-# 查找所有 docs/**/_assets/memory/*.txt 文件
-find "$rootdir/docs" -name "memory" -type d | while IFS= read -r memory_dir; do
-  # 检查 memory 目录下是否有 .txt 文件
-  if ls "$memory_dir"/*.txt >/dev/null 2>&1; then
-    echo "发现内存布局文件目录: $memory_dir"
+# 从共享的资产索引中取出所有 docs/**/memory/*.txt 文件（不再对 docs/ 整棵树运行 find）
+# 使用进程替换而不是管道，使循环内更新的缓存统计在循环结束后仍然可见；
+# 从文件描述符 3 读取，避免循环内的命令消耗文件列表
+while IFS= read -r txt_file <&3; do
+  # 获取 _assets 目录路径（memory 目录的父目录）
+  memory_dir=$(dirname "$txt_file")
+  assets_dir=$(dirname "$memory_dir")
 
-    # 获取 _assets 目录路径（memory 的父目录）
-    assets_dir=$(dirname "$memory_dir")
+  # 创建 images 目录路径
+  images_dir="$assets_dir/images"
 
-    # 创建 images 目录路径
-    images_dir="$assets_dir/images"
+  # 提取不含扩展名的文件名
+  filename=$(basename "$txt_file" .txt)
+  echo "  正在处理文件: $memory_dir/$filename.txt"
 
-    # 处理该目录下的每个 .txt 文件
-    for txt_file in "$memory_dir"/*.txt; do
-      if [[ -f "$txt_file" ]]; then
-        # 提取不含扩展名的文件名
-        filename=$(basename "$txt_file" .txt)
-        echo "  正在处理文件: $filename"
+  # 生成浅色和深色主题布局
+  generate_memory_layouts "$txt_file" "$images_dir" "$filename"
 
-        # 生成浅色主题布局
-        light_output_dir="$images_dir/light"
-        generate_memory_layout "light" "$txt_file" "$light_output_dir" "$filename"
-
-        # 生成深色主题布局
-        dark_output_dir="$images_dir/dark"
-        generate_memory_layout "dark" "$txt_file" "$dark_output_dir" "$filename"
-
-        echo "  已完成 $filename 的布局生成"
-      fi
-    done
-  fi
-done
+  echo "  已完成 $filename 的布局生成"
+done 3< <(run_python_module scripts.lib.common.asset_index memory)
 
+echo "缓存: 命中 ${CACHE_HITS}，未命中 ${CACHE_MISSES}"
 echo "内存布局可视化文件已生成完成"
@@ -9,12 +9,16 @@ __version__ = "1.0.0"
 from .core.colors import get_theme_colors, hex_with_alpha
 # 导出主要的类和函数，保持向后兼容
 from .core.generator import MemoryDotGenerator
-from .core.parser import parse_gdb_output, parse_gdb_groups
+from .core.parser import parse_gdb_output, parse_gdb_region, parse_gdb_groups, load_binary_groups
+from .core.region import MemoryRegion
 
 __all__ = [
     'MemoryDotGenerator',
+    'MemoryRegion',
     'parse_gdb_output',
+    'parse_gdb_region',
     'parse_gdb_groups',
+    'load_binary_groups',
     'get_theme_colors',
     'hex_with_alpha'
 ]
@@ -5,21 +5,21 @@
 import argparse
 import math
 import sys
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, Optional
 
 # 定义类型别名来改善类型推断
 GdbGroup = Dict[str, Any]  # GDB 命令组的类型
 GroupInfo = Dict[str, Any]  # 组信息的类型
 
-from ..core.config import DEFAULT_THEME, DEFAULT_COLUMNS, RANKDIR, SPLINES, FONT, FONT_SIZE, NODE_MARGIN, THEME_CHOICES
+from ..core.config import (
+    DEFAULT_THEME, DEFAULT_COLUMNS, RANKDIR, SPLINES, FONT, FONT_SIZE, NODE_MARGIN, THEME_CHOICES, SIDECAR_SUFFIX
+)
 from ..core.colors import get_theme_colors
 from ..core.filter import filter_zero_rows
-from ..core.generator import (
-    MemoryDotGenerator, NULL_VAL,
-    extract_physical_page_number_int
-)
+from ..core.generator import MemoryDotGenerator, NULL_VAL
 from ..core.parser import (
     parse_gdb_groups,
+    load_binary_groups,
     contains_register_output,
     parse_register_to_memory_format,
     is_register_command,
@@ -33,7 +33,9 @@ from ..core.parser import (
 def parse_args():
     """解析命令行参数，配置文件输入和主题选项"""
     parser = argparse.ArgumentParser(description="生成内存布局的 Graphviz DOT 可视化")
-    parser.add_argument('file', nargs='?', help="GDB 内存输出文件路径；若为空则从标准输入读取内容")
+    parser.add_argument('files', nargs='*', metavar='file',
+                        help="GDB 内存输出文件或二进制转储的附属文件（.json），可以混合指定多个；"
+                             "若为空则从标准输入读取内容")
     parser.add_argument('--theme', choices=THEME_CHOICES, default=DEFAULT_THEME, help="指定输出图的配色主题")
     parser.add_argument('--columns', type=int, default=DEFAULT_COLUMNS, help="指定内存布局的列数（默认为4列）")
     return parser.parse_args()
@@ -61,16 +63,20 @@ def generate_group_label(group_type: str, data: Any) -> str:
         return str(data)
 
 
-def main():
-    """读取 GDB 输出、生成内存布局的 Graphviz DOT 文本并输出"""
-    args = parse_args()
-    # 从文件或标准输入读取 GDB 输出内容
-    if args.file:
-        with open(args.file, 'r') as f:
-            lines = f.read().splitlines()
-    else:
-        lines = sys.stdin.read().splitlines()
+def generate_memory_dot(lines: List[str], theme: str = DEFAULT_THEME, columns: int = DEFAULT_COLUMNS,
+                        binary_groups: Optional[List[GdbGroup]] = None) -> str:
+    """
+    根据 GDB 输出生成内存布局的 Graphviz DOT 文本
 
+    Args:
+        lines: GDB 输出的各行内容
+        theme: 配色主题
+        columns: 内存布局的列数
+        binary_groups: 由 load_binary_groups 映射的二进制转储组，排在文本输出的组之后
+
+    Returns:
+        完整的 DOT 图形定义
+    """
     # 解析每组地址与内存值，构建全局地址映射表
     group_infos: List[Dict[str, Any]] = []
     global_addr_map: Dict[str, Tuple[str, int]] = {}
@@ -106,18 +112,16 @@ def main():
         memory_lines = lines
 
     # 将内存输出按 GDB 命令分组
-    groups = parse_gdb_groups(memory_lines)
+    groups = parse_gdb_groups(memory_lines) + list(binary_groups or [])
 
     for idx, group in enumerate(groups, 1):
-        gen = MemoryDotGenerator(group['lines'])
+        # 二进制转储已经映射为内存区域，文本输出逐行解析
+        region = group['region'] if 'region' in group else MemoryDotGenerator(group['lines']).region
         prefix = f"g{idx}_"
 
-        # 保存原始地址和下标信息
-        original_addrs = gen.addresses.copy()
-        original_indices = {addr: i for i, addr in enumerate(original_addrs)}
-
-        # 使用过滤器过滤掉全为0的行
-        filtered_addrs = filter_zero_rows(original_addrs, gen.memory, args.columns)
+        # 使用过滤器过滤掉全为0的行，只有保留的单元才格式化为字符串
+        kept = filter_zero_rows(region, columns)
+        filtered_addrs = [region.address_text(i) for i in kept]
 
         # 从GDB命令中提取物理页号作为标签
         page_label = generate_group_label("memory", group.get('cmd', ''))
@@ -131,8 +135,11 @@ def main():
         group_infos.append({
             'prefix': prefix,
             'filtered_addrs': filtered_addrs,
-            'original_indices': original_indices,
-            'memory': gen.memory,
+            'region': region,
+            'kept': kept,
+            'memory': {addr: region.value_text(i) for addr, i in zip(filtered_addrs, kept)},
+            # 页表项指向的物理页号（无效为 -1），按数组整体计算
+            'page_numbers': region.page_numbers()[kept].tolist(),
             'cmd': page_label,  # 使用生成的标签
             'group_type': 'memory'  # 标记组类型
         })
@@ -148,7 +155,7 @@ def main():
     ]
 
     # 获取主题颜色配置
-    colors = get_theme_colors(args.theme)
+    colors = get_theme_colors(theme)
     font_color = colors["text_color"]
 
     # 根据是否有 satp 寄存器决定布局参数
@@ -166,24 +173,36 @@ def main():
     # 为每个内存分组生成子图和节点定义
     for info in group_infos:
         # 寄存器组使用单列布局，内存组使用用户指定的列数
-        columns = 1 if info.get('group_type') == 'register' else args.columns
+        group_columns = 1 if info.get('group_type') == 'register' else columns
         is_register = info.get('group_type') == 'register'
 
         # 根据是否有 satp 决定是否显示标签
         label = info['cmd'] if has_satp else None
 
-        dot_lines.append(
-            MemoryDotGenerator.to_dot(
-                info['memory'],
-                info['filtered_addrs'],
-                prefix=info['prefix'],
-                theme=args.theme,
-                columns=columns,
-                original_indices=info['original_indices'],
-                label=label,  # 有 satp 时显示标签，无 satp 时移除标签
-                is_register=is_register  # 传递寄存器标识
+        if is_register:
+            dot_lines.append(
+                MemoryDotGenerator.to_dot(
+                    info['memory'],
+                    info['filtered_addrs'],
+                    prefix=info['prefix'],
+                    theme=theme,
+                    columns=group_columns,
+                    original_indices=info['original_indices'],
+                    label=label,  # 有 satp 时显示标签，无 satp 时移除标签
+                    is_register=is_register  # 传递寄存器标识
+                )
+            )
+        else:
+            dot_lines.append(
+                MemoryDotGenerator.region_to_dot(
+                    info['region'],
+                    info['kept'],
+                    prefix=info['prefix'],
+                    theme=theme,
+                    columns=group_columns,
+                    label=label  # 有 satp 时显示标签，无 satp 时移除标签
+                )
             )
-        )
 
     # 生成组间垂直对齐边，连接上一组最后一行与下一组第一行的对应列元素
     dot_lines.append("")
@@ -195,12 +214,12 @@ def main():
         next_filtered = next_info['filtered_addrs']
 
         if curr_filtered and next_filtered:
-            curr_rows = math.ceil(len(curr_filtered) / args.columns)
+            curr_rows = math.ceil(len(curr_filtered) / columns)
             # 获取最后一行的起始索引
-            last_row_start = (curr_rows - 1) * args.columns
+            last_row_start = (curr_rows - 1) * columns
 
             # 对于每一列，创建隐藏的对齐边保持布局结构
-            for c in range(args.columns):
+            for c in range(columns):
                 curr_idx = last_row_start + c
                 next_idx = c  # 下一组第一行的对应列
                 if curr_idx < len(curr_filtered) and next_idx < len(next_filtered):
@@ -235,8 +254,8 @@ def main():
                     # 寄存器：使用特殊的寄存器页号提取函数
                     page_num = extract_register_page_number(addr, val)
                 else:
-                    # 内存：使用普通的页表项页号提取函数
-                    page_num = extract_physical_page_number_int(val)
+                    # 内存：使用预先按数组计算的页表项页号
+                    page_num = info['page_numbers'][i]
 
                 if page_num != -1 and page_num in page_to_group_map:
                     # 找到页表项指向的物理页号对应的组
@@ -251,9 +270,27 @@ def main():
                         # 无 satp 时使用蓝色箭头并指向第一个节点
                         dot_lines.append(
                             f"    {prefix}node{i} -> {tgt_prefix}node0 [color=\"{colors['system_blue']}\", lhead=\"cluster_{tgt_prefix}\", constraint=false];")
-    # 输出完整的 DOT 图形定义
+    # 返回完整的 DOT 图形定义
     dot_lines.append("}")
-    print("\n".join(dot_lines))
+    return "\n".join(dot_lines)
+
+
+def main():
+    """读取 GDB 输出、生成内存布局的 Graphviz DOT 文本并输出"""
+    args = parse_args()
+    # 从文件或标准输入读取 GDB 输出内容，附属文件描述的二进制转储直接映射
+    lines: List[str] = []
+    binary_groups: List[GdbGroup] = []
+    for path in args.files:
+        if path.endswith(SIDECAR_SUFFIX):
+            binary_groups.extend(load_binary_groups(path))
+        else:
+            with open(path, 'r') as f:
+                lines.extend(f.read().splitlines())
+    if not args.files:
+        lines = sys.stdin.read().splitlines()
+
+    print(generate_memory_dot(lines, args.theme, args.columns, binary_groups))
 
 
 if __name__ == "__main__":
@@ -56,6 +56,10 @@ PTE_PPN_SHIFT = 10  # 页表项右移位数：提取物理页号
 MEMORY_STEP = 8  # 内存地址步长：64位系统中每个地址单元字节数
 SATP_PPN_MASK = 0xFFFFFFFFFFF  # SATP寄存器PPN掩码：取低44位
 
+# 二进制内存转储 (GDB dump binary memory) 常量
+BINARY_DUMP_DTYPE = '<u8'  # 转储内容按小端 64 位无符号整数解释
+SIDECAR_SUFFIX = '.json'  # 描述二进制转储基地址的附属文件后缀
+
 # 寄存器名称常量
 SATP_REGISTER_NAME = "satp"  # SATP寄存器名称
 
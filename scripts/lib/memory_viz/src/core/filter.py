@@ -2,58 +2,30 @@
 内存地址过滤器模块
 提供地址列表过滤功能，去除全为空值的行
 """
-import math
-from typing import List, Dict, Optional
+from typing import List, Optional
 
-from .config import DEFAULT_NULL_VALUES, DISPLAY_NULL_VAL
+import numpy as np
 
+from .config import DEFAULT_NULL_VALUES
+from .region import MemoryRegion
 
-def filter_zero_rows(addresses: List[str], memory: Dict[str, str], columns: int,
-                     null_vals: Optional[List[str]] = None) -> List[str]:
+
+def filter_zero_rows(region: MemoryRegion, columns: int,
+                     null_vals: Optional[List[str]] = None) -> np.ndarray:
     """
     过滤掉矩阵布局中全为空值的行
-    
+
     Args:
-        addresses: 原始地址列表
-        memory: 地址到值的映射
+        region: 内存区域
         columns: 矩阵列数
         null_vals: 被视为空值的值列表，默认使用配置中的默认空值列表
-    
+
     Returns:
-        过滤后的地址列表
+        保留的单元序号（包含原始索引0的第一行始终保留）
     """
     if null_vals is None:
         null_vals = DEFAULT_NULL_VALUES
 
-    if not addresses:
-        return []
-
-    # 计算矩阵行数
-    rows = math.ceil(len(addresses) / columns)
-
-    # 生成初始矩阵
-    initial_matrix = [
-        addresses[r * columns: min((r + 1) * columns, len(addresses))]
-        for r in range(rows)
-    ]
-
-    # 过滤掉所有值都为空的行（但保留包含原始索引0的行）
-    filtered_addrs: List[str] = []
-    for row in initial_matrix:
-        # 检查当前行是否包含原始索引为0的地址
-        contains_index_zero = any(
-            addresses.index(addr) == 0
-            for addr in row if addr in addresses
-        )
-
-        # 检查这一行是否所有地址的值都为空
-        is_all_zero = all(
-            memory.get(addr, DISPLAY_NULL_VAL) in null_vals
-            for addr in row
-        )
-
-        # 如果不是全空行，或者包含原始索引0的地址，则保留该行
-        if not is_all_zero or contains_index_zero:
-            filtered_addrs.extend(row)
-
-    return filtered_addrs
+    # 空值按数值比较，"0x0000000000000000" 和 "0x0" 都是 0
+    null_ints = sorted({int(v, 16) for v in null_vals})
+    return region.nonnull_row_indices(columns, null_ints)
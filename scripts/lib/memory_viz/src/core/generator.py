@@ -2,8 +2,11 @@
 内存 DOT 生成器模块
 封装 GDB 输出解析与 Graphviz DOT 生成功能
 """
+import functools
 import math
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Sequence, Tuple
+
+import numpy as np
 
 from .colors import get_theme_colors
 from .config import (
@@ -11,7 +14,8 @@ from .config import (
     NULL_VAL, DISPLAY_NULL_VAL, PADDED_NULL_DISPLAY, PTE_PPN_SHIFT,
     DEFAULT_THEME, DEFAULT_COLUMNS
 )
-from .parser import parse_gdb_output, extract_register_page_number_display
+from .parser import parse_gdb_region, extract_register_page_number_display
+from .region import MemoryRegion
 
 
 def _extract_page_number_core(pte_value: str) -> int:
@@ -76,17 +80,102 @@ class MemoryDotGenerator:
     """封装 GDB 输出解析与 Graphviz DOT 生成"""
 
     def __init__(self, lines: List[str]) -> None:
-        self.memory, self.addresses = parse_gdb_output(lines)
-        if not self.addresses:
+        self.region = parse_gdb_region(lines)
+        if not len(self.region):
             raise ValueError("未能从输入中解析出任何地址。")
 
+    @functools.cached_property
+    def addresses(self) -> List[str]:
+        """按访问顺序排列的地址字符串（逐个格式化，仅供需要字符串形式的调用方使用）"""
+        return [self.region.address_text(i) for i in range(len(self.region))]
+
+    @functools.cached_property
+    def memory(self) -> Dict[str, str]:
+        """地址字符串到值字符串的映射"""
+        return {addr: self.region.value_text(i) for i, addr in enumerate(self.addresses)}
+
     @staticmethod
     def to_dot(memory: Dict[str, str], addresses: List[str], prefix: str = "", theme: str = DEFAULT_THEME,
                columns: int = DEFAULT_COLUMNS,
                original_indices: Optional[Dict[str, int]] = None, label: Optional[str] = None,
                is_register: bool = False) -> str:
         """生成 Graphviz DOT 格式字符串，支持自定义列数的矩阵布局"""
+        # 计算最大索引值所需的数字位数
+        if original_indices:
+            # 如果有原始下标信息，使用原始下标中的最大值
+            max_index = max(original_indices.values()) if original_indices else len(addresses) - 1
+        else:
+            # 否则使用当前地址列表的最大索引
+            max_index = len(addresses) - 1
+
+        # 地址在当前列表中第一次出现的位置
+        positions: Dict[str, int] = {}
+        for i, addr in enumerate(addresses):
+            positions.setdefault(addr, i)
+
+        cells = []
+        for addr in addresses:
+            # 使用传入的原始下标，如果没有则使用地址在当前列表中的索引
+            if original_indices and addr in original_indices:
+                original_index = original_indices[addr]
+            else:
+                original_index = positions[addr]
+
+            node_val = memory.get(addr, DISPLAY_NULL_VAL)
+            if node_val == DISPLAY_NULL_VAL:
+                node_val = PADDED_NULL_DISPLAY
+
+            # 根据是否为寄存器选择不同的页号提取方法
+            if is_register:
+                # 寄存器：使用寄存器专用的页号提取函数
+                page_num_display = extract_register_page_number_display(addr, node_val)
+            else:
+                # 内存：使用页表项的页号提取函数
+                page_num_display = extract_physical_page_number(node_val)
+            cells.append((addr, node_val, original_index, page_num_display))
+
+        return MemoryDotGenerator._cells_to_dot(cells, len(str(max_index)), prefix, theme, columns, label,
+                                                is_register)
+
+    @staticmethod
+    def region_to_dot(region: MemoryRegion, indices: Sequence[int], prefix: str = "",
+                      theme: str = DEFAULT_THEME, columns: int = DEFAULT_COLUMNS,
+                      label: Optional[str] = None) -> str:
+        """
+        生成内存区域的 Graphviz DOT 格式字符串
+
+        Args:
+            region: 内存区域
+            indices: 要显示的单元序号（如 filter_zero_rows 的结果），节点下标使用单元在区域中的原始序号
+            prefix: 节点名前缀
+            theme: 配色主题
+            columns: 矩阵列数
+            label: 子图标签
+        """
+        indices = np.asarray(indices, dtype=np.intp)
+        # 页表项的物理页号按数组整体计算，只格式化要显示的单元
+        page_numbers = region.page_numbers()[indices].tolist()
 
+        cells = []
+        for index, page_num in zip(indices.tolist(), page_numbers):
+            node_val = region.value_text(index)
+            if node_val == DISPLAY_NULL_VAL:
+                node_val = PADDED_NULL_DISPLAY
+            page_num_display = f"0x{page_num:x}" if page_num != -1 else ""
+            cells.append((region.address_text(index), node_val, index, page_num_display))
+
+        return MemoryDotGenerator._cells_to_dot(cells, len(str(len(region) - 1)), prefix, theme, columns, label)
+
+    @staticmethod
+    def _cells_to_dot(cells: List[Tuple[str, str, int, str]], index_width: int, prefix: str, theme: str,
+                      columns: int, label: Optional[str], is_register: bool = False) -> str:
+        """
+        把单元列表排成矩阵并生成 DOT
+
+        Args:
+            cells: (地址, 值, 原始下标, 物理页号) 显示字符串列表
+            index_width: 下标的显示宽度
+        """
         # 获取主题颜色配置
         colors = get_theme_colors(theme)
 
@@ -99,18 +188,8 @@ class MemoryDotGenerator:
         cluster_color = colors["cluster_color"]
         addr_border = border_color
 
-        # 计算最大索引值所需的数字位数
-        if original_indices:
-            # 如果有原始下标信息，使用原始下标中的最大值
-            max_index = max(original_indices.values()) if original_indices else len(addresses) - 1
-        else:
-            # 否则使用当前地址列表的最大索引
-            max_index = len(addresses) - 1
-        index_width = len(str(max_index))
-
-        def make_node(name: str, node_addr: str, node_val: str, port1_name: str, port2_name: str, index: int) -> str:
-            if node_val == DISPLAY_NULL_VAL:
-                node_val = PADDED_NULL_DISPLAY
+        def make_node(name: str, node_addr: str, node_val: str, port1_name: str, port2_name: str, index: int,
+                      page_num_display: str) -> str:
             # 根据最大索引值动态计算宽度，在方括号前添加空格对齐
             if is_register:
                 # 寄存器：索引显示为空格
@@ -119,14 +198,6 @@ class MemoryDotGenerator:
                 # 内存：正常显示索引
                 index_display = f"{' ' * (index_width - len(str(index)))}[{index}]"
 
-            # 根据是否为寄存器选择不同的页号提取方法
-            if is_register:
-                # 寄存器：使用寄存器专用的页号提取函数
-                page_num_display = extract_register_page_number_display(node_addr, node_val)
-            else:
-                # 内存：使用页表项的页号提取函数
-                page_num_display = extract_physical_page_number(node_val)
-
             if not page_num_display:
                 page_num_display = " "
 
@@ -144,13 +215,12 @@ class MemoryDotGenerator:
             </TABLE>
         >];'''
 
-        all_addrs = addresses.copy()
         cols = columns  # 使用传入的列数参数
-        rows = math.ceil(len(all_addrs) / cols) if all_addrs else 0
+        rows = math.ceil(len(cells) / cols) if cells else 0
 
-        # 基于传入的地址列表生成矩阵（已经过滤）
+        # 基于传入的单元列表生成矩阵（已经过滤）
         matrix = [
-            all_addrs[r * cols: min((r + 1) * cols, len(all_addrs))]
+            cells[r * cols: min((r + 1) * cols, len(cells))]
             for r in range(rows)
         ]
         dot_lines = [
@@ -167,18 +237,12 @@ class MemoryDotGenerator:
             dot_lines.append("")
         # 节点生成，为每个内存单元添加从0开始的连续下标
         for r, row in enumerate(matrix):
-            for c, addr in enumerate(row):
+            for c, (addr, node_val, original_index, page_num_display) in enumerate(row):
                 idx = r * cols + c
                 port2 = 'val'
-                # 使用传入的原始下标，如果没有则使用地址在当前列表中的索引
-                if original_indices and addr in original_indices:
-                    original_index = original_indices[addr]
-                else:
-                    original_index = addresses.index(addr)
                 dot_lines.append(make_node(
-                    f"{prefix}node{idx}", addr,
-                    memory.get(addr, DISPLAY_NULL_VAL),
-                    'addr', port2, original_index
+                    f"{prefix}node{idx}", addr, node_val,
+                    'addr', port2, original_index, page_num_display
                 ))
         dot_lines.append("")
         # 水平对齐
@@ -195,7 +259,7 @@ class MemoryDotGenerator:
             for r in range(rows - 1):
                 idx1 = r * cols + c
                 idx2 = (r + 1) * cols + c
-                if idx2 < len(all_addrs):
+                if idx2 < len(cells):
                     dot_lines.append(
                         f"        {prefix}node{idx1} -> {prefix}node{idx2} "
                         "[style=invis];"
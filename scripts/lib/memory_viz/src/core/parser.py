@@ -2,35 +2,34 @@
 GDB 输出解析模块
 解析 GDB 内存输出为结构化数据
 """
-from typing import List, Dict, Tuple, Any, Optional
+import json
+from pathlib import Path
+from typing import List, Dict, Tuple, Any, Optional, Union
 
 from .config import (
-    MEMORY_PATTERN_COMPILED, GROUP_CMD_PATTERN_COMPILED, REGISTER_CMD_PATTERN_COMPILED,
+    GROUP_CMD_PATTERN_COMPILED, REGISTER_CMD_PATTERN_COMPILED,
     REGISTER_VALUE_PATTERN_COMPILED, REGISTER_LINE_PATTERN_COMPILED, ADDRESS_PATTERN_COMPILED,
-    PAGE_SHIFT, DISPLAY_NULL_VAL, MEMORY_STEP, SATP_PPN_MASK, SATP_REGISTER_NAME
+    PAGE_SHIFT, DISPLAY_NULL_VAL, SATP_PPN_MASK, SATP_REGISTER_NAME
 )
+from .region import MemoryRegion
 
 
 # 预编译的正则表达式已从 config.py 导入
 
 
+def parse_gdb_region(lines: List[str]) -> MemoryRegion:
+    """将 GDB 内存输出解析为以数组保存地址和值的内存区域"""
+    return MemoryRegion.from_gdb_lines(lines)
+
+
 def parse_gdb_output(lines: List[str]) -> Tuple[Dict[str, str], List[str]]:
-    """将 GDB 内存输出解析为地址到值的映射，以及按访问顺序排列的地址列表"""
-    memory: Dict[str, str] = {}
-    addresses: List[str] = []
-    for line in lines:
-        match = MEMORY_PATTERN_COMPILED.match(line)
-        if not match:
-            continue
-        addr_int = int(match.group(1), 16)
-        addr = f"0x{addr_int:x}"
-        values = match.group(2).split()
-        for v in values:
-            addresses.append(addr)
-            memory[addr] = f"0x{int(v, 16):x}"
-            # 地址递增一个内存单元
-            addr_int += MEMORY_STEP
-            addr = f"0x{addr_int:x}"
+    """将 GDB 内存输出解析为地址到值的映射，以及按访问顺序排列的地址列表
+
+    每个单元都要格式化为字符串，生成 DOT 时应使用 parse_gdb_region。
+    """
+    region = parse_gdb_region(lines)
+    addresses = [region.address_text(i) for i in range(len(region))]
+    memory = {addr: region.value_text(i) for i, addr in enumerate(addresses)}
     return memory, addresses
 
 
@@ -52,6 +51,62 @@ def parse_gdb_groups(lines: List[str]) -> List[Dict[str, Any]]:
     return groups
 
 
+def _parse_int(value: Union[int, str]) -> int:
+    """附属文件中的数值可以是整数或 "0x..." 字符串"""
+    return value if isinstance(value, int) else int(value, 0)
+
+
+def load_binary_groups(sidecar: Union[str, Path]) -> List[Dict[str, Any]]:
+    """读取二进制转储的附属文件，把其中的每个转储映射为内存组
+
+    附属文件为 JSON，文件路径相对于附属文件所在目录：
+        {
+          "dumps": [
+            {"file": "pt.bin", "base": "0x83a5b000"},
+            {"file": "pool.bin", "base": "0x83a00000", "offset": 4096, "count": 4096, "split": 512}
+          ]
+        }
+    offset 为字节偏移，count 为单元数（省略时到文件末尾），
+    split 把一个转储按每组 split 个单元拆成多组（如按页拆分整个页表池）。
+
+    每组的命令文本按 `(gdb) x /Ng 0xADDR` 合成，与文本输出的组一样用于标签和页号映射。
+
+    Returns:
+        与 parse_gdb_groups 相同结构的组列表，其中 'region' 为映射好的内存区域、'lines' 为空
+
+    Raises:
+        OSError: 无法读取附属文件或转储
+        ValueError: 附属文件格式错误
+    """
+    sidecar = Path(sidecar)
+    try:
+        spec = json.loads(sidecar.read_text(encoding='utf-8'))
+        dumps = spec['dumps']
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"无法解析附属文件 {sidecar}: {e}") from e
+
+    groups: List[Dict[str, Any]] = []
+    for dump in dumps:
+        try:
+            region = MemoryRegion.from_binary(
+                sidecar.parent / dump['file'],
+                _parse_int(dump['base']),
+                _parse_int(dump.get('offset', 0)),
+                _parse_int(dump['count']) if 'count' in dump else None,
+            )
+            split = _parse_int(dump.get('split', 0))
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"附属文件 {sidecar} 中的转储描述无效: {dump!r}") from e
+        if split < 0:
+            raise ValueError(f"附属文件 {sidecar} 中的 split 不能为负数: {dump!r}")
+        split = split or max(len(region), 1)
+
+        for start in range(0, len(region), split):
+            part = region.slice(start, start + split)
+            groups.append({'cmd': f"(gdb) x /{len(part)}g 0x{part.base:X}", 'lines': [], 'region': part})
+    return groups
+
+
 def is_register_command(line: str) -> bool:
     """检测是否为寄存器命令行"""
     return bool(REGISTER_CMD_PATTERN_COMPILED.match(line.strip()))
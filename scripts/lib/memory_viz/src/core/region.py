@@ -0,0 +1,153 @@
+"""
+内存区域模块
+以 numpy uint64 数组保存 GDB 内存输出，空行过滤、页表项有效位检查和物理页号提取都按数组整体计算，
+只在生成 DOT 时把实际显示的单元格式化为字符串
+
+文本输出（x /512g）逐行解析；二进制转储（dump binary memory）通过 mmap 直接映射为数组
+"""
+import math
+import mmap
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .config import BINARY_DUMP_DTYPE, MEMORY_PATTERN_COMPILED, MEMORY_STEP, PTE_PPN_SHIFT
+
+# 页表项 V 位（最低位）
+PTE_VALID_BIT = 0x1
+
+
+@dataclass(frozen=True)
+class MemoryRegion:
+    """
+    一组 GDB 内存输出（如一次 x /512g 的结果）
+
+    Attributes:
+        addresses: 每个内存单元的地址（uint64），通常是起始地址按 MEMORY_STEP 递增
+        values: 每个内存单元的值（uint64），与 addresses 一一对应
+    """
+    addresses: np.ndarray
+    values: np.ndarray
+
+    @classmethod
+    def from_gdb_lines(cls, lines: Iterable[str]) -> 'MemoryRegion':
+        """
+        解析 GDB 内存输出行，如 0x83a5b000:	0x0000000000000000	0x0000000000000000
+
+        每行的起始地址加上单元序号乘以 MEMORY_STEP 得到各单元的地址，不匹配的行被忽略。
+
+        Raises:
+            ValueError: 值不是十六进制数
+        """
+        addresses: List[int] = []
+        values: List[str] = []
+        for line in lines:
+            match = MEMORY_PATTERN_COMPILED.match(line)
+            if not match:
+                continue
+            addr_int = int(match.group(1), 16)
+            words = match.group(2).split()
+            addresses.extend(range(addr_int, addr_int + len(words) * MEMORY_STEP, MEMORY_STEP))
+            values.extend(words)
+        return cls(
+            np.array(addresses, dtype=np.uint64),
+            np.fromiter((int(v, 16) for v in values), dtype=np.uint64, count=len(values)),
+        )
+
+    @classmethod
+    def from_binary(cls, path: Union[str, Path], base: int, offset: int = 0,
+                    count: Optional[int] = None) -> 'MemoryRegion':
+        """
+        映射 GDB `dump binary memory` 写出的二进制转储，不解析、不复制
+
+        值数组直接是 mmap 上的 numpy.frombuffer 视图，地址由基地址按 MEMORY_STEP 递增得到。
+
+        Args:
+            path: 转储文件
+            base: 转储中第 offset 字节对应的内存地址
+            offset: 起始字节偏移（须为 8 的倍数）
+            count: 单元数，为 None 时映射到文件末尾（不足 8 字节的尾部被忽略）
+
+        Raises:
+            OSError: 无法打开或映射文件
+            ValueError: 偏移未对齐或超出文件范围
+        """
+        itemsize = np.dtype(BINARY_DUMP_DTYPE).itemsize
+        if offset % itemsize:
+            raise ValueError(f"偏移 {offset} 不是 {itemsize} 的倍数: {path}")
+
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            available = max(size - offset, 0) // itemsize
+            if count is None:
+                count = available
+            if count > available:
+                raise ValueError(f"{path} 只有 {available} 个单元，少于要求的 {count} 个")
+            if count == 0:
+                values = np.empty(0, dtype=BINARY_DUMP_DTYPE)
+            else:
+                # 数组持有映射的引用，关闭文件后映射仍然有效
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                values = np.frombuffer(mapped, dtype=BINARY_DUMP_DTYPE, count=count, offset=offset)
+
+        addresses = np.uint64(base) + np.arange(count, dtype=np.uint64) * np.uint64(MEMORY_STEP)
+        return cls(addresses, values)
+
+    def slice(self, start: int, stop: int) -> 'MemoryRegion':
+        """第 start 到 stop 个单元组成的子区域（共享底层数组）"""
+        return MemoryRegion(self.addresses[start:stop], self.values[start:stop])
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def base(self) -> int:
+        """起始地址"""
+        return int(self.addresses[0])
+
+    def address_text(self, index: int) -> str:
+        """单元地址的显示字符串，如 0x83a5b000"""
+        return f"0x{int(self.addresses[index]):x}"
+
+    def value_text(self, index: int) -> str:
+        """单元值的显示字符串，如 0x20e97801，零值为 0x0"""
+        return f"0x{int(self.values[index]):x}"
+
+    def null_mask(self, null_values: Sequence[int] = (0,)) -> np.ndarray:
+        """值为空的单元"""
+        return np.isin(self.values, np.array(null_values, dtype=np.uint64))
+
+    def valid_mask(self) -> np.ndarray:
+        """V 位为 1 的单元（有效页表项）"""
+        return (self.values & np.uint64(PTE_VALID_BIT)) != 0
+
+    def page_numbers(self) -> np.ndarray:
+        """
+        各单元作为页表项指向的物理页号
+
+        Returns:
+            int64 数组，不是有效页表项的单元为 -1
+        """
+        ppns = (self.values >> np.uint64(PTE_PPN_SHIFT)).astype(np.int64)
+        return np.where(self.valid_mask(), ppns, -1)
+
+    def nonnull_row_indices(self, columns: int, null_values: Sequence[int] = (0,)) -> np.ndarray:
+        """
+        按 columns 列排成矩阵后，去掉所有值都为空的行（第一行始终保留）
+
+        Returns:
+            保留的单元序号（升序）
+        """
+        count = len(self)
+        if count == 0:
+            return np.empty(0, dtype=np.intp)
+        rows = math.ceil(count / columns)
+        # 最后一行不足的部分补为空值
+        mask = np.ones(rows * columns, dtype=bool)
+        mask[:count] = self.null_mask(null_values)
+        keep = ~mask.reshape(rows, columns).all(axis=1)
+        keep[0] = True
+        return np.flatnonzero(np.repeat(keep, columns)[:count])
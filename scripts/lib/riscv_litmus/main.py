@@ -9,8 +9,11 @@ import pathlib
 import shutil
 import sys
 
+from scripts.lib.common.cache import add_cache_arguments, cache_from_args
 from scripts.lib.litmus.colors import THEME_CHOICES
+from scripts.lib.litmus.svg import DEFAULT_NEATO_JOBS
 from scripts.lib.litmus.utils import eprint
+from .manifest import ManifestSet
 from .processor import find_dot_files, process_dot_file
 
 
@@ -27,8 +30,11 @@ def parse_args():
   # 只处理 light 主题
   scripts/lib/riscv_litmus/main.py --theme light
   
-  # 指定源目录
+  # 只处理指定的源目录（可以重复）
   scripts/lib/riscv_litmus/main.py --source-dir docs/example/_assets/dot
+
+默认处理 docs/ 下所有 _assets/dot/*.txt，SVG 生成到同级的 _assets/images/{theme}/ 中；
+每个源目录中的 .riscv_litmus.json 清单记录源文件哈希和生成的 SVG，未变化的文件直接跳过。
         """
     )
 
@@ -42,8 +48,9 @@ def parse_args():
     parser.add_argument(
         '--source-dir',
         type=pathlib.Path,
-        default=pathlib.Path("docs/example/_assets/dot"),
-        help='源DOT文件目录 (默认: docs/example/_assets/dot)'
+        action='append',
+        dest='source_dirs',
+        help='源DOT文件目录，可以重复指定 (默认: docs/ 下所有 _assets/dot 目录)'
     )
 
     parser.add_argument(
@@ -53,6 +60,21 @@ def parse_args():
         help='SVG缩放因子 (默认: 2.0 - 2倍大小)'
     )
 
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=DEFAULT_NEATO_JOBS,
+        help=f'并行运行的 neato 进程数 (默认: {DEFAULT_NEATO_JOBS})'
+    )
+
+    parser.add_argument(
+        '--no-relayout',
+        action='store_true',
+        help='坐标换算为点后直接用 neato -n2 渲染，不再运行布局'
+    )
+
+    add_cache_arguments(parser)
+
     return parser.parse_args()
 
 
@@ -82,19 +104,23 @@ def main() -> int:
             themes = [args.theme]
 
         eprint(f"[INFO] 生成主题: {', '.join(themes)}")
-        eprint(f"[INFO] 源目录: {args.source_dir}")
+        if args.source_dirs:
+            eprint(f"[INFO] 源目录: {', '.join(str(source_dir) for source_dir in args.source_dirs)}")
+        else:
+            eprint("[INFO] 源目录: docs/**/_assets/dot")
         eprint(f"[INFO] 缩放因子: {args.scale}x")
 
         # 检查必要工具
         which_or_fail("neato", fatal=False)
 
         # 检查源目录是否存在
-        if not args.source_dir.is_dir():
-            eprint(f"[ERROR] 源目录不存在: {args.source_dir}")
-            return 1
+        for source_dir in args.source_dirs or []:
+            if not source_dir.is_dir():
+                eprint(f"[ERROR] 源目录不存在: {source_dir}")
+                return 1
 
         # 查找DOT文件
-        dot_files = find_dot_files(args.source_dir, themes)
+        dot_files = find_dot_files(themes, args.source_dirs)
 
         if not dot_files:
             eprint("[INFO] 未找到任何DOT文件")
@@ -102,13 +128,17 @@ def main() -> int:
 
         eprint(f"[INFO] 找到 {len(dot_files)} 个DOT文件")
 
+        cache = cache_from_args('riscv_litmus', args)
+        manifests = ManifestSet(reuse=cache.enabled)
+
         # 处理每个文件
         total_exported = 0
         processed_files = 0
         theme_stats = {theme: 0 for theme in themes}
 
         for dot_file, theme_dirs in dot_files:
-            exported = process_dot_file(dot_file, theme_dirs, args.scale)
+            exported = process_dot_file(dot_file, theme_dirs, args.scale, cache, max(1, args.jobs),
+                                        not args.no_relayout, manifests)
             if exported > 0:
                 total_exported += exported
                 processed_files += 1
@@ -121,6 +151,8 @@ def main() -> int:
         theme_summary = ', '.join([f"{theme}: {count}" for theme, count in theme_stats.items()])
         eprint(
             f"[SUMMARY] 处理 {processed_files}/{len(dot_files)} 个文件，导出 {total_exported} 个 SVG ({theme_summary})")
+        manifests.save()
+        eprint(f"[SUMMARY] {cache.summary()}")
 
         return 0 if total_exported > 0 else 1
 
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+RISC-V Litmus 目录清单模块
+每个 _assets/dot 目录保存一份清单，记录其中每个源文件的哈希和已生成的 SVG
+
+清单与构建缓存互补：缓存命中仍要为每个主题复制输出文件，
+而源文件、参数和输出都未变化时，清单可以直接跳过该文件，不读取、不解析、不复制。
+
+清单格式（<源目录>/.riscv_litmus.json）：
+    {
+      "version": 1,
+      "sources": {
+        "litmus_sb.txt": {
+          "sha256": "...", "size": 1234, "mtime_ns": ...,
+          "themes": {
+            "light": {"params": "...", "outputs": [{"path": "...", "size": ..., "mtime_ns": ...}]}
+          }
+        }
+      }
+    }
+outputs 中的路径相对于源目录；源文件的大小和修改时间未变时不重新计算哈希。
+"""
+
+import hashlib
+import os
+import pathlib
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from scripts.lib.common.cache import code_fingerprint, fingerprint, read_json, tool_version, write_json_atomic
+from scripts.lib.litmus.utils import eprint
+
+# 清单文件名（位于每个 DOT 源目录中）
+MANIFEST_FILE = '.riscv_litmus.json'
+
+# 清单格式版本，格式变化时递增
+MANIFEST_VERSION = 1
+
+
+def _file_sha256(path: pathlib.Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _stat_record(path: pathlib.Path) -> Dict[str, int]:
+    stat = path.stat()
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def manifest_params(params: Any, theme: Any, tools: Iterable[str], code: Iterable[pathlib.Path]) -> str:
+    """
+    影响输出的参数、主题配置、工具版本和生成器代码的组合哈希
+
+    组成与 BuildCache.make_key 中除源内容之外的部分一致。
+    """
+    return fingerprint({
+        'params': params,
+        'theme': theme,
+        'tools': {name: tool_version(name) for name in tools},
+        'code': [code_fingerprint(directory) for directory in code],
+    })
+
+
+class DotManifest:
+    """
+    单个 DOT 源目录的清单（线程安全）
+
+    Attributes:
+        directory: DOT 源目录
+        path: 清单文件路径
+        reuse: 是否跳过未变化的源文件；为 False 时（如 --no-cache）只记录不跳过
+    """
+
+    def __init__(self, directory: pathlib.Path, reuse: bool = True):
+        self.directory = directory
+        self.path = directory / MANIFEST_FILE
+        self.reuse = reuse
+        data = read_json(self.path)
+        if data.get('version') != MANIFEST_VERSION:
+            data = {}
+        self._sources: Dict[str, Dict] = data.get('sources', {})
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _source_hash(self, dot_file: pathlib.Path, record: Optional[Dict]) -> str:
+        """源文件哈希，大小和修改时间与清单一致时直接使用记录的哈希"""
+        stat = _stat_record(dot_file)
+        if record and record.get('size') == stat['size'] and record.get('mtime_ns') == stat['mtime_ns']:
+            return record['sha256']
+        stamp = (dot_file.name, stat['size'], stat['mtime_ns'])
+        if stamp not in self._hashes:
+            self._hashes[stamp] = _file_sha256(dot_file)
+        return self._hashes[stamp]
+
+    def outputs(self, dot_file: pathlib.Path, theme: str, params: str) -> Optional[List[pathlib.Path]]:
+        """
+        源文件、参数和输出都未变化时返回已生成的输出文件
+
+        Args:
+            dot_file: DOT 源文件
+            theme: 主题
+            params: manifest_params 的结果
+
+        Returns:
+            输出文件路径列表，需要重新生成时返回 None
+        """
+        if not self.reuse:
+            return None
+        with self._lock:
+            record = self._sources.get(dot_file.name)
+            if record is None:
+                return None
+            try:
+                if self._source_hash(dot_file, record) != record.get('sha256'):
+                    return None
+            except OSError:
+                return None
+            entry = record.get('themes', {}).get(theme)
+            if entry is None or entry.get('params') != params:
+                return None
+            outputs = entry.get('outputs', [])
+
+        paths = []
+        for item in outputs:
+            path = self.directory / item['path']
+            try:
+                if _stat_record(path) != {'size': item['size'], 'mtime_ns': item['mtime_ns']}:
+                    return None
+            except OSError:
+                return None
+            paths.append(path)
+        return paths if paths else None
+
+    def record(self, dot_file: pathlib.Path, theme: str, params: str, outputs: Iterable[pathlib.Path]) -> None:
+        """
+        记录源文件某个主题完整成功的输出
+
+        Args:
+            dot_file: DOT 源文件
+            theme: 主题
+            params: manifest_params 的结果
+            outputs: 输出文件路径
+        """
+        try:
+            items = []
+            for path in outputs:
+                relative = os.path.relpath(path, self.directory)
+                items.append({'path': pathlib.PurePath(relative).as_posix(), **_stat_record(path)})
+            stat = _stat_record(dot_file)
+        except OSError as e:
+            eprint(f"[WARN] 无法记录清单 {dot_file.name}: {e}")
+            return
+
+        with self._lock:
+            record = self._sources.get(dot_file.name)
+            sha256 = self._source_hash(dot_file, record)
+            if record is None or record.get('sha256') != sha256:
+                record = {'themes': {}}
+            record.update(sha256=sha256, **stat)
+            record.setdefault('themes', {})[theme] = {'params': params, 'outputs': items}
+            self._sources[dot_file.name] = record
+            self._dirty = True
+
+    def save(self) -> None:
+        """写回清单，去掉已不存在的源文件"""
+        with self._lock:
+            for name in [name for name in self._sources if not (self.directory / name).is_file()]:
+                del self._sources[name]
+                self._dirty = True
+            if not self._dirty:
+                return
+            try:
+                write_json_atomic(self.path, {'version': MANIFEST_VERSION, 'sources': self._sources})
+            except OSError as e:
+                eprint(f"[WARN] 无法写入清单 {self.path}: {e}")
+                return
+            self._dirty = False
+
+
+class ManifestSet:
+    """
+    按源目录分组的清单集合（线程安全）
+    """
+
+    def __init__(self, reuse: bool = True):
+        self.reuse = reuse
+        self._manifests: Dict[pathlib.Path, DotManifest] = {}
+        self._lock = threading.Lock()
+
+    def get(self, dot_file: pathlib.Path) -> DotManifest:
+        """返回 DOT 文件所在目录的清单，首次使用时加载"""
+        directory = dot_file.parent
+        with self._lock:
+            if directory not in self._manifests:
+                self._manifests[directory] = DotManifest(directory, self.reuse)
+            return self._manifests[directory]
+
+    def save(self) -> None:
+        """写回所有清单"""
+        with self._lock:
+            manifests = list(self._manifests.values())
+        for manifest in manifests:
+            manifest.save()
@@ -4,133 +4,150 @@ RISC-V Litmus DOT 文件处理器
 复用现有 litmus 模块逻辑，处理已有的 DOT 文件并生成主题化 SVG
 """
 
+import functools
 import pathlib
 import re
-from typing import List, Tuple
+from typing import Iterable, List, Optional, Tuple
 
+from scripts.lib.common.asset_index import get_asset_index
+from scripts.lib.common.cache import BuildCache
 from scripts.lib.common.utils import ensure_dir
-from scripts.lib.litmus.dot import apply_theme_colors_to_dot, parse_dot_graphs
-from scripts.lib.litmus.svg import run_neato
+from scripts.lib.litmus.colors import LITMUS_THEME_COLORS
+from scripts.lib.litmus.dot import apply_theme_colors_to_dot
+from scripts.lib.litmus.dot_lexer import iter_dot_graphs, rewrite_attributes
+from scripts.lib.litmus.svg import run_neato_many
 from scripts.lib.litmus.utils import eprint
-
-
-def scale_dot_content(dot_content: str, scale_factor: float = 2.0) -> str:
+from .manifest import ManifestSet, manifest_params
+from .transform import GEOMETRY_ATTRIBUTES, Affine, to_points, transform_value
+
+# 影响输出的外部工具和生成器代码目录（参与缓存键计算）
+CACHE_TOOLS = ['neato']
+CACHE_CODE_DIRS = [
+    pathlib.Path(__file__).parent,
+    pathlib.Path(__file__).parent.parent / 'litmus',
+    pathlib.Path(__file__).parent.parent / 'common',
+]
+
+
+# 调整为与原始 litmus 设置一致的属性值：属性名 -> {原值: 新值}
+# 原始litmus使用fontsize=14，而我们的DOT文件使用fontsize=8（节点）和fontsize=11（边标签）
+# 原始litmus使用penwidth="2.000000"，而我们的DOT文件使用penwidth="3.000000"
+# 原始litmus使用arrowsize="1.000000"，而我们的DOT文件使用arrowsize="0.666700"
+LITMUS_ATTRIBUTE_OVERRIDES = {
+    'fontsize': {'8': '14', '11': '14'},
+    'penwidth': {'"3.000000"': '"2.000000"'},
+    'arrowsize': {'"0.666700"': '"1.000000"'},
+}
+
+# 缩放时改写的所有属性
+SCALED_ATTRIBUTES = frozenset(['label', *GEOMETRY_ATTRIBUTES, *LITMUS_ATTRIBUTE_OVERRIDES])
+
+
+def scale_dot_content(dot_content: str, scale_factor: float = 2.0, transform: Optional[Affine] = None,
+                      size_scale: Optional[Tuple[float, float]] = None) -> str:
     """
     缩放DOT内容中的位置和尺寸参数，但保持线条和字体大小不变
     
+    所有几何属性（节点位置、边样条、标签位置、bb、节点尺寸）和样式调整在一次词法遍历中完成。
+
     Args:
         dot_content: 原始DOT内容
         scale_factor: 缩放因子，默认2.0（2倍）
+        transform: 坐标变换，为 None 时按 scale_factor 等比缩放
+        size_scale: 节点尺寸的缩放，为 None 时使用 transform 的坐标轴缩放
     
     Returns:
         缩放后的DOT内容
     """
-    modified_content = dot_content
-
-    # 缩放节点位置坐标 pos="x,y!"
-    def scale_pos(match):
-        x, y = match.groups()
-        new_x = float(x) * scale_factor
-        new_y = float(y) * scale_factor
-        return f'pos="{new_x:.6f},{new_y:.6f}!"'
-
-    modified_content = re.sub(
-        r'pos="([0-9.]+),([0-9.]+)!"',
-        scale_pos,
-        modified_content
-    )
-
-    # 缩放节点尺寸 width="x" height="y"，但不缩放其他属性
-    def scale_width(match):
-        value = float(match.group(1))
-        new_value = value * scale_factor
-        return f'width="{new_value:.6f}"'
-
-    def scale_height(match):
-        value = float(match.group(1))
-        new_value = value * scale_factor
-        return f'height="{new_value:.6f}"'
-
-    modified_content = re.sub(
-        r'\bwidth="([0-9.]+)"',
-        scale_width,
-        modified_content
-    )
-
-    modified_content = re.sub(
-        r'\bheight="([0-9.]+)"',
-        scale_height,
-        modified_content
-    )
-
-    # 调整字体大小以匹配原始litmus设置
-    # 原始litmus使用fontsize=14，而我们的DOT文件使用fontsize=8和fontsize=11
-    # 将fontsize=8调整为fontsize=14 (节点字体)
-    modified_content = re.sub(
-        r'fontsize=8\b',
-        'fontsize=14',
-        modified_content
-    )
-
-    # 将fontsize=11调整为fontsize=14 (边标签字体)
-    modified_content = re.sub(
-        r'fontsize=11\b',
-        'fontsize=14',
-        modified_content
-    )
-
-    # 调整线条宽度以匹配原始litmus设置
-    # 原始litmus使用penwidth="2.000000"，而我们的DOT文件使用penwidth="3.000000"
-    modified_content = re.sub(
-        r'penwidth="3\.000000"',
-        'penwidth="2.000000"',
-        modified_content
-    )
-
-    # 调整箭头大小以匹配原始litmus设置  
-    # 原始litmus使用arrowsize="1.000000"，而我们的DOT文件使用arrowsize="0.666700"
-    modified_content = re.sub(
-        r'arrowsize="0\.666700"',
-        'arrowsize="1.000000"',
-        modified_content
-    )
-
-    # 特殊处理LaTeX样式变量（如 $v$）：去除$符号
-    def replace_latex_var(match):
-        full_label = match.group(1)  # 整个label内容
-        # 在label内容中查找并替换所有$变量$，只去除$符号
-        processed_label = re.sub(r'\$([^$]+)\$', r'\1', full_label)
-        return f'label="{processed_label}"'
-
-    # 匹配并处理包含LaTeX变量的label
-    modified_content = re.sub(
-        r'label="([^"]*\$[^"]*)"',
-        replace_latex_var,
-        modified_content
-    )
+    if transform is None:
+        transform = Affine.scale(scale_factor)
+
+    def rewrite(key: str, value: str) -> Optional[str]:
+        # 缩放节点位置、边样条、标签位置、bb 和节点尺寸
+        if key in GEOMETRY_ATTRIBUTES:
+            return transform_value(key, value, transform, size_scale)
+
+        # 调整字体大小、线条宽度和箭头大小以匹配原始litmus设置
+        if key in LITMUS_ATTRIBUTE_OVERRIDES:
+            return LITMUS_ATTRIBUTE_OVERRIDES[key].get(value)
+
+        # 特殊处理LaTeX样式变量（如 $v$）：去除$符号
+        if key == 'label' and value.startswith('"') and '$' in value:
+            return re.sub(r'\$([^$]+)\$', r'\1', value)
+
+        return None
 
     # 保持字体大小不变 - 移除字体缩放
     # 保持线条宽度不变 - 移除线条缩放
     # 保持箭头大小不变 - 移除箭头缩放
+    return rewrite_attributes(dot_content, rewrite, SCALED_ATTRIBUTES)
+
+
+@functools.lru_cache(maxsize=64)
+def _scaled_graphs(dot_file: pathlib.Path, mtime_ns: int, size: int,
+                   scale_factor: float, points: bool) -> Tuple[Tuple[int, str], ...]:
+    transform = size_scale = None
+    if points:
+        transform, size_scale = to_points(scale_factor)
+    graphs = []
+    for i, graph_content in enumerate(iter_dot_graphs(dot_file), 1):
+        # 确保图形格式正确
+        if not graph_content.rstrip().endswith('}'):
+            continue
+
+        # 应用缩放处理（使SVG变为指定倍数大小），缩放与主题无关
+        if scale_factor != 1.0 or points:
+            graph_content = scale_dot_content(graph_content, scale_factor, transform, size_scale)
+        graphs.append((i, graph_content))
+    return tuple(graphs)
+
 
-    return modified_content
+def load_scaled_graphs(dot_file: pathlib.Path, scale_factor: float = 2.0,
+                       points: bool = False) -> Tuple[Tuple[int, str], ...]:
+    """
+    读取、解析并缩放 DOT 文件中的所有图
+
+    每个文件只读取和缩放一次，结果按文件路径、修改时间、大小和缩放因子缓存，
+    同一进程中再次处理未修改的文件（如监视模式下的重建）时直接复用。
+
+    Args:
+        dot_file: DOT文件路径
+        scale_factor: 缩放因子
+        points: 同时把坐标从英寸换算为点，结果可以直接交给 neato -n2 渲染
+
+    Returns:
+        (图序号, 缩放后的图内容) 元组，序号从 1 开始
+
+    Raises:
+        OSError: 无法读取文件
+    """
+    stat = dot_file.stat()
+    return _scaled_graphs(dot_file, stat.st_mtime_ns, stat.st_size, scale_factor, points)
 
 
-def find_dot_files(source_dir: pathlib.Path, themes: List[str]) -> List[
+def find_dot_files(themes: List[str], source_dirs: Optional[Iterable[pathlib.Path]] = None) -> List[
     Tuple[pathlib.Path, List[Tuple[str, pathlib.Path]]]]:
-    """查找已存在的DOT文件（.txt后缀）及其输出目录"""
+    """
+    查找已存在的DOT文件（.txt后缀）及其输出目录
 
-    # 目标输出目录：docs/example/_assets/images/
-    target_base = pathlib.Path("docs/example/_assets/images")
+    输出放在源目录旁边：docs/section/_assets/dot/x.txt 的 SVG 生成到
+    docs/section/_assets/images/{theme}/x/ 中。
 
-    dot_files = []
+    Args:
+        themes: 主题列表
+        source_dirs: 源目录列表，为 None 时从共享的资产索引中取出所有 docs/**/_assets/dot/*.txt
+    """
+    if source_dirs is None:
+        txt_files = get_asset_index().files('dot')
+    else:
+        txt_files = sorted(txt_file for source_dir in source_dirs for txt_file in source_dir.glob("*.txt"))
 
-    # 查找所有.txt文件（实际是DOT格式）
-    for txt_file in source_dir.glob("*.txt"):
+    dot_files = []
+    for txt_file in txt_files:
         # 为每个主题创建输出目录
         theme_dirs = []
         for theme in themes:
-            theme_output_dir = target_base / theme
+            theme_output_dir = txt_file.parent.parent / "images" / theme
             theme_dirs.append((theme, theme_output_dir))
 
         dot_files.append((txt_file, theme_dirs))
@@ -139,63 +156,110 @@ def find_dot_files(source_dir: pathlib.Path, themes: List[str]) -> List[
 
 
 def process_dot_file(dot_file: pathlib.Path, theme_dirs: List[Tuple[str, pathlib.Path]],
-                     scale_factor: float = 2.0) -> int:
+                     scale_factor: float = 2.0, cache: Optional[BuildCache] = None, jobs: int = 1,
+                     relayout: bool = True, manifests: Optional[ManifestSet] = None) -> int:
     """处理单个DOT文件，生成不同主题的SVG
     
     Args:
         dot_file: DOT文件路径
         theme_dirs: 主题输出目录列表
         scale_factor: 缩放因子，默认2.0（2倍大小）
+        cache: 构建缓存，未变化的主题直接从缓存恢复
+        jobs: 并行运行的 neato 进程数
+        relayout: 为 False 时缩放后的坐标换算为点，直接用 neato -n2 渲染，不再运行布局
+        manifests: 源目录清单，源文件、参数和输出都未变化的主题直接跳过
     """
 
     total_exported = 0
 
+    params = {'scale': scale_factor, 'relayout': relayout}
+    manifest = manifests.get(dot_file) if manifests is not None else None
+
+    # 先跳过清单中未变化的主题，再从缓存恢复，剩下的主题才需要生成
+    pending = []
     for theme, output_dir in theme_dirs:
         # 为当前文件和主题创建子目录
         test_output_dir = output_dir / dot_file.stem
-        ensure_dir(str(test_output_dir))
-
-        # 读取原始DOT内容
-        try:
-            dot_content = dot_file.read_text(encoding="utf-8")
-        except Exception as e:
-            eprint(f"[WARN] 无法读取文件 {dot_file.name}: {e}")
-            continue
 
-        # 解析DOT图形（通常只有一个图形）
-        graphs = parse_dot_graphs(dot_file)
-        if not graphs:
-            eprint(f"[WARN] 未找到图形数据: {dot_file.name}")
-            continue
-
-        exported = 0
-        for i, graph_lines in enumerate(graphs, 1):
-            if not graph_lines:
+        digest = None
+        if manifest is not None:
+            digest = manifest_params(params, LITMUS_THEME_COLORS[theme], CACHE_TOOLS, CACHE_CODE_DIRS)
+            outputs = manifest.outputs(dot_file, theme, digest)
+            if outputs is not None:
+                exported = sum(1 for path in outputs if path.suffix == '.svg')
+                eprint(f"[INFO] {dot_file.name} ({theme}): 未变化，跳过 {exported} 个 SVG")
+                total_exported += exported
                 continue
 
-            # 重构图形内容
-            graph_content = "\n".join(graph_lines)
+        ensure_dir(str(test_output_dir))
 
-            # 确保图形格式正确
-            if not graph_content.rstrip().endswith('}'):
+        entry = key = None
+        if cache is not None:
+            key = cache.make_key(dot_file, params, LITMUS_THEME_COLORS[theme], CACHE_TOOLS, CACHE_CODE_DIRS)
+            entry = f"{dot_file}:{theme}"
+            restored = cache.restore(entry, key, test_output_dir)
+            if restored is not None:
+                exported = sum(1 for path in restored if path.suffix == '.svg')
+                eprint(f"[INFO] {dot_file.name} ({theme}): 从缓存恢复 {exported} 个 SVG -> {test_output_dir}")
+                total_exported += exported
+                if manifest is not None:
+                    manifest.record(dot_file, theme, digest, restored)
                 continue
 
-            # 应用缩放处理（使SVG变为指定倍数大小）
-            scaled_graph_content = graph_content
-            if scale_factor != 1.0:
-                scaled_graph_content = scale_dot_content(graph_content, scale_factor)
-
-            # 应用主题颜色（复用现有逻辑）
+        pending.append((theme, test_output_dir, entry, key, digest))
+
+    if not pending:
+        return total_exported
+
+    # 读取、解析和缩放只做一次，结果分发给所有主题
+    try:
+        graphs = load_scaled_graphs(dot_file, scale_factor, points=not relayout)
+    except OSError as e:
+        eprint(f"[WARN] 无法读取文件 {dot_file.name}: {e}")
+        return total_exported
+
+    if not graphs:
+        eprint(f"[WARN] 未找到图形数据: {dot_file.name}")
+        return total_exported
+
+    generated_files = {theme: [] for theme, _, _, _, _ in pending}
+    renders = []
+    for i, scaled_graph_content in graphs:
+        targets = []
+        variants = []
+        for theme, test_output_dir, _, _, _ in pending:
+            # 应用主题颜色（复用现有逻辑），同一份内容既写入 DOT 文件也用于渲染
             themed_graph_content = apply_theme_colors_to_dot(scaled_graph_content, theme)
+            variants.append(themed_graph_content)
 
             # 保存主题化的DOT文件
             themed_dot_path = test_output_dir / f"graph_{i:02d}.dot"
             themed_dot_path.write_text(themed_graph_content + "\n", encoding="utf-8")
+            generated_files[theme].append(themed_dot_path)
 
-            # 生成SVG（复用现有逻辑，使用缩放后的内容）
-            svg_path = test_output_dir / f"graph_{i:02d}.svg"
-            if run_neato(scaled_graph_content, svg_path, theme):
+            targets.append((theme, test_output_dir / f"graph_{i:02d}.svg"))
+
+        # SVG 稍后并行生成，每个图只布局一次（使用缩放后的内容）
+        renders.append((scaled_graph_content, targets, variants))
+
+    results = run_neato_many(renders, jobs, layout=relayout)
+
+    for index, (theme, test_output_dir, entry, key, digest) in enumerate(pending):
+        exported = 0
+        failed = 0
+        for (_, targets, _), graph_results in zip(renders, results):
+            if graph_results[index]:
                 exported += 1
+                generated_files[theme].append(targets[index][1])
+            else:
+                failed += 1
+
+        # 只缓存和记录完整成功的结果
+        if exported > 0 and failed == 0:
+            if cache is not None:
+                cache.store(entry, key, test_output_dir, generated_files[theme])
+            if manifest is not None:
+                manifest.record(dot_file, theme, digest, generated_files[theme])
 
         if exported > 0:
             scale_info = f" (缩放 {scale_factor}x)" if scale_factor != 1.0 else ""
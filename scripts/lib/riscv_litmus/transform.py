@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+DOT 几何变换模块
+对已布局（或手工布局）的 DOT 内容中的所有几何属性施加仿射变换
+
+覆盖的属性：
+- 点：节点 pos="x,y[!]"、标签位置 lp / xlp / head_lp / tail_lp
+- 样条：边 pos="[e,x,y ][s,x,y ]x,y x,y ..."（多段以 ; 分隔）
+- 矩形：图的 bb="llx,lly,urx,ury"（变换四个角后取外接矩形）
+- 长度：节点 width / height（只乘以坐标轴方向的缩放，不受平移影响）
+
+所有坐标都变换后，结果可以直接交给 `neato -n2` 渲染，不再计算节点位置。
+"""
+
+import math
+from typing import NamedTuple, Optional, Tuple
+
+from scripts.lib.litmus.dot_lexer import rewrite_attributes, unquote
+
+# neato 输入中 pos 的单位是英寸，-n2 模式下是点
+POINTS_PER_INCH = 72.0
+
+# 坐标为单个点的属性
+POINT_ATTRIBUTES = frozenset(['lp', 'xlp', 'head_lp', 'tail_lp'])
+
+# 所有几何属性
+GEOMETRY_ATTRIBUTES = frozenset(['pos', 'bb', 'width', 'height', *POINT_ATTRIBUTES])
+
+
+class Affine(NamedTuple):
+    """
+    二维仿射变换 (x, y) -> (a*x + b*y + c, d*x + e*y + f)
+    """
+    a: float = 1.0
+    b: float = 0.0
+    c: float = 0.0
+    d: float = 0.0
+    e: float = 1.0
+    f: float = 0.0
+
+    @classmethod
+    def scale(cls, sx: float, sy: Optional[float] = None) -> 'Affine':
+        """缩放（sy 省略时等比缩放）"""
+        return cls(a=sx, e=sx if sy is None else sy)
+
+    @classmethod
+    def translate(cls, tx: float, ty: float) -> 'Affine':
+        """平移"""
+        return cls(c=tx, f=ty)
+
+    @classmethod
+    def rotate(cls, degrees: float) -> 'Affine':
+        """绕原点逆时针旋转"""
+        radians = math.radians(degrees)
+        cos, sin = math.cos(radians), math.sin(radians)
+        return cls(a=cos, b=-sin, d=sin, e=cos)
+
+    def then(self, other: 'Affine') -> 'Affine':
+        """先应用本变换，再应用 other"""
+        return Affine(
+            a=other.a * self.a + other.b * self.d,
+            b=other.a * self.b + other.b * self.e,
+            c=other.a * self.c + other.b * self.f + other.c,
+            d=other.d * self.a + other.e * self.d,
+            e=other.d * self.b + other.e * self.e,
+            f=other.d * self.c + other.e * self.f + other.f,
+        )
+
+    def apply(self, x: float, y: float) -> Tuple[float, float]:
+        """变换一个点"""
+        return self.a * x + self.b * y + self.c, self.d * x + self.e * y + self.f
+
+    @property
+    def axis_scale(self) -> Tuple[float, float]:
+        """x、y 方向单位向量变换后的长度，用于缩放节点尺寸"""
+        return math.hypot(self.a, self.d), math.hypot(self.b, self.e)
+
+
+def _format(value: float) -> str:
+    return f"{value:.6f}"
+
+
+def _transform_point(text: str, transform: Affine) -> str:
+    """变换 "x,y" 或 "x,y,z" 形式的点，z 坐标保持不变"""
+    parts = text.split(',')
+    x, y = transform.apply(float(parts[0]), float(parts[1]))
+    return ','.join([_format(x), _format(y), *parts[2:]])
+
+
+def _transform_spline(text: str, transform: Affine) -> str:
+    """变换边的样条点列表，保留 e,/s, 端点标记和 ; 分段"""
+    segments = []
+    for segment in text.split(';'):
+        points = []
+        for point in segment.split():
+            if point[:2] in ('e,', 's,'):
+                points.append(point[:2] + _transform_point(point[2:], transform))
+            else:
+                points.append(_transform_point(point, transform))
+        segments.append(' '.join(points))
+    return ';'.join(segments)
+
+
+def _transform_rect(text: str, transform: Affine) -> str:
+    """变换 bb 矩形，结果为变换后四个角的外接矩形"""
+    llx, lly, urx, ury = (float(part) for part in text.split(','))
+    corners = [transform.apply(x, y) for x in (llx, urx) for y in (lly, ury)]
+    xs = [x for x, _ in corners]
+    ys = [y for _, y in corners]
+    return ','.join(_format(value) for value in (min(xs), min(ys), max(xs), max(ys)))
+
+
+def transform_value(key: str, value: str, transform: Affine,
+                    size_scale: Optional[Tuple[float, float]] = None) -> Optional[str]:
+    """
+    变换单个几何属性的值
+
+    Args:
+        key: 属性名
+        value: 值的原文（可带引号）
+        transform: 坐标变换
+        size_scale: width、height 的缩放，为 None 时使用 transform.axis_scale
+
+    Returns:
+        新的值原文（保持原来是否带引号），无法解析或不是几何属性时返回 None
+    """
+    text = unquote(value)
+    quoted = text != value
+    try:
+        if key == 'pos':
+            # 节点位置可以带 ! 表示固定
+            pinned = text.endswith('!')
+            body = text[:-1] if pinned else text
+            if ' ' in body or ';' in body or body[:2] in ('e,', 's,'):
+                result = _transform_spline(body, transform)
+            else:
+                result = _transform_point(body, transform)
+            result += '!' if pinned else ''
+        elif key in POINT_ATTRIBUTES:
+            result = _transform_point(text, transform)
+        elif key == 'bb':
+            result = _transform_rect(text, transform)
+        elif key in ('width', 'height'):
+            sx, sy = size_scale if size_scale is not None else transform.axis_scale
+            result = _format(float(text) * (sx if key == 'width' else sy))
+        else:
+            return None
+    except (ValueError, IndexError):
+        return None
+    return f'"{result}"' if quoted else result
+
+
+def transform_dot_content(dot_content: str, transform: Affine,
+                          size_scale: Optional[Tuple[float, float]] = None) -> str:
+    """
+    一次遍历对 DOT 内容中的所有几何属性施加仿射变换
+
+    Args:
+        dot_content: DOT 内容
+        transform: 坐标变换
+        size_scale: width、height 的缩放（英寸），为 None 时使用 transform.axis_scale；
+            坐标同时换算单位（如英寸到点）时需要单独指定
+
+    Returns:
+        变换后的 DOT 内容
+    """
+    return rewrite_attributes(dot_content,
+                              lambda key, value: transform_value(key, value, transform, size_scale),
+                              GEOMETRY_ATTRIBUTES)
+
+
+def to_points(scale_factor: float = 1.0) -> Tuple[Affine, Tuple[float, float]]:
+    """
+    neato 输入（英寸）缩放后换算为 `neato -n2` 使用的点
+
+    Returns:
+        (坐标变换, 节点尺寸缩放)
+    """
+    return Affine.scale(scale_factor * POINTS_PER_INCH), (scale_factor, scale_factor)
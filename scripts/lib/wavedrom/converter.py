@@ -4,16 +4,20 @@ WaveDrom 转换器
 封装 wavedrom-cli 工具调用，支持主题配置和字体设置
 """
 
-import re
 import subprocess
 import tempfile
 from pathlib import Path
 
 import json5
 
+from scripts.lib.common.inkscape import convert_text_to_paths as convert_text_to_paths_pooled
+from scripts.lib.common.svg_theme import apply_svg_theme
 from .colors import get_theme_config
 from .utils import eprint
 
+# 空格字体名必须用引号
+WAVEDROM_FONT_FAMILY = "'M PLUS 1p','MPLUS1p-Regular',monospace"
+
 
 def analyze_wavedrom_fields(wavedrom_content: str) -> dict:
     """
@@ -82,54 +86,32 @@ def apply_theme_to_svg(svg_content: str, theme: str, wavedrom_content: str = "")
     theme_config = get_theme_config(theme)
     stroke_color = theme_config["stroke"]
 
-    # 替换默认的黑色描边为主题颜色
-    svg_content = svg_content.replace('stroke="black"', f'stroke="{stroke_color}"')
-
-    # 为根 SVG 组添加文本颜色，这样所有文本都会继承这个颜色
-    svg_content = svg_content.replace(
-        'text-anchor="middle" font-size="14"',
-        f'text-anchor="middle" font-size="14" fill="{stroke_color}"'
-    )
-
-    # 替换默认字体为 M PLUS 1p（空格字体名必须用引号）
-    svg_content = svg_content.replace(
-        'font-family="sans-serif"',
-        'font-family="\'M PLUS 1p\',\'MPLUS1p-Regular\',monospace"'
-    )
+    rules = {
+        # 替换默认的黑色描边为主题颜色
+        'stroke': {'black': stroke_color},
+        # 为根 SVG 组添加文本颜色，这样所有文本都会继承这个颜色
+        'add_attrs': [({'text-anchor': 'middle', 'font-size': '14'}, {'fill': stroke_color})],
+        # 替换默认字体为 M PLUS 1p（空格字体名必须用引号）
+        'font_family': {'sans-serif': WAVEDROM_FONT_FAMILY},
+    }
 
     # 处理1位字段但字符数超过3的特殊情况，设置字体大小为12px
+    # 匹配 <text><tspan>content</tspan></text> 格式的文本元素
     if wavedrom_content:
         special_fields = analyze_wavedrom_fields(wavedrom_content)
+        rules['text_font_size'] = {
+            field_info['original_text']: '12'
+            for field_info in special_fields.values()
+            if field_info['needs_small_font']
+        }
 
-        for field_name, field_info in special_fields.items():
-            if field_info['needs_small_font']:
-                original_text = field_info['original_text']
-
-                # 查找包含该文本的 text 元素（可能包装在 tspan 中），将字体大小改为12px
-                # 匹配 <text><tspan>content</tspan></text> 格式
-                text_pattern = f'(<text[^>]*>)<tspan>{re.escape(original_text)}</tspan>(</text>)'
-
-                def replace_font_size(match):
-                    opening_tag = match.group(1)
-                    closing_tag = match.group(2)
-
-                    # 替换或添加 font-size 属性
-                    if 'font-size=' in opening_tag:
-                        opening_tag = re.sub(r'font-size="[^"]*"', 'font-size="12"', opening_tag)
-                    else:
-                        # 在 > 之前添加 font-size 属性
-                        opening_tag = opening_tag.replace('>', ' font-size="12">')
-
-                    return f'{opening_tag}<tspan>{original_text}</tspan>{closing_tag}'
-
-                svg_content = re.sub(text_pattern, replace_font_size, svg_content)
-
-    return svg_content
+    return apply_svg_theme(svg_content, rules)
 
 
 def convert_text_to_paths(svg_path: Path) -> bool:
     """
     使用 Inkscape 将 SVG 中的文本转换为路径，以不依赖字体
+    转换通过共享的 Inkscape 会话池完成，避免每个文件都重新启动 Inkscape
     
     Args:
         svg_path: SVG 文件路径
@@ -137,30 +119,7 @@ def convert_text_to_paths(svg_path: Path) -> bool:
     Returns:
         转换是否成功
     """
-    try:
-        # 检查 Inkscape 是否安装
-        subprocess.run(['inkscape', '-V'],
-                       check=True, capture_output=True)
-
-        # 使用 Inkscape 将文本转换为路径
-        subprocess.run([
-            'inkscape',
-            '-T',  # --export-text-to-path 的简写形式
-            '-l',  # --export-plain-svg 移除 Inkscape 特定属性
-            f'--export-filename={svg_path}',
-            str(svg_path)
-        ], check=True, capture_output=True)
-
-        return True
-
-    except FileNotFoundError:
-        eprint("错误: 未找到 Inkscape，请先安装 Inkscape")
-        eprint("macOS: brew install inkscape")
-        eprint("Ubuntu: sudo apt install inkscape")
-        return False
-    except subprocess.CalledProcessError as e:
-        eprint(f"Inkscape 执行失败: {e}")
-        return False
+    return convert_text_to_paths_pooled(svg_path)
 
 
 def convert_to_svg(wavedrom_content: str, output_path: Path, theme: str) -> bool:
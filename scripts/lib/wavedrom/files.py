@@ -7,6 +7,7 @@
 import pathlib
 from typing import List, Tuple
 
+from scripts.lib.common.asset_index import get_asset_index
 from scripts.lib.common.utils import find_project_root
 
 
@@ -25,19 +26,14 @@ def find_wavedrom_files(themes: List[str]) -> List[Tuple[pathlib.Path, List[Tupl
 
     wavedrom_files = []
 
-    # 递归查找所有 _assets/wavedrom 目录
-    for wavedrom_dir in blog_dir.rglob("_assets/wavedrom"):
-        if not wavedrom_dir.is_dir():
-            continue
+    # 从共享的资产索引中取出所有 blog/**/_assets/wavedrom/*.edn 文件
+    for edn_file in get_asset_index().files('wavedrom'):
+        # 为每个主题创建对应的输出目录
+        theme_dirs = []
+        for theme in themes:
+            images_theme_dir = edn_file.parent.parent / "images" / theme
+            theme_dirs.append((theme, images_theme_dir))
 
-        # 查找该目录下的所有 .edn 文件
-        for edn_file in wavedrom_dir.glob("*.edn"):
-            # 为每个主题创建对应的输出目录
-            theme_dirs = []
-            for theme in themes:
-                images_theme_dir = wavedrom_dir.parent / "images" / theme
-                theme_dirs.append((theme, images_theme_dir))
-
-            wavedrom_files.append((edn_file, theme_dirs))
+        wavedrom_files.append((edn_file, theme_dirs))
 
     return wavedrom_files
@@ -6,13 +6,20 @@ WaveDrom SVG 生成器
 
 import argparse
 import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
-from .colors import THEME_CHOICES
+from scripts.lib.common.cache import BuildCache, add_cache_arguments, cache_from_args
+from .colors import THEME_CHOICES, WAVEDROM_THEMES
 from .converter import convert_to_svg
 from .files import find_wavedrom_files
 from .parser import extract_wavedrom_content
 from .utils import eprint
 
+# 影响输出的外部工具和生成器代码目录（参与缓存键计算）
+CACHE_TOOLS = ['wavedrom-cli', 'inkscape']
+CACHE_CODE_DIRS = [Path(__file__).parent, Path(__file__).parent.parent / 'common']
+
 
 def parse_args():
     """解析命令行参数"""
@@ -39,9 +46,46 @@ def parse_args():
         help='指定要生成的主题 (默认: all - 生成所有主题)'
     )
 
+    add_cache_arguments(parser)
+
     return parser.parse_args()
 
 
+def process_wavedrom_file(edn_file: Path, theme_dirs: List[Tuple[str, Path]],
+                          cache: BuildCache) -> Optional[Dict[str, str]]:
+    """
+    处理单个 wavedrom 文件，为每个主题生成 SVG（未变化的主题从缓存恢复）
+
+    Args:
+        edn_file: wavedrom 源文件路径
+        theme_dirs: (主题, 输出目录) 列表
+        cache: 构建缓存
+
+    Returns:
+        主题到处理结果的映射：'cached'、'generated' 或 'failed'；
+        无法提取 wavedrom 内容时返回 None
+    """
+    # 提取 wavedrom 内容
+    wavedrom_content = extract_wavedrom_content(edn_file)
+    if not wavedrom_content:
+        return None
+
+    statuses = {}
+    for theme, output_dir in theme_dirs:
+        output_file = output_dir / f"{edn_file.stem}.svg"
+        key = cache.make_key(wavedrom_content, None, WAVEDROM_THEMES[theme], CACHE_TOOLS, CACHE_CODE_DIRS)
+        entry = f"{edn_file}:{theme}"
+        if cache.restore(entry, key, output_file.parent) is not None:
+            statuses[theme] = 'cached'
+        elif convert_to_svg(wavedrom_content, output_file, theme):
+            cache.store(entry, key, output_file.parent, [output_file])
+            statuses[theme] = 'generated'
+        else:
+            statuses[theme] = 'failed'
+
+    return statuses
+
+
 def main():
     """主函数"""
     args = parse_args()
@@ -64,6 +108,8 @@ def main():
 
         print(f"找到 {len(wavedrom_files)} 个 wavedrom 文件")
 
+        cache = cache_from_args('wavedrom', args)
+
         success_count = 0
         total_count = 0
 
@@ -71,25 +117,27 @@ def main():
         for edn_file, theme_dirs in wavedrom_files:
             print(f"\n处理文件: {edn_file}")
 
-            # 提取 wavedrom 内容
-            wavedrom_content = extract_wavedrom_content(edn_file)
-            if not wavedrom_content:
+            statuses = process_wavedrom_file(edn_file, theme_dirs, cache)
+            if statuses is None:
                 eprint(f"  跳过: 无法提取 wavedrom 内容")
                 continue
 
-            # 为每个主题生成 SVG
             for theme, output_dir in theme_dirs:
                 output_file = output_dir / f"{edn_file.stem}.svg"
                 print(f"  生成 {theme} 主题: {output_file}")
 
                 total_count += 1
-                if convert_to_svg(wavedrom_content, output_file, theme):
+                if statuses[theme] == 'cached':
+                    success_count += 1
+                    print(f"    ✓ 成功 (缓存)")
+                elif statuses[theme] == 'generated':
                     success_count += 1
                     print(f"    ✓ 成功")
                 else:
                     eprint(f"    ✗ 失败")
 
         print(f"\n生成完成: {success_count}/{total_count} 个文件成功")
+        print(cache.summary())
 
         if success_count == total_count:
             return 0